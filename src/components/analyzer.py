@@ -12,7 +12,7 @@ from config import config
 # GLOBAL VARIABLES
 
 log = logging.getLogger(__name__)
-EXCLUDE_COLUMNS = ["id", "sync_status"]
+EXCLUDE_COLUMNS = ["id", "quality", "sync_status"]
 
 class DataAnalyzer:
     """
@@ -32,44 +32,55 @@ class DataAnalyzer:
         @return: DataFrame with statistics or None if error
         """
         try:
-            param_groups = {}
             analysis_columns = [col for col in df.columns if col not in EXCLUDE_COLUMNS + ["Timestamp"]]
+            summary = {}
             for column in analysis_columns:
-                if column == "Timestamp":
-                    continue
-                group = description_to_group_map.get(column, "Parameter Readings Summary")
-                if group not in param_groups:
-                    param_groups[group] = []
-                param_groups[group].append(column)
-
-            print("\n===== Power Meter Statistics =====")
-            if df.empty:
-                print("No data available for the selected time range.")
-                return df
-
-            for group_name, columns in param_groups.items():
-                if not columns: 
-                    print(f"\n{group_name}: Not enough data for statistics calculation.")
-                    continue
-
-                print(f"\n{group_name}:")
-                for column in columns:
-                    if column in df.columns:
-                        unit = ""
-                        if '(' in column and ')' in column:
-                            unit = column.split('(')[-1].split(')')[0]
-                        print(f"\n  {column}:")
-                        stats = df[column].describe()
-                        print(f"    min:    {stats.get('min', 0):.2f} {unit}")
-                        print(f"    max:    {stats.get('max', 0):.2f} {unit}")
-                        print(f"    mean:   {stats.get('mean', 0):.2f} {unit}")
-                        print(f"    std:    {stats.get('std', 0):.2f} {unit}")
+                stats = df[column].describe()
+                summary[column] = {key: stats.get(key, 0) for key in ("min", "max", "mean", "std")}
 
+            self.report_statistics(summary, description_to_group_map, empty=df.empty)
             return df
         except Exception as e:
             log.error(f"Statistics Error: {e}", exc_info=True)
             return None
 
+    def report_statistics(self, summary, description_to_group_map, empty=False):
+        """
+        Print per-group statistics of precomputed column summaries.
+
+        @summary: Dictionary mapping column names to min/max/mean/std dictionaries
+        @description_to_group_map: Dictionary mapping column names to relevant groups
+        @empty: Boolean flag indicating that the selected time range has no rows
+        """
+        param_groups = {}
+        for column in summary:
+            group = description_to_group_map.get(column, "Parameter Readings Summary")
+            if group not in param_groups:
+                param_groups[group] = []
+            param_groups[group].append(column)
+
+        print("\n===== Power Meter Statistics =====")
+        if empty:
+            print("No data available for the selected time range.")
+            return
+
+        for group_name, columns in param_groups.items():
+            if not columns: 
+                print(f"\n{group_name}: Not enough data for statistics calculation.")
+                continue
+
+            print(f"\n{group_name}:")
+            for column in columns:
+                unit = ""
+                if '(' in column and ')' in column:
+                    unit = column.split('(')[-1].split(')')[0]
+                stats = summary[column]
+                print(f"\n  {column}:")
+                print(f"    min:    {stats['min']:.2f} {unit}")
+                print(f"    max:    {stats['max']:.2f} {unit}")
+                print(f"    mean:   {stats['mean']:.2f} {unit}")
+                print(f"    std:    {stats['std']:.2f} {unit}")
+
     def calculate_session_consumption(self, df):
         """ 
         Compute total consumption for cumulative columns from a DataFrame.
@@ -78,44 +89,62 @@ class DataAnalyzer:
         @return: Dictionary with total consumption or None if error
         """
         try:
-            consumption_results = {}
-            columns = [col for col in df.columns if "total" in col.lower()]
-            if not columns:
-                log.warning("No cumulative columns found for consumption calculation.")
-                return {}
-            
-            if df.empty:
-                print("\nNo data available for consumption calculation in the selected time range.")
-                return {}
-
-            print("\n===== Session Consumption Analysis =====\n")
-            for column in columns:
+            summary = {}
+            for column in [col for col in df.columns if "total" in col.lower()]:
                 series = df[column].dropna()
-                if len(series) < 2:
-                    print(f"  {column}: Not enough data for consumption calculation.")
-                    continue
+                summary[column] = {
+                    "count": len(series),
+                    "first": series.iloc[0] if len(series) else None,
+                    "last": series.iloc[-1] if len(series) else None,
+                }
+            return self.report_consumption(summary, empty=df.empty)
+        except Exception as e:
+            log.error(f"Consumption Analysis Error: {e}", exc_info=True)
+            return None
 
-                first_val = series.iloc[0]
-                last_val = series.iloc[-1]
+    def report_consumption(self, summary, empty=False):
+        """
+        Print the consumption of cumulative columns from their first and last readings.
 
-                if last_val < first_val:
-                    # Meter rollover calculation
-                    consumption = (config.MAX_METER_VALUE - first_val) + last_val
-                else:
-                    # Normal calculation
-                    consumption = last_val - first_val
+        @summary: Dictionary mapping column names to count/first/last dictionaries
+        @empty: Boolean flag indicating that the selected time range has no rows
+        @return: Dictionary with total consumption
+        """
+        consumption_results = {}
+        columns = [col for col in summary if "total" in col.lower()]
+        if not columns:
+            log.warning("No cumulative columns found for consumption calculation.")
+            return {}
 
-                # Extract the unit from the column name
-                unit = ""
-                if '(' in column and ')' in column:
-                    unit = column.split('(')[-1].split(')')[0]
-                print(f"  {column}: {consumption:.3f} {unit}")
-                consumption_results[column] = consumption
+        if empty:
+            print("\nNo data available for consumption calculation in the selected time range.")
+            return {}
 
-            return consumption_results
-        except Exception as e:
-            log.error(f"Consumption Analysis Error: {e}", exc_info=True)
-            return None
+        print("\n===== Session Consumption Analysis =====\n")
+        for column in columns:
+            stats = summary[column]
+            if stats["count"] < 2:
+                print(f"  {column}: Not enough data for consumption calculation.")
+                continue
+
+            first_val = stats["first"]
+            last_val = stats["last"]
+
+            if last_val < first_val:
+                # Meter rollover calculation
+                consumption = (config.MAX_METER_VALUE - first_val) + last_val
+            else:
+                # Normal calculation
+                consumption = last_val - first_val
+
+            # Extract the unit from the column name
+            unit = ""
+            if '(' in column and ')' in column:
+                unit = column.split('(')[-1].split(')')[0]
+            print(f"  {column}: {consumption:.3f} {unit}")
+            consumption_results[column] = consumption
+
+        return consumption_results
 
     # TIME SERIES PLOTTING
 
@@ -0,0 +1,140 @@
+# src/components/broadcast.py
+
+import json
+import time
+import threading
+
+from config import config
+from collections import deque
+from datetime import date, datetime
+
+# HELPERS
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# SERVICES
+
+class Subscription:
+    """
+    Bounded queue of server-sent event frames for one client.
+    A slow client loses its oldest frames instead of slowing down publishers.
+    """
+    __slots__ = ("_frames", "_cond", "closed", "dropped")
+
+    def __init__(self, size):
+        self._frames = deque(maxlen=size)
+        self._cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, frame):
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append(frame)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Waits for the next frame.
+
+        @timeout: Maximum time to wait in seconds
+        @return: Event frame or None on timeout or close
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._frames or self.closed, timeout)
+            return self._frames.popleft() if self._frames else None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+class Broadcaster:
+    """
+    In-process fan-out of server-sent events.
+    Each event is serialized once and handed to every subscriber's queue.
+    """
+    def __init__(self, queue_size=config.SSE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._last_frames = {}
+        self._last_published = {}
+        self._changed = threading.Event()
+        self._published = 0
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """
+        Registers a client and primes it with the last frame of every event.
+
+        @return: Subscription object
+        """
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            for frame in self._last_frames.values():
+                subscription.put(frame)
+            self._subscribers.add(subscription)
+        self.mark_changed()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event, data, min_interval=0):
+        """
+        Sends an event to all subscribers.
+
+        @event: Event name
+        @data: JSON-serializable payload
+        @min_interval: Minimum seconds between two events of this name; faster events are skipped
+        @return: Boolean flag indicating if the event was sent
+        """
+        now = time.monotonic()
+        if min_interval and now - self._last_published.get(event, float("-inf")) < min_interval:
+            return False
+        frame = f"event: {event}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+        with self._lock:
+            self._last_frames[event] = frame
+            self._last_published[event] = now
+            self._published += 1
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(frame)
+        return True
+
+    def mark_changed(self):
+        """
+        Signals that the logger or sync status changed and should be republished.
+        """
+        self._changed.set()
+
+    def wait_changed(self, timeout):
+        """
+        Waits for a status change or the timeout.
+
+        @timeout: Maximum time to wait in seconds
+        """
+        self._changed.wait(timeout)
+        self._changed.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self._published,
+                "dropped": sum(s.dropped for s in self._subscribers),
+            }
+
+# GLOBAL INSTANCE
+
+broadcaster = Broadcaster()
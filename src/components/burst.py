@@ -0,0 +1,104 @@
+# src/components/burst.py
+
+import time
+import warnings
+import numpy as np
+
+from config import config
+
+# SERVICES
+
+class BurstBuffer:
+    """
+    Fixed-size, preallocated ring buffer of raw burst mode samples.
+    Raw samples stay in memory; only per-window aggregates are persisted.
+    """
+    def __init__(self, width, capacity=config.BURST_RING_SIZE):
+        self.width = width
+        self.capacity = capacity
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._data = np.full((capacity, width), np.nan, dtype=np.float64)
+        self._head = 0
+        self._size = 0
+        self._window = 0
+        self._samples = 0
+        self._overruns = 0
+        self._started_at = time.monotonic()
+
+    @property
+    def pending(self):
+        """
+        Number of samples in the current aggregation window.
+        """
+        return self._window
+
+    def append(self, ts, values):
+        """
+        Stores a raw sample, overwriting the oldest one when the ring is full.
+
+        @ts: POSIX timestamp of the sample
+        @values: Plan-ordered value list, None for missing values
+        """
+        self._ts[self._head] = ts
+        self._data[self._head] = [np.nan if v is None else v for v in values]
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._window += 1
+        self._samples += 1
+
+    def _window_rows(self):
+        """
+        Get the ring indices of the samples in the current window in arrival order.
+        """
+        count = min(self._window, self.capacity)
+        return np.arange(self._head - count, self._head) % self.capacity
+
+    def aggregate(self):
+        """
+        Aggregates the samples since the last call and starts a new window.
+
+        @return: Tuple of (mean, min, max, last) plan-ordered value lists or None if the window is empty
+        """
+        if self._window == 0:
+            return None
+        if self._window > self.capacity:
+            # Samples older than the ring were overwritten before the window closed
+            self._overruns += self._window - self.capacity
+
+        window = self._data[self._window_rows()]
+        valid = ~np.isnan(window)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning) # All-NaN columns yield NaN
+            means = np.nanmean(window, axis=0)
+            mins = np.nanmin(window, axis=0)
+            maxs = np.nanmax(window, axis=0)
+
+        # Last valid value per column, found by scanning the window backwards
+        last_index = window.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+        lasts = np.where(valid.any(axis=0), window[last_index, np.arange(self.width)], np.nan)
+
+        self._window = 0
+        return tuple(_to_values(column) for column in (means, mins, maxs, lasts))
+
+    def get_stats(self):
+        """
+        Get raw sample counters of the buffer.
+
+        @return: Dictionary with buffer statistics
+        """
+        elapsed = time.monotonic() - self._started_at
+        return {
+            "capacity": self.capacity,
+            "samples": self._samples,
+            "windowSamples": self._window,
+            "overruns": self._overruns,
+            "achievedRate": round(self._samples / elapsed, 3) if elapsed > 0 else None,
+        }
+
+# FUNCTIONS
+
+def _to_values(column):
+    """
+    Converts an aggregate column to a rounded value list with None for missing values.
+    """
+    return [None if np.isnan(v) else round(float(v), 3) for v in column]
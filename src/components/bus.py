@@ -0,0 +1,139 @@
+# src/components/bus.py
+
+import time
+import heapq
+import logging
+import itertools
+import threading
+import minimalmodbus
+
+from config import config
+from components.settings import settings
+from contextlib import contextmanager
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+PARITY_MAP = {
+    'N': minimalmodbus.serial.PARITY_NONE,
+    'E': minimalmodbus.serial.PARITY_EVEN,
+    'O': minimalmodbus.serial.PARITY_ODD,
+}
+
+# SERVICES
+
+class ModbusBus:
+    """
+    Owns the RS-485 serial port and time-multiplexes transactions across slave IDs.
+    Transactions are granted one at a time in request order.
+    """
+    def __init__(self, port=config.MODBUS_PORT):
+        self.port = port
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._busy = False
+        self._instruments = {}
+        self._stats = {}
+
+    def instrument(self, slave_id):
+        """
+        Gets the Modbus instrument for a slave ID and applies the current serial settings.
+        Instruments on the same port share one serial connection.
+
+        @slave_id: Modbus slave address of the meter
+        @return: minimalmodbus.Instrument object
+        """
+        with self._cond:
+            try:
+                instrument = self._instruments.get(slave_id)
+                if instrument is None:
+                    instrument = minimalmodbus.Instrument(port=self.port, slaveaddress=slave_id)
+                parity_str = settings.get("PARITY")
+                instrument.serial.parity = PARITY_MAP.get(parity_str, minimalmodbus.serial.PARITY_NONE)
+                instrument.serial.baudrate = settings.get("BAUDRATE")
+                instrument.serial.bytesize = settings.get("BYTESIZE")
+                instrument.serial.stopbits = settings.get("STOPBITS")
+                instrument.serial.timeout = settings.get("TIMEOUT")
+                instrument.mode = minimalmodbus.MODE_RTU
+            except Exception as e:
+                raise ConnectionError(f"Failed to initialize Modbus on port '{self.port}': {e}")
+
+            if slave_id not in self._instruments:
+                self._instruments[slave_id] = instrument
+                self._stats[slave_id] = {
+                    "polls": 0,
+                    "failures": 0,
+                    "busySeconds": 0.0,
+                    "waitSeconds": 0.0,
+                    "firstPoll": None,
+                    "lastPoll": None,
+                }
+            return instrument
+
+    @contextmanager
+    def transaction(self, slave_id):
+        """
+        Grants exclusive use of the bus to a slave for one sample.
+
+        @slave_id: Modbus slave address of the meter
+        @return: Context manager yielding the slave's instrument
+        """
+        instrument = self._instruments.get(slave_id) or self.instrument(slave_id)
+        ticket = (time.monotonic(), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            while self._busy or self._queue[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._queue)
+            self._busy = True
+
+        started = time.monotonic()
+        success = False
+        try:
+            yield instrument
+            success = True
+        finally:
+            finished = time.monotonic()
+            with self._cond:
+                self._busy = False
+                self._record(slave_id, success, started - ticket[0], finished - started, finished)
+                self._cond.notify_all()
+
+    def _record(self, slave_id, success, wait, busy, finished):
+        """
+        Updates the transaction statistics of a slave.
+        """
+        stats = self._stats[slave_id]
+        stats["polls"] += 1
+        if not success:
+            stats["failures"] += 1
+        stats["waitSeconds"] += wait
+        stats["busySeconds"] += busy
+        if stats["firstPoll"] is None:
+            stats["firstPoll"] = finished
+        stats["lastPoll"] = finished
+
+    def get_stats(self):
+        """
+        Get per-slave polling statistics including the achieved poll rate.
+
+        @return: Dictionary keyed by slave ID
+        """
+        with self._cond:
+            result = {}
+            for slave_id, stats in self._stats.items():
+                polls = stats["polls"]
+                span = (stats["lastPoll"] - stats["firstPoll"]) if polls > 1 else 0
+                result[slave_id] = {
+                    "polls": polls,
+                    "failures": stats["failures"],
+                    "achievedRate": round((polls - 1) / span, 4) if span > 0 else None,
+                    "avgPollSeconds": round(stats["busySeconds"] / polls, 4) if polls else None,
+                    "avgWaitSeconds": round(stats["waitSeconds"] / polls, 4) if polls else None,
+                }
+            return result
+
+# GLOBAL INSTANCE
+
+modbus_bus = ModbusBus()
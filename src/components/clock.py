@@ -0,0 +1,144 @@
+# src/components/clock.py
+
+import math
+import time
+import threading
+
+from datetime import datetime
+
+# SERVICES
+
+class TickScheduler:
+    """
+    Fires sampling ticks on wall-clock-aligned interval boundaries (e.g. :00, :15, :30).
+    The boundary is computed on the wall clock once and then waited for on the monotonic clock, so
+    processing time is absorbed and lateness is measured independently of clock adjustments. The
+    schedule is realigned only when the wall clock steps against the monotonic clock (NTP or RTC
+    corrections), which is neither counted as missed ticks nor stretches the current tick.
+    """
+    STEP_TOLERANCE = 1.0 # Seconds the wall clock may drift from the monotonic clock before realigning
+
+    def __init__(self, interval, stop_event=None):
+        self.interval = float(interval)
+        self._stop_event = stop_event or threading.Event()
+        self._offset = None
+        self._next = None
+        self._next_wall = None
+        self._last_wall = None
+        self._ticks = 0
+        self._missed = 0
+        self._steps = 0
+        self._lateness_sum = 0.0
+        self._lateness_sq_sum = 0.0
+        self._lateness_max = 0.0
+        self._lateness_last = 0.0
+
+    def _align(self, wall):
+        """
+        Get the first local-time interval boundary at or after a wall-clock time.
+
+        @wall: POSIX timestamp
+        @return: POSIX timestamp of the boundary
+        """
+        offset = datetime.fromtimestamp(wall).astimezone().utcoffset().total_seconds()
+        return math.ceil((wall + offset) / self.interval) * self.interval - offset
+
+    def _schedule(self):
+        """
+        Converts the next wall-clock boundary into a monotonic deadline.
+        Runs on the first tick and whenever the wall clock stepped since the last conversion.
+        """
+        offset = time.time() - time.monotonic()
+        if self._offset is not None and abs(offset - self._offset) < self.STEP_TOLERANCE:
+            return
+        if self._offset is not None:
+            self._steps += 1
+        self._offset = offset
+        wall = self._align(time.monotonic() + offset)
+        if self._last_wall is not None and abs(wall - self._last_wall) < 1e-6:
+            # Realigned onto the tick that just fired
+            wall += self.interval
+        self._next_wall = wall
+        self._next = wall - offset
+
+    def seconds_until_next(self):
+        """
+        Get the time left until the tick after the current one.
+
+        @return: Seconds until the next tick
+        """
+        if self._next is None:
+            return self.interval
+        return max(0.0, self._next - time.monotonic())
+
+    def wait(self):
+        """
+        Blocks until the next tick boundary.
+
+        @return: Datetime of the scheduled tick or None if stopped
+        """
+        while True:
+            self._schedule()
+            delay = self._next - time.monotonic()
+            if delay <= 0:
+                break
+            # Wake up periodically to notice wall clock steps during long intervals
+            if self._stop_event.wait(min(delay, 60)):
+                return None
+        return self._fire()
+
+    def poll(self):
+        """
+        Fires the current tick if its boundary has passed, without blocking.
+
+        @return: Datetime of the scheduled tick or None if it is not due yet
+        """
+        self._schedule()
+        if self._next - time.monotonic() > 0:
+            return None
+        return self._fire()
+
+    def _fire(self):
+        """
+        Advances past a due tick and records its lateness.
+
+        @return: Datetime of the scheduled tick
+        """
+        lateness = time.monotonic() - self._next
+        if lateness >= self.interval:
+            missed = int(lateness // self.interval)
+            self._missed += missed
+            self._next += missed * self.interval
+            self._next_wall += missed * self.interval
+            lateness -= missed * self.interval
+
+        tick = self._next_wall
+        self._last_wall = tick
+        self._next += self.interval
+        self._next_wall += self.interval
+        self._ticks += 1
+        self._lateness_sum += lateness
+        self._lateness_sq_sum += lateness * lateness
+        self._lateness_max = max(self._lateness_max, lateness)
+        self._lateness_last = lateness
+        return datetime.fromtimestamp(tick)
+
+    def get_stats(self):
+        """
+        Get tick, missed tick and lateness statistics in milliseconds.
+
+        @return: Dictionary with scheduler statistics
+        """
+        ticks = self._ticks
+        mean = self._lateness_sum / ticks if ticks else 0.0
+        variance = max(0.0, self._lateness_sq_sum / ticks - mean * mean) if ticks else 0.0
+        return {
+            "interval": self.interval,
+            "ticks": ticks,
+            "missedTicks": self._missed,
+            "clockSteps": self._steps,
+            "latenessLastMs": round(self._lateness_last * 1000, 3),
+            "latenessMeanMs": round(mean * 1000, 3),
+            "latenessMaxMs": round(self._lateness_max * 1000, 3),
+            "jitterMs": round(math.sqrt(variance) * 1000, 3),
+        }
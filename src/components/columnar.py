@@ -0,0 +1,221 @@
+# src/components/columnar.py
+
+import os
+import logging
+
+from config import config
+from components.pipeline import Sink
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+
+# SERVICES
+
+class ParquetSink(Sink):
+    """
+    Writes a session as Parquet part files under PARQUET_DIR/<session>/.
+    Samples are buffered into row groups of PARQUET_ROW_GROUP_SIZE rows (or PARQUET_ROW_GROUP_INTERVAL
+    seconds) and a new part file is started every PARQUET_ROW_GROUPS_PER_FILE row groups, so a crash
+    only loses the part file that was still open.
+    """
+    name = "Parquet"
+
+    def __init__(self, session_name, columns, metadata=None, row_group_size=config.PARQUET_ROW_GROUP_SIZE,
+                 row_group_interval=config.PARQUET_ROW_GROUP_INTERVAL,
+                 row_groups_per_file=config.PARQUET_ROW_GROUPS_PER_FILE):
+        self.directory = session_dir(session_name)
+        self.row_group_size = max(1, row_group_size)
+        self.row_group_interval = row_group_interval
+        self.row_groups_per_file = max(1, row_groups_per_file)
+
+        # Columns are named like the CSV header and carry the parameter and description as metadata
+        fields = [pa.field("Timestamp", pa.timestamp("s"), nullable=False)]
+        for param, description, dtype in columns:
+            arrow_type = pa.float32() if dtype == "float32" else pa.float64()
+            fields.append(pa.field(description, arrow_type, metadata={
+                "parameter": param,
+                "description": description,
+            }))
+        fields.append(pa.field("quality", pa.string()))
+        self.schema = pa.schema(fields, metadata={k: str(v) for k, v in (metadata or {}).items()})
+
+        self._ts = []
+        self._values = [[] for _ in columns]
+        self._quality = []
+        self._writer = None
+        self._groups_in_file = 0
+        self._row_groups = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._quarantine_broken_parts()
+        log.info(f"Parquet logging initialized to '{self.directory}' successfully.")
+
+    @classmethod
+    def create(cls, session_name, columns, metadata=None):
+        """
+        Creates the sink if Parquet output is enabled and pyarrow is installed.
+
+        @session_name: Session table name used as the directory name
+        @columns: List of (parameter, description, dtype) tuples in sample value order
+        @metadata: Dictionary stored as schema metadata
+        @return: ParquetSink object or None
+        """
+        if not config.PARQUET_ENABLED:
+            return None
+        if pa is None:
+            log.warning("Parquet output is enabled but pyarrow is not installed. Continuing without it.")
+            return None
+        return cls(session_name, columns, metadata)
+
+    def _quarantine_broken_parts(self):
+        """
+        Renames part files without a valid footer, e.g. left open by a crash, so readers skip them.
+        """
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".parquet"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                pq.read_metadata(path)
+            except Exception:
+                os.replace(path, f"{path}.broken")
+                log.warning(f"Parquet part '{path}' is incomplete and was set aside.")
+
+    def _write_row_group(self):
+        """
+        Writes the buffered samples as one row group.
+        """
+        arrays = [pa.array(self._ts, type=pa.timestamp("s"))]
+        for values, field in zip(self._values, self.schema[1:-1]):
+            arrays.append(pa.array(values, type=field.type))
+        arrays.append(pa.array(self._quality, type=pa.string()))
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+
+        if self._writer is None:
+            path = os.path.join(self.directory, f"part-{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.parquet")
+            self._writer = pq.ParquetWriter(path, self.schema, compression=config.PARQUET_COMPRESSION)
+            self._groups_in_file = 0
+        self._writer.write_table(table, row_group_size=len(self._ts))
+        self._groups_in_file += 1
+        self._row_groups += 1
+
+        self._ts = []
+        self._values = [[] for _ in self._values]
+        self._quality = []
+        if self._groups_in_file >= self.row_groups_per_file:
+            self._close_part()
+
+    def _close_part(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _row_group_due(self):
+        if len(self._ts) >= self.row_group_size:
+            return True
+        return bool(self._ts) and (datetime.now() - self._ts[0]).total_seconds() >= self.row_group_interval
+
+    def write(self, samples):
+        for s in samples:
+            self._ts.append(s.ts)
+            for column, value in zip(self._values, s.values):
+                column.append(value)
+            self._quality.append(s.quality)
+        if self._row_group_due():
+            self._write_row_group()
+
+    def flush(self):
+        if self._row_group_due():
+            self._write_row_group()
+
+    def close(self):
+        try:
+            if self._ts:
+                self._write_row_group()
+        finally:
+            self._close_part()
+
+    def get_stats(self):
+        return {
+            "bufferedRows": len(self._ts),
+            "rowGroups": self._row_groups,
+        }
+
+# FUNCTIONS
+
+def session_dir(session_name):
+    """
+    Get the Parquet directory of a session.
+
+    @session_name: Session table name or CSV file name
+    @return: Path of the directory
+    """
+    return config.PARQUET_DIR / os.path.splitext(os.path.basename(session_name))[0]
+
+def session_parts(session_name):
+    """
+    Get the readable Parquet part files of a session.
+
+    @session_name: Session table name or CSV file name
+    @return: Sorted list of file paths, empty if there are none or pyarrow is missing
+    """
+    directory = session_dir(session_name)
+    if pq is None or not os.path.isdir(directory):
+        return []
+    parts = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".parquet"):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            pq.read_metadata(path)
+            parts.append(path)
+        except Exception:
+            continue # Part is still being written or was left open by a crash
+    return parts
+
+def session_columns(session_name):
+    """
+    Get the parameter columns of a Parquet session from the file metadata only.
+
+    @session_name: Session table name or CSV file name
+    @return: List of column names or None if the session has no Parquet data
+    """
+    parts = session_parts(session_name)
+    if not parts:
+        return None
+    return [name for name in pq.read_schema(parts[0]).names if name not in ("Timestamp", "quality")]
+
+def read_session(session_name, columns=None, start=None, end=None):
+    """
+    Reads only the requested columns and time range of a Parquet session.
+
+    @session_name: Session table name or CSV file name
+    @columns: Column names to read besides the timestamp, or None for all
+    @start: Optional inclusive start datetime
+    @end: Optional exclusive end datetime
+    @return: DataFrame or None if the session has no Parquet data
+    """
+    parts = session_parts(session_name)
+    if not parts:
+        return None
+    dataset = ds.dataset(parts, format="parquet")
+    if columns is not None:
+        columns = ["Timestamp"] + [c for c in columns if c in dataset.schema.names and c != "Timestamp"]
+
+    condition = None
+    if start is not None:
+        condition = ds.field("Timestamp") >= start
+    if end is not None:
+        end_condition = ds.field("Timestamp") < end
+        condition = end_condition if condition is None else condition & end_condition
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
@@ -0,0 +1,229 @@
+# src/components/compression.py
+
+import logging
+
+from config import config
+from components.pipeline import Sample
+from components.planner import sql_column_name
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+METHOD_DEADBAND = "deadband"
+METHOD_SWINGING_DOOR = "swinging_door"
+METHOD_MAX_INTERVAL = "max_interval"
+METHODS = (METHOD_DEADBAND, METHOD_SWINGING_DOOR, METHOD_MAX_INTERVAL)
+
+# SERVICES
+
+class ParameterFilter:
+    """
+    Decides which readings of one parameter are stored.
+    Deadband stores a reading once it leaves the band around the last stored value; swinging door
+    stores a reading when a straight line from the last stored point to the following reading would
+    no longer pass within the deviation of every reading in between. Both store at least one reading
+    every max_interval seconds and always keep the readings on either side of a failed read.
+    """
+    __slots__ = ("method", "deviation", "max_interval", "_anchor", "_upper", "_lower")
+
+    def __init__(self, method, deviation=0.0, max_interval=config.COMPRESSION_MAX_INTERVAL):
+        self.method = method
+        self.deviation = deviation
+        self.max_interval = max_interval
+        self._anchor = None
+        self._upper = None
+        self._lower = None
+
+    def _store(self, ts, value):
+        self._anchor = (ts, value)
+        self._upper = self._lower = None
+        return True
+
+    def _narrow(self, ts, value):
+        """
+        Narrows the door to the slopes from the last stored point that stay within the deviation of a reading.
+        """
+        anchor_ts, anchor_value = self._anchor
+        elapsed = ts - anchor_ts
+        upper = (value + self.deviation - anchor_value) / elapsed
+        lower = (value - self.deviation - anchor_value) / elapsed
+        self._upper = upper if self._upper is None else min(self._upper, upper)
+        self._lower = lower if self._lower is None else max(self._lower, lower)
+
+    def keep(self, ts, value, next_ts, next_value):
+        """
+        Decides whether a held reading is stored once the following reading is known.
+
+        @ts: POSIX timestamp of the held reading
+        @value: Held reading or None if it failed
+        @next_ts: POSIX timestamp of the following reading or None at the end of the stream
+        @next_value: Following reading or None if it failed or the stream ends
+        @return: Boolean flag indicating if the held reading is stored
+        """
+        if value is None:
+            self._anchor = None
+            return False
+        if self._anchor is None or next_value is None or ts <= self._anchor[0]:
+            return self._store(ts, value)
+        if ts - self._anchor[0] >= self.max_interval:
+            return self._store(ts, value)
+
+        if self.method == METHOD_DEADBAND:
+            if abs(value - self._anchor[1]) > self.deviation:
+                return self._store(ts, value)
+            return False
+        if self.method == METHOD_SWINGING_DOOR:
+            # The following reading may end the line from the last stored point only while that
+            # line stays within the deviation of every reading in between
+            self._narrow(ts, value)
+            slope = (next_value - self._anchor[1]) / (next_ts - self._anchor[0])
+            if self._lower <= slope <= self._upper:
+                return False
+            return self._store(ts, value)
+        return False
+
+class SampleCompressor:
+    """
+    Per-parameter compression stage between the meter reader and the sinks.
+    Samples are held back by one tick, since swinging door only knows whether a reading is needed
+    once the next one arrives. Readings that are not stored are published as None, and the raw
+    values travel along with the sample for rollups.
+    """
+    def __init__(self, filters):
+        self.filters = filters
+        self._held = None
+        self._samples = 0
+        self._stored_values = 0
+        self._total_values = 0
+        self._suppressed_rows = 0
+
+    @classmethod
+    def from_register_map(cls, plan, register_map):
+        """
+        Creates the compressor from the "compression" entries of the meter profile registers.
+
+        @plan: AcquisitionPlan of the session
+        @register_map: Register map of the meter profile
+        @return: SampleCompressor object or None if no active register is compressed
+        """
+        filters = [_create_filter(p, (register_map or {}).get(p, {}).get("compression")) for p in plan.params]
+        if not any(filters):
+            return None
+        return cls(filters)
+
+    def _release(self, next_sample):
+        """
+        Applies the filters to the held sample now that the next sample, if any, is known.
+        """
+        held = self._held
+        next_ts = next_sample.ts.timestamp() if next_sample else None
+        ts = held.ts.timestamp()
+        stored = []
+        for i, (param_filter, value) in enumerate(zip(self.filters, held.values)):
+            if param_filter is None:
+                stored.append(value)
+                continue
+            next_value = next_sample.values[i] if next_sample else None
+            stored.append(value if param_filter.keep(ts, value, next_ts, next_value) else None)
+
+        self._total_values += len(held.values)
+        self._stored_values += sum(v is not None for v in stored)
+        sample = Sample(held.ts, stored, held.quality, raw=held.values)
+        if sample.suppressed:
+            self._suppressed_rows += 1
+        return sample
+
+    def push(self, sample):
+        """
+        Holds a sample and releases the previous one.
+
+        @sample: Sample object with raw values
+        @return: Previous Sample object with compressed values or None for the first sample
+        """
+        released = self._release(sample) if self._held else None
+        self._held = sample
+        self._samples += 1
+        return released
+
+    def flush(self):
+        """
+        Releases the held sample at the end of the stream.
+
+        @return: Sample object or None if nothing is held
+        """
+        if self._held is None:
+            return None
+        released = self._release(None)
+        self._held = None
+        return released
+
+    def get_stats(self):
+        return {
+            "samples": self._samples,
+            "suppressedRows": self._suppressed_rows,
+            "storedRatio": round(self._stored_values / self._total_values, 3) if self._total_values else None,
+        }
+
+# FUNCTIONS
+
+def _create_filter(param, spec):
+    """
+    Creates the filter of one register from its profile entry.
+    Invalid entries are logged and the register is stored uncompressed.
+    """
+    if not spec:
+        return None
+    method = spec.get("method")
+    try:
+        deviation = float(spec.get("deviation", 0))
+        max_interval = float(spec.get("max_interval", config.COMPRESSION_MAX_INTERVAL))
+    except (TypeError, ValueError):
+        method = None
+    if method not in METHODS or deviation < 0 or max_interval <= 0:
+        log.warning(f"Invalid compression settings for '{param}': {spec}. Storing it uncompressed.")
+        return None
+    return ParameterFilter(method, deviation, max_interval)
+
+def compression_methods(register_map):
+    """
+    Get the compression method of every compressed register by description and SQL column name.
+
+    @register_map: Register map of the meter profile
+    @return: Dictionary mapping column names to methods
+    """
+    methods = {}
+    for spec in register_map.values():
+        method = (spec.get("compression") or {}).get("method")
+        if method in METHODS:
+            methods[spec["description"]] = method
+            methods[sql_column_name(spec["description"])] = method
+    return methods
+
+def reconstruct(df, methods, freq=None):
+    """
+    Fills the readings left out by compression.
+    Swinging door columns are interpolated linearly in time, deadband and max interval columns hold
+    the last stored value.
+
+    @df: DataFrame with a Timestamp column as stored
+    @methods: Dictionary mapping column names to compression methods
+    @freq: Optional pandas frequency to resample the result onto a regular grid
+    @return: Reconstructed DataFrame
+    """
+    columns = [c for c in df.columns if c in methods]
+    if not columns or "Timestamp" not in df.columns:
+        return df
+    out = df.set_index("Timestamp").sort_index()
+    if freq:
+        grid = out.index.floor(freq).unique()
+        out = out.reindex(out.index.union(grid))
+
+    for column in columns:
+        if methods[column] == METHOD_SWINGING_DOOR:
+            out[column] = out[column].interpolate(method="time", limit_area="inside")
+        else:
+            out[column] = out[column].ffill()
+
+    if freq:
+        out = out.loc[grid]
+    return out.reset_index()
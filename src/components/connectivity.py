@@ -0,0 +1,228 @@
+# src/components/connectivity.py
+
+import json
+import time
+import socket
+import logging
+import threading
+
+from config import config
+from urllib.parse import urlparse
+from components.broadcast import broadcaster
+from components.database import sync_notifier
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+INFLUXDB_DEFAULT_PORTS = {"http": 8086, "https": 443}
+
+# HELPERS
+
+class TargetState:
+    """
+    Reachability of one host:port with hysteresis.
+    A target changes state only after several consecutive probes agree, so a single lost packet
+    does not flip the dashboard or pause the syncer. The first probe sets the state directly.
+    """
+    __slots__ = ("up", "successes", "failures", "latency", "last_probe", "last_change")
+
+    def __init__(self):
+        self.up = None
+        self.successes = 0
+        self.failures = 0
+        self.latency = None
+        self.last_probe = None
+        self.last_change = None
+
+    def record(self, reachable, latency, up_after=config.CONNECTIVITY_UP_AFTER, down_after=config.CONNECTIVITY_DOWN_AFTER):
+        """
+        Records a probe result.
+
+        @reachable: Boolean flag indicating if the probe connected
+        @latency: Connect time in seconds or None
+        @return: Boolean flag indicating if the state changed
+        """
+        self.last_probe = time.time()
+        self.latency = latency
+        if reachable:
+            self.successes += 1
+            self.failures = 0
+        else:
+            self.failures += 1
+            self.successes = 0
+
+        if self.up is None:
+            state = reachable
+        elif self.up:
+            state = self.failures < down_after
+        else:
+            state = self.successes >= up_after
+        if state == self.up:
+            return False
+        self.up = state
+        self.last_change = self.last_probe
+        return True
+
+    def to_dict(self):
+        return {
+            "up": self.up,
+            "latencyMs": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "lastProbe": self.last_probe,
+            "lastChange": self.last_change,
+        }
+
+def _probe(host, port, timeout):
+    """
+    Opens and closes a TCP connection to a target.
+
+    @return: Connect time in seconds or None if unreachable
+    """
+    started = time.monotonic()
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout):
+            return time.monotonic() - started
+    except (OSError, ValueError):
+        return None
+
+# SERVICES
+
+class ConnectivityMonitor:
+    """
+    Probes the configured remote databases in the background and caches their reachability.
+    Targets are the PostgreSQL servers of the meter profiles and the InfluxDB server. Readers such
+    as the syncer and the status endpoint get the cached state without touching the network.
+    """
+    def __init__(self, interval=config.CONNECTIVITY_INTERVAL, timeout=config.CONNECTIVITY_TIMEOUT):
+        self.interval = interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._states = {}
+        self._profiles = {}
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def _profile_targets(self):
+        """
+        Get the PostgreSQL targets of all meter profiles, re-reading only profiles that changed.
+        """
+        seen = set()
+        for path in config.METERS_DIR.glob("*.json"):
+            seen.add(path)
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            cached = self._profiles.get(path)
+            if cached and cached[0] == mtime:
+                continue
+            target = None
+            try:
+                with open(path, 'r') as f:
+                    db_info = json.load(f).get("remote_database") or {}
+                if db_info.get("host") and db_info.get("port"):
+                    target = (db_info["host"], int(db_info["port"]))
+            except (OSError, ValueError, AttributeError):
+                pass
+            self._profiles[path] = (mtime, target)
+        for path in [p for p in self._profiles if p not in seen]:
+            del self._profiles[path]
+        return {target for _, target in self._profiles.values() if target}
+
+    def targets(self):
+        """
+        Get the targets to probe.
+
+        @return: Set of (host, port) tuples
+        """
+        targets = self._profile_targets()
+        if config.INFLUXDB_URL:
+            url = urlparse(config.INFLUXDB_URL)
+            if url.hostname:
+                targets.add((url.hostname, url.port or INFLUXDB_DEFAULT_PORTS.get(url.scheme, 8086)))
+        return targets or {config.CONNECTIVITY_FALLBACK}
+
+    def probe(self):
+        """
+        Probes every target once and updates the cached states.
+        """
+        targets = self.targets()
+        changed = recovered = False
+        for host, port in targets:
+            latency = _probe(host, port, self.timeout)
+            with self._lock:
+                state = self._states.setdefault((host, port), TargetState())
+                if state.record(latency is not None, latency):
+                    changed = True
+                    recovered = recovered or state.up
+                    log.info(f"Remote target {host}:{port} is {'reachable' if state.up else 'unreachable'}.")
+        with self._lock:
+            for key in [k for k in self._states if k not in targets]:
+                del self._states[key]
+        if changed:
+            broadcaster.mark_changed()
+        if recovered:
+            # Start draining the backlog as soon as a remote database is back
+            sync_notifier.notify()
+
+    def _run(self):
+        log.info("ConnectivityMonitor thread has started.")
+        while not self._stop_event.is_set():
+            try:
+                self.probe()
+            except Exception as e:
+                log.error(f"ConnectivityMonitor Thread Error: {e}", exc_info=True)
+            self._stop_event.wait(self.interval)
+        log.info("ConnectivityMonitor thread has stopped.")
+
+    def start(self):
+        """
+        Starts the background thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Signals the background thread to stop.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=self.timeout + 1)
+        self._thread = None
+
+    def is_reachable(self, host, port):
+        """
+        Get the cached reachability of a target.
+
+        @host: Host name or address
+        @port: TCP port
+        @return: True or False, or None if the target was not probed yet
+        """
+        try:
+            key = (host, int(port))
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            state = self._states.get(key)
+            return state.up if state else None
+
+    def is_online(self):
+        """
+        Checks whether any remote target is reachable.
+
+        @return: Boolean flag indicating if the logger is online
+        """
+        with self._lock:
+            return any(state.up for state in self._states.values())
+
+    def get_stats(self):
+        with self._lock:
+            return {f"{host}:{port}": state.to_dict() for (host, port), state in self._states.items()}
+
+# GLOBAL INSTANCE
+
+connectivity_monitor = ConnectivityMonitor()
@@ -1,18 +1,108 @@
 # src/components/database.py
 
 import os
+import time
+import sqlite3
 import logging
+import threading
 import sqlalchemy
 import pandas as pd
 
 from config import config
-from sqlalchemy import create_engine, Table, MetaData, Column, Integer, Float, String, DateTime
+from components.planner import AGGREGATES, sql_column_name, aggregate_column_name
+from sqlalchemy import create_engine, event, text, bindparam, Table, MetaData, Column, Integer, Float, String, DateTime, Index
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from datetime import datetime
+
+# CONNECTION POOLS
+
+class LockStats:
+    """
+    Counts how long threads wait for a pooled connection and how often SQLite reports a locked database.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._busy = 0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self._checkouts += 1
+            if seconds >= 0.001:
+                self._waits += 1
+                self._wait_total += seconds
+                self._wait_max = max(self._wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self._timeouts += 1
+
+    def record_busy(self):
+        with self._lock:
+            self._busy += 1
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "waitMeanMs": round(self._wait_total / self._waits * 1000, 3) if self._waits else None,
+                "waitMaxMs": round(self._wait_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "busyErrors": self._busy,
+            }
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records the time spent waiting for a free connection.
+    Statistics live on the class so they survive pool recreation on dispose.
+    """
+    lock_stats = None
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            self.lock_stats.record_timeout()
+            raise
+        self.lock_stats.record_wait(time.monotonic() - started)
+        return connection
+
+class WriterPool(TimedQueuePool):
+    lock_stats = LockStats()
+
+class IngestPool(TimedQueuePool):
+    lock_stats = LockStats()
+
+class ReaderPool(TimedQueuePool):
+    lock_stats = LockStats()
 
 # GLOBAL VARIABLES
 
-ENGINE = create_engine(f"sqlite:///{config.DB_FILE}", echo=False)
+# Sample ingest goes through one connection, so the sinks of all sessions queue in the pool instead
+# of fighting over the SQLite write lock. Nothing may check out INGEST_ENGINE while holding it: code
+# inside an ingest transaction uses the connection it is given, or it waits out the pool timeout.
+# Settings, logger state, the job store and the syncer write through ENGINE and rely on the busy
+# timeout; reads use a separate read-only pool that WAL never blocks behind a writer.
+INGEST_ENGINE = create_engine(
+    f"sqlite:///{config.DB_FILE}", echo=False, poolclass=IngestPool,
+    pool_size=1, max_overflow=0, pool_timeout=config.SQLITE_WRITE_TIMEOUT
+)
+ENGINE = create_engine(
+    f"sqlite:///{config.DB_FILE}", echo=False, poolclass=WriterPool, pool_timeout=config.SQLITE_WRITE_TIMEOUT
+)
+READ_ENGINE = create_engine(
+    f"sqlite:///{config.DB_FILE}", echo=False, poolclass=ReaderPool,
+    pool_size=config.SQLITE_READ_POOL_SIZE, max_overflow=0, pool_timeout=config.SQLITE_READ_TIMEOUT
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=ENGINE)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=READ_ENGINE)
 Base = declarative_base()
 log = logging.getLogger(__name__)
 
@@ -39,24 +129,314 @@ class LoggerState(Base):
     mode = Column(String, nullable=True)
     meterModel = Column(String, nullable=False, index=True)
 
+class Rollup(Base):
+    """
+    Represents pre-aggregated statistics of one parameter over one time bucket of a session.
+    """
+    __tablename__ = "rollups"
+    tableName = Column(String, primary_key=True)
+    resolution = Column(Integer, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    parameter = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
+    minValue = Column(Float, nullable=True)
+    maxValue = Column(Float, nullable=True)
+    meanValue = Column(Float, nullable=True)
+    m2Value = Column(Float, nullable=True) # Sum of squared deviations from the mean
+    firstValue = Column(Float, nullable=True)
+    firstTime = Column(DateTime, nullable=True)
+    lastValue = Column(Float, nullable=True)
+    lastTime = Column(DateTime, nullable=True)
+
+class SyncState(Base):
+    """
+    Represents the remote sync progress of a session table.
+    Rows up to the watermark are synced; the logger counts new rows in the same transaction as the insert.
+    The sync_status column of a session table only records rejected rows as 'failed'; any other row
+    is synced when its id is at or below lastSyncedId and pending otherwise. Rows below rollupFromId
+    were logged before the session had rollups and are only in the raw table.
+    """
+    __tablename__ = "sync_state"
+    tableName = Column(String, primary_key=True)
+    meterModel = Column(String, nullable=True)
+    lastSyncedId = Column(Integer, nullable=False, default=0)
+    lastInsertedId = Column(Integer, nullable=False, default=0)
+    pendingRows = Column(Integer, nullable=False, default=0)
+    rollupFromId = Column(Integer, nullable=False, default=0)
+    updatedAt = Column(DateTime, nullable=True)
+    __table_args__ = (
+        Index("ix_sync_state_pending", "tableName", sqlite_where=pendingRows > 0),
+    )
+
+class SyncNotifier:
+    """
+    Wakes the remote syncer when the logger commits rows.
+    Notifications arriving within the debounce window are coalesced into one wake-up.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = False
+        self._notifications = 0
+        self._wakeups = 0
+
+    def notify(self):
+        with self._cond:
+            self._pending = True
+            self._notifications += 1
+            self._cond.notify_all()
+
+    def interrupt(self):
+        """
+        Wakes waiters so they re-check their stop condition.
+        """
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self, timeout, debounce=0, stopped=lambda: False):
+        """
+        Waits for committed rows.
+
+        @timeout: Maximum time to wait in seconds
+        @debounce: Time to keep collecting notifications after the first one
+        @stopped: Callable that ends the wait early, checked whenever the waiter is woken
+        @return: Boolean flag indicating if rows were committed
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._pending or stopped(), timeout) or stopped():
+                return False
+            if debounce and self._cond.wait_for(stopped, debounce):
+                return False
+            self._pending = False
+            self._wakeups += 1
+        return True
+
+    def get_stats(self):
+        with self._cond:
+            return {"notifications": self._notifications, "wakeups": self._wakeups}
+
 # FUNCTIONS
 
+@event.listens_for(INGEST_ENGINE, "connect")
+@event.listens_for(ENGINE, "connect")
+@event.listens_for(READ_ENGINE, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Applies the configured pragmas (WAL journaling, busy timeout, synchronous level, caches) to a new connection.
+
+    @dbapi_connection: Raw sqlite3 connection
+    @connection_record: Pool record of the connection
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in config.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+@event.listens_for(READ_ENGINE, "connect")
+def set_read_only(dbapi_connection, connection_record):
+    """
+    Makes connections of the read pool reject writes, so analysis can never take the write lock.
+    """
+    dbapi_connection.execute("PRAGMA query_only=ON")
+
+@event.listens_for(INGEST_ENGINE, "handle_error")
+@event.listens_for(ENGINE, "handle_error")
+@event.listens_for(READ_ENGINE, "handle_error")
+def count_busy_errors(context):
+    """
+    Counts "database is locked" errors that outlasted the busy timeout.
+    """
+    error = context.original_exception
+    if isinstance(error, sqlite3.OperationalError) and "locked" in str(error):
+        pool = context.engine.pool if context.engine is not None else None
+        if isinstance(pool, TimedQueuePool):
+            pool.lock_stats.record_busy()
+
+def get_db_stats():
+    """
+    Get the lock-wait statistics of the ingest, writer and reader pools and the WAL file size.
+
+    @return: Dictionary with database statistics
+    """
+    wal_file = f"{config.DB_FILE}-wal"
+    return {
+        "ingest": IngestPool.lock_stats.get_stats(),
+        "writer": WriterPool.lock_stats.get_stats(),
+        "reader": ReaderPool.lock_stats.get_stats(),
+        "walBytes": os.path.getsize(wal_file) if os.path.exists(wal_file) else 0,
+    }
+
 def init_db():
     """
     Initializes the database and creates relevant tables.
     """
     try:
         Base.metadata.create_all(bind=ENGINE)
+        migrate_log_tables()
         log.info("Database initialized successfully.")
     except Exception as e:
         log.error(f"Database Initialization Error: {e}", exc_info=True)
 
-def create_log_table(table_name, register_map):
+def create_log_indexes(connection, table_name):
+    """
+    Creates the Timestamp index for range queries.
+    The syncer reads rows above its watermark by primary key and needs no index of its own.
+
+    @connection: Open SQLAlchemy connection with an active transaction
+    @table_name: The name of the table
+    """
+    connection.execute(text(f'CREATE INDEX IF NOT EXISTS "ix_{table_name}_Timestamp" ON "{table_name}" ("Timestamp")'))
+
+def check_query_plans(connection, table_name):
+    """
+    Checks that the sync and range-analysis queries of a session table are answered from its indexes.
+    Used by the tests to catch queries that fall back to a full table scan.
+
+    @connection: Open SQLAlchemy connection
+    @table_name: The name of the table
+    @return: Dictionary mapping query names to a flag indicating if an index is used
+    """
+    queries = {
+        "sync": (f'SELECT * FROM "{table_name}" WHERE id > :watermark ORDER BY id ASC LIMIT 100', {"watermark": 0}),
+        "range": (f'SELECT * FROM "{table_name}" WHERE "Timestamp" >= :start AND "Timestamp" < :end', {
+            "start": "2000-01-01 00:00:00",
+            "end": "2000-01-02 00:00:00",
+        }),
+    }
+    plans = {}
+    for name, (query, params) in queries.items():
+        details = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {query}"), params)]
+        plans[name] = any("USING" in d and ("INDEX" in d or "PRIMARY KEY" in d) for d in details)
+    return plans
+
+def register_sync_state(connection, table_name, meter_model=None):
+    """
+    Adds a session table to the sync catalog.
+    Tables that already carry per-row sync status start their watermark below the first pending row,
+    so rows synced after it may be sent again; the remote insert ignores duplicates. Their existing
+    rows have no rollups, so rollups are marked to start after them.
+
+    @connection: Open SQLAlchemy connection with an active transaction
+    @table_name: The name of the table
+    @meter_model: The meter model of the session if known
+    """
+    if connection.execute(text("SELECT 1 FROM sync_state WHERE tableName = :t"), {"t": table_name}).first():
+        if meter_model:
+            connection.execute(
+                text("UPDATE sync_state SET meterModel = :m WHERE tableName = :t AND meterModel IS NULL"),
+                {"t": table_name, "m": meter_model}
+            )
+        return
+
+    last_id = connection.execute(text(f'SELECT max(id) FROM "{table_name}"')).scalar() or 0
+    first_pending = connection.execute(
+        text(f'SELECT min(id) FROM "{table_name}" WHERE sync_status = \'pending\'')
+    ).scalar()
+    watermark = first_pending - 1 if first_pending is not None else last_id
+    if not meter_model:
+        meter_model = connection.execute(
+            text("SELECT meterModel FROM logger_state WHERE tableName = :t"), {"t": table_name}
+        ).scalar()
+    connection.execute(text(
+        "INSERT INTO sync_state (tableName, meterModel, lastSyncedId, lastInsertedId, pendingRows, rollupFromId, updatedAt) "
+        "VALUES (:t, :m, :synced, :inserted, :pending, :rollup_from, :now)"
+    ), {
+        "t": table_name, "m": meter_model, "synced": watermark, "inserted": last_id,
+        "pending": last_id - watermark, "rollup_from": last_id + 1, "now": datetime.now(),
+    })
+
+def count_inserted_rows(connection, table_name):
+    """
+    Advances the insert mark of a session table in the sync catalog.
+    Ids are assigned in order by the single ingest connection, so the pending count is the distance to the watermark.
+
+    @connection: Open SQLAlchemy connection with the transaction of the insert
+    @table_name: The name of the table
+    """
+    last_id = connection.execute(text(f'SELECT max(id) FROM "{table_name}"')).scalar() or 0
+    connection.execute(text(
+        "UPDATE sync_state SET lastInsertedId = :id, pendingRows = max(0, :id - lastSyncedId), updatedAt = :now "
+        "WHERE tableName = :t"
+    ), {"t": table_name, "id": last_id, "now": datetime.now()})
+
+def advance_sync_watermark(table_name, last_id, failed_ids=()):
+    """
+    Marks all rows of a session table up to an id as synced by bumping the watermark.
+    Only the few rows the remote database rejected are updated, so they stay 'failed' for inspection.
+
+    @table_name: The name of the table
+    @last_id: Id of the last synced row
+    @failed_ids: Ids of rows at or below last_id that were rejected
+    """
+    with ENGINE.begin() as connection:
+        if failed_ids:
+            connection.execute(
+                text(f'UPDATE "{table_name}" SET sync_status = \'failed\' WHERE id IN :ids').bindparams(
+                    bindparam("ids", expanding=True)
+                ),
+                {"ids": tuple(failed_ids)}
+            )
+        connection.execute(text(
+            "UPDATE sync_state SET pendingRows = max(0, lastInsertedId - :id), "
+            "lastSyncedId = :id, updatedAt = :now WHERE tableName = :t AND lastSyncedId < :id"
+        ), {"t": table_name, "id": last_id, "now": datetime.now()})
+
+def get_sync_watermark(table_name):
+    """
+    Get the id of the last synced row of a session table.
+
+    @table_name: The name of the table
+    @return: Watermark id, 0 if the table is not in the sync catalog
+    """
+    with READ_ENGINE.connect() as connection:
+        return connection.execute(
+            text("SELECT lastSyncedId FROM sync_state WHERE tableName = :t"), {"t": table_name}
+        ).scalar() or 0
+
+def get_sync_candidates():
+    """
+    Get the session tables with rows above their sync watermark from the catalog.
+
+    @return: List of (table name, meter model, watermark, pending rows) tuples in table order
+    """
+    with READ_ENGINE.connect() as connection:
+        statement = text(
+            "SELECT tableName, meterModel, lastSyncedId, pendingRows FROM sync_state "
+            "WHERE pendingRows > 0 ORDER BY tableName ASC"
+        )
+        return [tuple(row) for row in connection.execute(statement)]
+
+def migrate_log_tables():
+    """
+    Retrofits the indexes and sync catalog entries onto session tables created before they existed.
+    """
+    with ENGINE.begin() as connection:
+        catalog_columns = [c["name"] for c in sqlalchemy.inspect(connection).get_columns("sync_state")]
+        if "rollupFromId" not in catalog_columns:
+            connection.execute(text("ALTER TABLE sync_state ADD COLUMN rollupFromId INTEGER NOT NULL DEFAULT 0"))
+        for table_name in list_log_tables(connection):
+            create_log_indexes(connection, table_name)
+            register_sync_state(connection, table_name)
+
+def list_log_tables(connection):
+    """
+    Get the names of all session tables.
+
+    @connection: Open SQLAlchemy connection
+    @return: List of table names in order
+    """
+    statement = text("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '20%' ORDER BY name ASC")
+    return [row[0] for row in connection.execute(statement)]
+
+def create_log_table(table_name, register_map, aggregates=False, meter_model=None):
     """ 
-    Creates a data log table in the database.
+    Creates a data log table in the database and adds it to the sync catalog.
 
     @table_name: The name of the table
     @register_map: The register map for the meter model
+    @aggregates: Flag to add burst mode min, max and last columns per parameter
+    @meter_model: The meter model of the session
     """
     try:
         metadata = MetaData()
@@ -67,16 +447,42 @@ def create_log_table(table_name, register_map):
 
         # Iterate parameters to create SQL columns
         for param_name, params in register_map.items():
-            col_name = params["description"].replace(' ', '_').replace('(', '').replace(')', '')
+            col_name = sql_column_name(params["description"])
             columns.append(Column(col_name, Float, nullable=True))
 
-        # Add sync status column
+        # Add burst mode aggregate columns
+        aggregate_columns = []
+        if aggregates:
+            for aggregate in AGGREGATES:
+                for param_name, params in register_map.items():
+                    aggregate_columns.append(aggregate_column_name(params["description"], aggregate))
+            columns.extend(Column(col_name, Float, nullable=True) for col_name in aggregate_columns)
+
+        # Add sample quality and sync status columns
+        columns.append(Column('quality', String, nullable=True))
         columns.append(Column('sync_status', String, nullable=False, default='pending'))
         log_table = Table(table_name, metadata, *columns)
 
         metadata.create_all(ENGINE)
+
+        # Retrofit columns on tables created before they existed
+        existing_columns = [c["name"] for c in sqlalchemy.inspect(ENGINE).get_columns(table_name)]
+        missing_columns = [(col_name, "FLOAT") for col_name in aggregate_columns if col_name not in existing_columns]
+        if 'quality' not in existing_columns:
+            missing_columns.append(('quality', "VARCHAR"))
+        with ENGINE.begin() as connection:
+            for col_name, col_type in missing_columns:
+                connection.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN "{col_name}" {col_type}'))
+            create_log_indexes(connection, table_name)
+            register_sync_state(connection, table_name, meter_model)
+        if missing_columns:
+            log.info(f"Added {len(missing_columns)} columns to existing log table '{table_name}'.")
         log.info(f"Created log table '{table_name}' in database successfully.")
         return True
     except Exception as e:
         log.error(f"SQL Creation Error: Failed to create log table '{table_name}' in database: {e}", exc_info=True)
-        return False
\ No newline at end of file
+        return False
+
+# GLOBAL INSTANCE
+
+sync_notifier = SyncNotifier()
@@ -0,0 +1,522 @@
+# src/components/gorilla.py
+
+import io
+import os
+import csv
+import json
+import mmap
+import zlib
+import bisect
+import struct
+import logging
+import pandas as pd
+
+from config import config
+from components.pipeline import Sink
+from datetime import datetime, timedelta
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+EXTENSION = ".gts"
+FILE_MAGIC = b"GTS1"
+CHUNK_MAGIC = b"GCHK"
+FILE_HEADER = struct.Struct("<4sI") # Magic, JSON metadata length
+CHUNK_HEADER = struct.Struct("<4sIIqqI") # Magic, payload length, rows, first and last timestamp, CRC32
+EPOCH = datetime(1970, 1, 1)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+FLOAT = struct.Struct(">d")
+UINT64 = struct.Struct(">Q")
+
+# HELPERS
+
+def _to_seconds(ts):
+    """
+    Converts a naive local datetime into wall-clock seconds, unaffected by DST changes.
+    """
+    return int((ts - EPOCH).total_seconds())
+
+def _from_seconds(seconds):
+    return EPOCH + timedelta(seconds=seconds)
+
+def _float_bits(value):
+    return UINT64.unpack(FLOAT.pack(float(value)))[0]
+
+def _bits_float(bits):
+    return FLOAT.unpack(UINT64.pack(bits))[0]
+
+# SERVICES
+
+class BitWriter:
+    """
+    Appends big-endian bit fields to a byte buffer.
+    """
+    __slots__ = ("_bytes", "_acc", "_bits")
+
+    def __init__(self):
+        self._bytes = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value, nbits):
+        self._acc = (self._acc << nbits) | (value & ((1 << nbits) - 1))
+        self._bits += nbits
+        while self._bits >= 8:
+            self._bits -= 8
+            self._bytes.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self):
+        if self._bits:
+            return bytes(self._bytes) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self._bytes)
+
+class BitReader:
+    """
+    Reads big-endian bit fields from a byte buffer.
+    """
+    __slots__ = ("_buf", "_pos")
+
+    def __init__(self, buf):
+        self._buf = buf
+        self._pos = 0
+
+    def read(self, nbits):
+        start = self._pos >> 3
+        end = (self._pos + nbits + 7) >> 3
+        chunk = int.from_bytes(self._buf[start:end], "big")
+        self._pos += nbits
+        return (chunk >> (end * 8 - self._pos)) & ((1 << nbits) - 1)
+
+# FUNCTIONS
+
+def _encode_timestamps(seconds):
+    """
+    Encodes timestamps after the first as delta-of-deltas in variable-width buckets.
+    """
+    writer = BitWriter()
+    prev, prev_delta = seconds[0], 0
+    for ts in seconds[1:]:
+        delta = ts - prev
+        dod = delta - prev_delta
+        if dod == 0:
+            writer.write(0, 1)
+        elif -63 <= dod <= 64:
+            writer.write(0b10, 2)
+            writer.write(dod + 63, 7)
+        elif -255 <= dod <= 256:
+            writer.write(0b110, 3)
+            writer.write(dod + 255, 9)
+        elif -2047 <= dod <= 2048:
+            writer.write(0b1110, 4)
+            writer.write(dod + 2047, 12)
+        else:
+            writer.write(0b1111, 4)
+            writer.write(dod, 32)
+        prev, prev_delta = ts, delta
+    return writer.getvalue()
+
+def _decode_timestamps(buf, first, rows):
+    reader = BitReader(buf)
+    seconds = [first]
+    prev, prev_delta = first, 0
+    for _ in range(rows - 1):
+        if reader.read(1) == 0:
+            dod = 0
+        elif reader.read(1) == 0:
+            dod = reader.read(7) - 63
+        elif reader.read(1) == 0:
+            dod = reader.read(9) - 255
+        elif reader.read(1) == 0:
+            dod = reader.read(12) - 2047
+        else:
+            dod = reader.read(32)
+            if dod >= 1 << 31:
+                dod -= 1 << 32
+        prev_delta += dod
+        prev += prev_delta
+        seconds.append(prev)
+    return seconds
+
+def _encode_values(values):
+    """
+    Encodes a column as XOR-compressed floats. Every row starts with a presence bit, so missing
+    values cost one bit and do not reset the XOR state.
+    """
+    writer = BitWriter()
+    prev = leading = trailing = None
+    for value in values:
+        if value is None:
+            writer.write(0, 1)
+            continue
+        writer.write(1, 1)
+        bits = _float_bits(value)
+        if prev is None:
+            writer.write(bits, 64)
+        else:
+            xor = bits ^ prev
+            if xor == 0:
+                writer.write(0, 1)
+            else:
+                lead = min(64 - xor.bit_length(), 31)
+                trail = (xor & -xor).bit_length() - 1
+                if leading is not None and lead >= leading and trail >= trailing:
+                    # Meaningful bits fit into the previous window
+                    writer.write(0b10, 2)
+                    writer.write(xor >> trailing, 64 - leading - trailing)
+                else:
+                    significant = 64 - lead - trail
+                    writer.write(0b11, 2)
+                    writer.write(lead, 5)
+                    writer.write(significant - 1, 6)
+                    writer.write(xor >> trail, significant)
+                    leading, trailing = lead, trail
+        prev = bits
+    return writer.getvalue()
+
+def _decode_values(buf, rows):
+    reader = BitReader(buf)
+    values = []
+    prev = leading = trailing = None
+    for _ in range(rows):
+        if reader.read(1) == 0:
+            values.append(None)
+            continue
+        if prev is None:
+            prev = reader.read(64)
+        elif reader.read(1) == 1:
+            if reader.read(1) == 1:
+                leading = reader.read(5)
+                significant = reader.read(6) + 1
+                trailing = 64 - leading - significant
+            prev ^= reader.read(64 - leading - trailing) << trailing
+        values.append(_bits_float(prev))
+    return values
+
+def _encode_quality(qualities):
+    writer = BitWriter()
+    for quality in qualities:
+        writer.write(quality != "good", 1)
+    return writer.getvalue()
+
+def _decode_quality(buf, rows):
+    reader = BitReader(buf)
+    return ["partial" if reader.read(1) else "good" for _ in range(rows)]
+
+def encode_chunk(samples, width):
+    """
+    Encodes samples into one chunk with the timestamp, quality and value streams stored separately,
+    so reads decode only the requested columns.
+
+    @samples: List of Sample objects in time order
+    @width: Number of values per sample
+    @return: Chunk bytes including the header
+    """
+    seconds = [_to_seconds(s.ts) for s in samples]
+    streams = [_encode_timestamps(seconds), _encode_quality([s.quality for s in samples])]
+    streams += [_encode_values([s.values[i] for s in samples]) for i in range(width)]
+    payload = struct.pack(f"<{len(streams) + 1}I", len(streams), *(len(s) for s in streams)) + b"".join(streams)
+    header = CHUNK_HEADER.pack(CHUNK_MAGIC, len(payload), len(samples), seconds[0], seconds[-1], zlib.crc32(payload))
+    return header + payload
+
+def _scan_chunks(buf, offset):
+    """
+    Indexes the complete chunks of a file by walking their headers.
+
+    @buf: File contents as bytes or mmap
+    @offset: Offset of the first chunk
+    @return: Tuple of (chunk index, offset after the last complete chunk)
+    """
+    chunks = []
+    size = len(buf)
+    while offset + CHUNK_HEADER.size <= size:
+        magic, length, rows, first, last, crc = CHUNK_HEADER.unpack_from(buf, offset)
+        start = offset + CHUNK_HEADER.size
+        if magic != CHUNK_MAGIC or start + length > size:
+            break
+        chunks.append((first, last, rows, start, length, crc))
+        offset = start + length
+    return chunks, offset
+
+def _read_header(buf):
+    """
+    Parses the file header.
+
+    @return: Tuple of (metadata dictionary, offset of the first chunk) or (None, 0) if the header is invalid
+    """
+    if len(buf) < FILE_HEADER.size:
+        return None, 0
+    magic, length = FILE_HEADER.unpack_from(buf, 0)
+    end = FILE_HEADER.size + length
+    if magic != FILE_MAGIC or end > len(buf):
+        return None, 0
+    try:
+        return json.loads(bytes(buf[FILE_HEADER.size:end])), end
+    except ValueError:
+        return None, 0
+
+class GorillaSink(Sink):
+    """
+    Appends a session to a compact binary file with Gorilla-style compression:
+    delta-of-delta timestamps and XOR-compressed float columns in self-describing chunks.
+    Samples are buffered until a chunk of GORILLA_CHUNK_ROWS rows or GORILLA_CHUNK_INTERVAL seconds
+    is complete, so a crash loses at most the chunk that was still being filled.
+    """
+    name = "Gorilla"
+
+    def __init__(self, filename, columns, metadata=None, chunk_rows=config.GORILLA_CHUNK_ROWS,
+                 chunk_interval=config.GORILLA_CHUNK_INTERVAL):
+        self.filename = str(filename)
+        self.columns = list(columns)
+        self.chunk_rows = max(1, chunk_rows)
+        self.chunk_interval = chunk_interval
+        self._samples = []
+        self._chunks = 0
+        self._bytes = 0
+        self._rows = 0
+        self._file = None
+        self._open(metadata or {})
+        log.info(f"Gorilla logging initialized to data file '{self.filename}' successfully.")
+
+    @classmethod
+    def create(cls, filename, columns, metadata=None):
+        """
+        Creates the sink if binary session storage is enabled.
+
+        @filename: Path of the .gts file
+        @columns: Column names in sample value order
+        @metadata: Dictionary stored in the file header
+        @return: GorillaSink object or None
+        """
+        if not config.GORILLA_ENABLED:
+            return None
+        return cls(filename, columns, metadata)
+
+    def _open(self, metadata):
+        """
+        Opens the file for appending, dropping a torn last chunk or starting a new file.
+        A file of a session resumed with different columns is set aside.
+        """
+        if os.path.exists(self.filename) and os.path.getsize(self.filename) > 0:
+            with open(self.filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+                size = len(contents)
+                header, offset = _read_header(contents)
+                end = _scan_chunks(contents, offset)[1] if header is not None else 0
+            if header is not None and header.get("columns") == self.columns:
+                if end < size:
+                    with open(self.filename, 'rb+') as f:
+                        f.truncate(end)
+                    log.warning(f"Truncated {size - end} bytes of an incomplete chunk at the end of '{self.filename}'.")
+                self._file = open(self.filename, 'ab')
+                return
+            aside = f"{self.filename}.{datetime.now().strftime('%Y%m%d_%H%M%S')}.broken"
+            os.replace(self.filename, aside)
+            log.warning(f"Gorilla file '{self.filename}' has no valid header or other columns. Moved to '{aside}'.")
+
+        header = json.dumps({"columns": self.columns, "metadata": metadata}, default=str).encode("utf-8")
+        self._file = open(self.filename, 'wb')
+        self._file.write(FILE_HEADER.pack(FILE_MAGIC, len(header)) + header)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _write_chunk(self):
+        """
+        Encodes and appends the buffered samples as one chunk, undoing a partial write on failure.
+        """
+        chunk = encode_chunk(self._samples, len(self.columns))
+        position = self._file.tell()
+        try:
+            self._file.write(chunk)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError:
+            self._file.truncate(position)
+            raise
+        self._chunks += 1
+        self._bytes += len(chunk)
+        self._rows += len(self._samples)
+        self._samples = []
+
+    def _chunk_due(self):
+        if len(self._samples) >= self.chunk_rows:
+            return True
+        return bool(self._samples) and (datetime.now() - self._samples[0].ts).total_seconds() >= self.chunk_interval
+
+    def write(self, samples):
+        if not samples:
+            return
+        self._samples.extend(samples)
+        if not self._chunk_due():
+            return
+        try:
+            self._write_chunk()
+        except Exception:
+            # Hand this batch back to the worker; earlier buffered rows are kept and retried first
+            del self._samples[-len(samples):]
+            raise
+
+    def flush(self):
+        if self._chunk_due():
+            self._write_chunk()
+
+    def close(self):
+        try:
+            if self._samples:
+                self._write_chunk()
+        finally:
+            self._file.close()
+
+    def get_stats(self):
+        return {
+            "bufferedRows": len(self._samples),
+            "chunks": self._chunks,
+            "bytesPerRow": round(self._bytes / self._rows, 1) if self._rows else None,
+        }
+
+class GorillaReader:
+    """
+    Memory-mapped random-access reader of a .gts session file.
+    Chunks are located through an in-memory time index and only the requested columns are decoded.
+    """
+    def __init__(self, filename):
+        self.filename = str(filename)
+        self._file = open(self.filename, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Gorilla file '{self.filename}' is empty.")
+        header, offset = _read_header(self._map)
+        if header is None:
+            self.close()
+            raise ValueError(f"Gorilla file '{self.filename}' has no valid header.")
+        self.columns = header["columns"]
+        self.metadata = header.get("metadata", {})
+        self._chunks, _ = _scan_chunks(self._map, offset)
+        self._starts = [c[0] for c in self._chunks]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @property
+    def rows(self):
+        return sum(c[2] for c in self._chunks)
+
+    def _select(self, start, end):
+        """
+        Get the chunks overlapping a wall-clock second range.
+        """
+        first = 0
+        if start is not None:
+            first = max(0, bisect.bisect_right(self._starts, start) - 1)
+        last = len(self._chunks) if end is None else bisect.bisect_left(self._starts, end)
+        return [c for c in self._chunks[first:last] if start is None or c[1] >= start]
+
+    def _decode(self, chunk, indices):
+        """
+        Decodes the timestamps, quality flags and selected columns of one chunk.
+        """
+        first, _, rows, offset, length, crc = chunk
+        payload = memoryview(self._map)[offset:offset + length]
+        try:
+            if zlib.crc32(payload) != crc:
+                raise ValueError("checksum mismatch")
+            count = struct.unpack_from("<I", payload, 0)[0]
+            lengths = struct.unpack_from(f"<{count}I", payload, 4)
+            bounds = [4 + 4 * count]
+            for size in lengths:
+                bounds.append(bounds[-1] + size)
+            stream = lambda i: payload[bounds[i]:bounds[i + 1]]
+            seconds = _decode_timestamps(stream(0), first, rows)
+            quality = _decode_quality(stream(1), rows)
+            columns = [_decode_values(stream(i + 2), rows) for i in indices]
+        finally:
+            payload.release()
+        return seconds, quality, columns
+
+    def iter_chunks(self, columns=None, start=None, end=None):
+        """
+        Yields decoded chunks within a time range.
+
+        @columns: Column names to decode or None for all
+        @start: Optional inclusive start datetime
+        @end: Optional exclusive end datetime
+        @return: Generator of (timestamps, qualities, column value lists) tuples
+        """
+        names = self.columns if columns is None else [c for c in columns if c in self.columns]
+        indices = [self.columns.index(c) for c in names]
+        start_s = _to_seconds(start) if start is not None else None
+        end_s = _to_seconds(end) if end is not None else None
+        for chunk in self._select(start_s, end_s):
+            try:
+                seconds, quality, values = self._decode(chunk, indices)
+            except (ValueError, struct.error) as e:
+                log.error(f"Gorilla Read Error: Skipping corrupt chunk in '{self.filename}': {e}")
+                continue
+            keep = [i for i, s in enumerate(seconds)
+                    if (start_s is None or s >= start_s) and (end_s is None or s < end_s)]
+            if len(keep) != len(seconds):
+                seconds = [seconds[i] for i in keep]
+                quality = [quality[i] for i in keep]
+                values = [[column[i] for i in keep] for column in values]
+            yield [_from_seconds(s) for s in seconds], quality, values
+
+    def read(self, columns=None, start=None, end=None):
+        """
+        Reads the requested columns and time range.
+
+        @columns: Column names to read besides the timestamp, or None for all
+        @start: Optional inclusive start datetime
+        @end: Optional exclusive end datetime
+        @return: DataFrame with a Timestamp column and one column per requested name
+        """
+        names = self.columns if columns is None else [c for c in columns if c in self.columns]
+        timestamps = []
+        data = [[] for _ in names]
+        for ts, _, values in self.iter_chunks(names, start, end):
+            timestamps.extend(ts)
+            for column, chunk_values in zip(data, values):
+                column.extend(chunk_values)
+        df = pd.DataFrame({name: pd.Series(column, dtype="float64") for name, column in zip(names, data)})
+        df.insert(0, "Timestamp", pd.to_datetime(timestamps))
+        return df
+
+def gorilla_path(filename):
+    """
+    Get the .gts file of a session CSV file.
+
+    @filename: Session CSV file name or path
+    @return: Path of the .gts file in DS_DIR
+    """
+    return config.DS_DIR / f"{os.path.splitext(os.path.basename(filename))[0]}{EXTENSION}"
+
+def export_csv(filename, rows_per_write=1000):
+    """
+    Streams a .gts session in the session CSV format.
+
+    @filename: Path of the .gts file
+    @rows_per_write: Rows per yielded text block
+    @return: Generator of CSV text blocks
+    """
+    with GorillaReader(filename) as reader:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(["Timestamp"] + reader.columns)
+        for timestamps, _, columns in reader.iter_chunks():
+            rows = zip(timestamps, *columns)
+            for i, (ts, *values) in enumerate(rows, 1):
+                writer.writerow([ts.strftime(TIME_FORMAT)] + values)
+                if i % rows_per_write == 0:
+                    yield out.getvalue()
+                    out.seek(0)
+                    out.truncate()
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
@@ -0,0 +1,81 @@
+# src/components/history.py
+
+import time
+import threading
+import numpy as np
+
+from config import config
+
+# SERVICES
+
+class HistoryBuffer:
+    """
+    Columnar in-memory buffer of the recent readings of a session.
+    Keeps the last HISTORY_HOURS of samples, bounded by HISTORY_MAX_SAMPLES, and
+    serves delta reads after a client cursor.
+    """
+    def __init__(self, params, hours=config.HISTORY_HOURS, capacity=config.HISTORY_MAX_SAMPLES):
+        self.params = tuple(params)
+        self.window = hours * 3600
+        self.capacity = capacity
+        self._index = {p: i for i, p in enumerate(self.params)}
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._data = np.full((len(self.params), capacity), np.nan, dtype=np.float64)
+        self._lock = threading.Lock()
+        self._head = 0
+        self._size = 0
+
+        # Cursors start at the creation time in milliseconds, so cursors of an older
+        # session are always behind the samples of a newer one
+        self._next_seq = int(time.time() * 1000)
+
+    def append(self, ts, values):
+        """
+        Stores a sample, evicting the oldest one when the buffer is full.
+
+        @ts: POSIX timestamp of the sample
+        @values: Plan-ordered value list, None for missing values
+        """
+        with self._lock:
+            self._ts[self._head] = ts
+            self._data[:, self._head] = [np.nan if v is None else v for v in values]
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self._next_seq += 1
+
+    def since(self, cursor=None, params=None):
+        """
+        Get the samples after a cursor within the history window.
+
+        @cursor: Cursor returned by a previous call or None for the whole window
+        @params: Parameters to include or None for all
+        @return: Dictionary with the new cursor, timestamps and one value list per parameter
+        """
+        columns = [p for p in params if p in self._index] if params else list(self.params)
+        with self._lock:
+            start_seq = self._next_seq - self._size
+            if self._size:
+                # Drop samples that have aged out of the time window
+                oldest = (self._head - self._size) % self.capacity
+                order = (np.arange(self._size) + oldest) % self.capacity
+                in_window = np.searchsorted(self._ts[order], time.time() - self.window)
+                start_seq += int(in_window)
+
+            # Send the whole window when the client missed evicted samples or holds a foreign cursor
+            last_seq = self._next_seq - 1
+            reset = cursor is None or not start_seq - 1 <= cursor <= last_seq
+            first = start_seq if reset else cursor + 1
+            count = self._next_seq - first
+            indices = (np.arange(count) + self._head - count) % self.capacity
+            ts = self._ts[indices].tolist()
+            data = self._data[np.ix_([self._index[p] for p in columns], indices)]
+
+        values = {}
+        for row, param in enumerate(columns):
+            values[param] = [None if np.isnan(v) else float(v) for v in data[row]]
+        return {
+            "cursor": last_seq,
+            "reset": reset,
+            "ts": ts,
+            "values": values,
+        }
@@ -1,197 +1,416 @@
 # src/components/logger.py
 
 import os
-import csv
+import json
 import time
 import logging
+import threading
 
 from config import config
 from components.settings import settings
-from components.database import ENGINE
-from components.reader import MeterReader
-from datetime import datetime, timezone
-from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
-from sqlalchemy import text
+from components.reader import QUALITY_OK, create_meter_reader
+from components.clock import TickScheduler
+from components.burst import BurstBuffer
+from components.history import HistoryBuffer
+from components.compression import SampleCompressor
+from components.planner import AcquisitionPlan, get_acquisition_plan
+from components.pipeline import Sample, SinkWorker, SamplePipeline
+from components.sinks import CsvSink, SQLiteSink, InfluxSink
+from components.columnar import ParquetSink
+from components.gorilla import GorillaSink, gorilla_path
+from datetime import datetime
 
 # GLOBAL VARIABLES
 
 log = logging.getLogger(__name__)
+SPOOL_DIR = config.DS_DIR / "spool"
+SINK_KEYS = ("csv", "sqlite", "gorilla", "influxdb", "parquet")
+
+# HELPERS
+
+def spill_path(table_name, sink_key):
+    return SPOOL_DIR / f"{table_name}_{sink_key}.spill"
+
+def has_spilled(table_name, sink_key):
+    """
+    Checks whether a sink of a session has spilled samples waiting for replay.
+    """
+    path = spill_path(table_name, sink_key)
+    return path.exists() or path.with_name(f"{path.name}.replay").exists()
+
+def manifest_path(table_name):
+    return SPOOL_DIR / f"{table_name}.session.json"
+
+def write_session_manifest(session):
+    """
+    Stores the sink layout of a session for replaying its spill files later.
+
+    @session: Dictionary with the session file, table and column layout
+    """
+    try:
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        path = manifest_path(session["tableName"])
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.error(f"Session Manifest Error: {e}", exc_info=True)
+
+def release_session_manifest(table_name):
+    """
+    Removes the manifest of a session once none of its sinks has spilled samples left.
+    """
+    if any(has_spilled(table_name, key) for key in SINK_KEYS):
+        log.warning(f"Session '{table_name}' still has spilled samples. They will be replayed on the next start.")
+        return
+    try:
+        os.remove(manifest_path(table_name))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        log.error(f"Session Manifest Error: {e}", exc_info=True)
+
+def build_sink_workers(session, only=None):
+    """
+    Creates the sink workers of a session.
+
+    @session: Dictionary with the session file, table and column layout
+    @only: Optional set of sink keys to create; all enabled sinks otherwise
+    @return: List of SinkWorker objects
+    """
+    tb_name = session["tableName"]
+    policies = config.SINK_POLICIES
+    metadata = {"meter_model": session["meterModel"], "table_name": tb_name, "burst_mode": session["burst"]}
+    only = set(only or SINK_KEYS)
+    workers = []
+
+    def add(key, sink):
+        if sink:
+            workers.append(SinkWorker(sink, policy=policies.get(key), spill_path=spill_path(tb_name, key)))
+
+    if "csv" in only and (config.CSV_ENABLED or not config.GORILLA_ENABLED):
+        add("csv", CsvSink(session["filename"], session["csvHeader"]))
+    if "sqlite" in only:
+        add("sqlite", SQLiteSink(tb_name, session["sqlColumns"], session["descriptions"]))
+    if "gorilla" in only:
+        add("gorilla", GorillaSink.create(gorilla_path(session["filename"]), session["csvHeader"][1:], metadata))
+    if "influxdb" in only:
+        add("influxdb", InfluxSink.connect(session["fields"]))
+    if "parquet" in only:
+        add("parquet", ParquetSink.create(tb_name, [tuple(c) for c in session["parquetColumns"]], metadata))
+    return workers
+
+def replay_orphaned_spills(active_tables=()):
+    """
+    Replays spill files left behind by sessions that stopped before their sinks recovered.
+    Each sink with spilled samples is started and stopped once, which makes one bounded replay attempt.
+
+    @active_tables: Table names of running sessions, whose own workers replay their spill files
+    """
+    if not SPOOL_DIR.exists():
+        return
+    known = set(active_tables)
+    for path in sorted(SPOOL_DIR.glob("*.session.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                session = json.load(f)
+        except (OSError, ValueError) as e:
+            log.error(f"Session Manifest Error: Failed to read '{path.name}': {e}", exc_info=True)
+            continue
+        tb_name = session.get("tableName")
+        known.add(tb_name)
+        if tb_name in active_tables:
+            continue
+        pending = {key for key in SINK_KEYS if has_spilled(tb_name, key)}
+        if pending:
+            log.info(f"Replaying spilled samples of session '{tb_name}' into {', '.join(sorted(pending))}.")
+            try:
+                workers = build_sink_workers(session, only=pending)
+            except Exception as e:
+                log.error(f"Spill Replay Error: Failed to open the sinks of '{tb_name}': {e}", exc_info=True)
+                continue
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.stop()
+        release_session_manifest(tb_name)
+
+    for path in SPOOL_DIR.glob("*.spill*"):
+        if not any(path.name.startswith(f"{t}_") for t in known):
+            log.warning(f"Spill file '{path.name}' has no session manifest and cannot be replayed.")
 
 class DataLogger:
     """
-    Handles CSV and InfluxDB logging of energy meter readings.
+    Handles CSV, SQLite and InfluxDB logging of energy meter readings.
     """
-    def __init__(self, filename, table_name, register_map, end_time=None, on_failure_callback=None):
+    def __init__(self, filename, table_name, register_map, end_time=None, on_failure_callback=None, meter_model=None,
+                 slave_id=None, active_parameters=None, log_interval=None, on_sample=None):
         self.ds_dir = config.DS_DIR
         self.ds_filename = filename
         self.tb_name = table_name
         self.end_time = end_time
         self.on_failure_callback = on_failure_callback
+        self.on_sample = on_sample
+        self.log_interval = log_interval
 
-        # Get active parameters from settings or use default
-        self.active_params = settings.get("ACTIVE_LOG_PARAMETERS")
-        if not self.active_params:
-            self.active_params = list(register_map.keys())
-
-        # Create dynamic CSV header
-        self.ds_header = ["Timestamp"]
-        self.sql_columns = ["Timestamp"]
-        
-        for p in self.active_params:
-            if p in register_map:
-                desc = register_map[p]["description"]
-                self.ds_header.append(desc)
-                col_name = f'"{desc.replace(" ", "_").replace("(", "").replace(")", "")}"'
-                self.sql_columns.append(col_name)
-
-        self.sql_columns.append('"sync_status"')
-
-        # If the file is new or empty, write the header row; otherwise, leave it unchanged
-        is_new_file = not os.path.exists(self.ds_filename) or os.path.getsize(self.ds_filename) == 0
-        with open(self.ds_filename, 'a', newline='') as file:
-            if is_new_file:
-                writer = csv.writer(file)
-                writer.writerow(self.ds_header)
-        log.info(f"CSV logging initialized to data log file '{self.ds_filename}' successfully.")
-        log.info(f"SQLite logging initialized to database table '{self.tb_name}' successfully.")
+        # Get the compiled acquisition plan for the active parameters
+        active_params = active_parameters if active_parameters is not None else settings.get("ACTIVE_LOG_PARAMETERS")
+        if meter_model:
+            self.plan = get_acquisition_plan(meter_model, active_params)
+        else:
+            self.plan = AcquisitionPlan(register_map, active_params)
+        self.active_params = self.plan.params
+
+        # Burst mode persists mean, min, max and last values per interval instead of single samples
+        self.burst = bool(settings.get("BURST_MODE"))
+        if self.burst:
+            csv_header, self.sql_columns, self.fields = self.plan.aggregate_layout()
+            self.buffer = BurstBuffer(len(self.plan.params))
+        else:
+            csv_header, self.sql_columns, self.fields = self.plan.csv_header, self.plan.sql_columns, self.plan.params
+            self.buffer = None
+        self.ds_header = list(csv_header)
+
+        # Per-parameter compression from the meter profile; burst rows are already aggregated
+        self.compressor = None if self.burst else SampleCompressor.from_register_map(self.plan, register_map)
+        self._compress_lock = threading.Lock()
 
         # NOTE: Since the serial port on Pi is enabled, the Modbus port (/dev/serial0) is always available.
         #       Modbus could appear available even without a connection to the meter.
         #       To truly ensure Modbus availability, we attempt to test polling the meter.
 
-        self.reader = MeterReader(use_modbus_flag=config.USE_MODBUS, register_map=register_map)
+        self.meter_model = meter_model
+        self.register_map = register_map
+        self.reader = create_meter_reader(meter_model=meter_model, register_map=register_map, slave_id=slave_id)
         test_readings = self.reader.get_meter_readings()
         if not test_readings:
             raise ConnectionError("Failed to read from the meter after multiple retries.")
 
-        self._initialize_influxdb()
+        log_interval = self.log_interval or settings.get("LOG_INTERVAL")
+        self.pipeline = self._build_pipeline()
         self._running = True
-        self.latest = None
+        self._stop_event = threading.Event()
+        self.clock = TickScheduler(log_interval, self._stop_event)
+        self._failing_since = None
+        self._failure_window = config.MAX_RETRIES * config.RETRY_INTERVAL
+        self.history = HistoryBuffer(self.plan.params)
+
+        # Show the test reading until the first aligned tick fires
+        self.latest = {"ts": datetime.now().replace(microsecond=0), "quality": {}, **self.plan.as_dict(self.plan.values_from(test_readings))}
 
-    def _initialize_influxdb(self):
+    def _build_pipeline(self):
         """
-        Initializes and tests the InfluxDB client connection.
+        Creates the sink workers that persist samples off the sampling thread.
+        The session layout is written next to the spill files, so samples spilled by a session that
+        never got to replay them can still be written to its sinks on the next start.
+
+        @return: SamplePipeline object
         """
-        self.influx_enabled = False
-        if not (config.INFLUXDB_URL and config.INFLUXDB_TOKEN):
-            log.info("InfluxDB config not provided. Continuing with CSV logging only.")
-            return
+        session = {
+            "filename": str(self.ds_filename),
+            "tableName": self.tb_name,
+            "meterModel": self.meter_model,
+            "burst": self.burst,
+            "csvHeader": self.ds_header,
+            "sqlColumns": list(self.sql_columns),
+            "fields": list(self.fields),
+            "descriptions": list(self.plan.descriptions),
+            "parquetColumns": self._parquet_columns(),
+        }
+        write_session_manifest(session)
+        return SamplePipeline(build_sink_workers(session))
 
-        try:
-            self.client = InfluxDBClient(
-                url=config.INFLUXDB_URL,
-                token=config.INFLUXDB_TOKEN,
-                org=config.INFLUXDB_ORG,
-                timeout=config.INFLUXDB_TIMEOUT
-            )
-
-            # Verify connection with ping
-            if self.client.ping():
-                self.write_api = self.client.write_api(
-                    write_options=SYNCHRONOUS,
-                    timeout=config.INFLUXDB_TIMEOUT
-                )
-                self.influx_enabled = True
-                log.info(f"InfluxDB ping successful and is online.")
+    def _parquet_columns(self):
+        """
+        Get the typed Parquet columns in sample value order.
+        Single-precision float registers stay float32; everything else is float64.
+
+        @return: List of (parameter, description, dtype) tuples
+        """
+        dtypes = []
+        for param in self.plan.params:
+            spec = self.register_map.get(param, {}) if self.register_map else {}
+            single = spec.get("data_type") == "float" and spec.get("number_of_registers", 2) == 2
+            dtypes.append("float32" if single else "float64")
+        dtypes *= len(self.fields) // max(1, len(self.plan.params))
+        return list(zip(self.fields, self.ds_header[1:], dtypes))
+
+    def _read_with_retry(self, deadline):
+        """
+        Reads a sample, retrying with jittered backoff only while the next sample is not yet due.
+
+        @deadline: Monotonic time at which the next sample is due
+        @return: Plan-ordered value list or None
+        """
+        attempt = 0
+        while self._running:
+            values = self.reader.read_values(self.plan)
+            if values is not None:
+                self._failing_since = None
+                return values
+
+            if self._failing_since is None:
+                self._failing_since = time.monotonic()
+            delay = self.reader.backoff.delay(attempt)
+            attempt += 1
+            if time.monotonic() + delay >= deadline:
+                return None
+            log.warning(f"Modbus communication failed. Retrying in {delay:.1f}s (attempt {attempt}).")
+            self._stop_event.wait(delay)
+        return None
+
+    def _has_failed(self):
+        """
+        Checks whether readings have failed for longer than the failure window.
+        Calls the failure callback and stops the logger if so.
+
+        @return: Boolean flag indicating if the logger was shut down
+        """
+        if self._failing_since is None or time.monotonic() - self._failing_since < self._failure_window:
+            return False
+        log.error("Data Logger Error: Could not retrieve readings after max retries. Shutting down logger.")
+        if self.on_failure_callback:
+            self.on_failure_callback()
+        self.stop()
+        return True
+
+    def _failed_params(self):
+        """
+        Get the parameters that failed or were skipped by their circuit breaker in the last reading.
+
+        @return: Dictionary mapping parameters to their quality flag
+        """
+        return {p: q for p, q in zip(self.plan.params, self.reader.last_quality) if q != QUALITY_OK}
+
+    def _sample_loop(self):
+        """
+        Reads one sample per tick and publishes it to the sinks.
+        """
+        while self._running and (self.end_time is None or datetime.now() < self.end_time):
+            tick = self.clock.wait()
+            if tick is None:
+                break
+
+            next_sample = time.monotonic() + self.clock.seconds_until_next()
+            values = self._read_with_retry(next_sample)
+            if values is None:
+                if self._has_failed():
+                    return
+                log.warning("Data Logger Warning: No readings before the next sample is due. Skipping sample.")
+                continue
+
+            # Use the aligned tick time as the sample timestamp
+            timestamp = tick.replace(microsecond=0)
+
+            # Flag registers that failed or were skipped by their circuit breaker
+            failed = self._failed_params()
+            quality = "partial" if failed else "good"
+            if failed:
+                log.warning(f"Partial sample recorded with {len(failed)} missing parameters: {', '.join(failed)}.")
+
+            self.latest = {"ts": timestamp, "quality": failed, **self.plan.as_dict(values)}
+            self.history.append(timestamp.timestamp(), values)
+            if self.on_sample:
+                self.on_sample(self.latest)
+
+            # Hand the sample to the sink workers without waiting for the writes
+            sample = Sample(timestamp, values, quality)
+            if self.compressor:
+                with self._compress_lock:
+                    sample = self.compressor.push(sample)
+            if sample:
+                self.pipeline.publish(sample)
+            log.info(f"Data logged successfully! | {self.pipeline.summary()} |")
+
+    def _burst_loop(self):
+        """
+        Polls the meter as fast as the bus allows into the ring buffer and
+        publishes aggregated rows on every tick.
+        """
+        period = float(settings.get("BURST_INTERVAL") or 0)
+        attempt = 0
+        while self._running and (self.end_time is None or datetime.now() < self.end_time):
+            started = time.monotonic()
+            values = self.reader.read_values(self.plan)
+            if values is not None:
+                attempt = 0
+                self._failing_since = None
+                now = time.time()
+                self.buffer.append(now, values)
+                self.history.append(now, values)
+                self.latest = {"ts": datetime.now().replace(microsecond=0), "quality": self._failed_params(), **self.plan.as_dict(values)}
+                if self.on_sample:
+                    self.on_sample(self.latest)
             else:
-                log.warning("InfluxDB ping failed. URL and token may be invalid.")
-        except Exception as e:
-            log.error(f"InfluxDB Connection Error: {e}", exc_info=True)
-            log.warning("Could not connect to InfluxDB. Continuing with CSV logging only.")
-            self.client = None
+                if self._failing_since is None:
+                    self._failing_since = time.monotonic()
+                if self._has_failed():
+                    return
+
+            tick = self.clock.poll()
+            if tick is not None:
+                self._publish_aggregate(tick)
+
+            # Back off while the meter does not answer, but never past the next tick
+            delay = period - (time.monotonic() - started)
+            if values is None:
+                delay = max(delay, self.reader.backoff.delay(attempt))
+                attempt += 1
+            delay = min(delay, self.clock.seconds_until_next())
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+    def _publish_aggregate(self, tick):
+        """
+        Publishes the mean, min, max and last values of the closed window to the sinks.
+
+        @tick: Datetime of the tick closing the window
+        """
+        samples = self.buffer.pending
+        aggregates = self.buffer.aggregate()
+        if aggregates is None:
+            log.warning("Data Logger Warning: No burst samples in the last interval. Skipping row.")
+            return
+
+        means = aggregates[0]
+        missing = [p for p, v in zip(self.plan.params, means) if v is None]
+        quality = "partial" if missing else "good"
+        if missing:
+            log.warning(f"Partial row recorded with {len(missing)} missing parameters: {', '.join(missing)}.")
+
+        values = [v for column in aggregates for v in column]
+        self.pipeline.publish(Sample(tick.replace(microsecond=0), values, quality))
+        log.info(f"Data logged successfully! | {samples} burst samples | {self.pipeline.summary()} |")
 
     def log(self):
         """
-        Simultaneously log meter readings to CSV and InfluxDB.
+        Samples meter readings and publishes them to the CSV, SQLite and InfluxDB sinks.
         """
         try:
-            log_interval = settings.get("LOG_INTERVAL")
-            flush_interval = 900
-            writes_per_flush = int(flush_interval / log_interval)
-            write_counter = 0
-
-            while self._running and (self.end_time is None or datetime.now() < self.end_time):
-                readings = self.reader.get_meter_readings(active_parameters=self.active_params)
-                if not readings:
-                    log.error("Data Logger Error: Could not retrieve readings after max retries. Shutting down logger.")
-                    if self.on_failure_callback:
-                        self.on_failure_callback()
-                    self.stop()
-                    return
-
-                # Prepare current timestamp for logging
-                timestamp = datetime.now()
-                timestamp = timestamp.replace(microsecond=0)
-
-                self.latest = {"ts": timestamp, **readings}
-                timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-
-                # CSV WRITING
-                csv_status = "FAIL"
-                try:
-                    row_data = [timestamp_str] + [readings.get(key) for key in self.active_params]
-                    with open(self.ds_filename, 'a', newline='') as file:
-                        writer = csv.writer(file)
-                        writer.writerow(row_data)
-
-                        # Update write counter and flush
-                        write_counter += 1
-                        if write_counter >= writes_per_flush:
-                            file.flush()
-                            os.fsync(file.fileno())
-                            write_counter = 0
-                            log.info("Memory buffer flushed to disk successfully.")
-                    csv_status = "OK"
-                except Exception as e:
-                    log.error(f"CSV Write Error: {e}", exc_info=True)
-
-                # INFLUXDB WRITING
-                if self.influx_enabled:
-                    try:
-                        point = Point("meter_measurements").tag("source", "wago_meter")
-                        for key, value in readings.items():
-                            if value is not None:
-                                point.field(key, value)
-                        point.time(datetime.now(tz=timezone.utc), WritePrecision.S)
-                        self.write_api.write(bucket=config.INFLUXDB_BUCKET, record=point)
-                        influx_status = "OK"
-                    except Exception as e:
-                        log.error(f"InfluxDB Write Error: {e}", exc_info=True)
-                        influx_status = "FAIL"
-                else:
-                    influx_status = "-"
-
-                # SQLITE WRITING
-                sqlite_status = "FAIL"
-                try:
-                    sql_values = [timestamp] + [readings.get(key) for key in self.active_params]
-                    sql_values.append('pending')
-
-                    # Construct SQL statement
-                    columns_str = ", ".join(self.sql_columns)
-                    placeholders = ", ".join([f":param_{i}" for i in range(len(sql_values))])
-                    stmt = text(f'INSERT INTO "{self.tb_name}" ({columns_str}) VALUES ({placeholders})')
-                    params_dict = {f"param_{i}": val for i, val in enumerate(sql_values)}
-
-                    with ENGINE.connect() as connection:
-                        with connection.begin():
-                            connection.execute(stmt, params_dict)
-
-                    if config.REMOTE_DB_ENABLED:
-                        sqlite_status = "OK"
-                    else:
-                        sqlite_status = "-"
-                except Exception as e:
-                    log.error(f"SQLite Write Error: {e}", exc_info=True)
-
-                log.info(f"Data logged successfully! | CSV: {csv_status} | InfluxDB: {influx_status} | SQLite: {sqlite_status} |")
-                time.sleep(settings.get("LOG_INTERVAL"))
+            self.pipeline.start()
+            if self.burst:
+                self._burst_loop()
+            else:
+                self._sample_loop()
         except KeyboardInterrupt:
             log.info("Data logging stopped by user.")
         finally:
             self.stop()
 
+    def get_sampling_stats(self):
+        """
+        Get the tick scheduler statistics, the raw sample counters in burst mode and the compression counters.
+
+        @return: Dictionary with sampling statistics
+        """
+        stats = self.clock.get_stats()
+        if self.buffer is not None:
+            stats["burst"] = self.buffer.get_stats()
+        if self.compressor is not None:
+            stats["compression"] = self.compressor.get_stats()
+        return stats
+
     def start(self):
         """ 
         Starts the data logging procecss.
@@ -211,6 +430,12 @@ class DataLogger:
         Stops the data logging process.
         """
         self._running = False
-        if self.influx_enabled and self.client:
-            self.client.close()
-            log.info("InfluxDB connection closed.")
\ No newline at end of file
+        self._stop_event.set()
+        if self.compressor:
+            # Store the sample still held back by the compressor before the sinks close
+            with self._compress_lock:
+                sample = self.compressor.flush()
+            if sample:
+                self.pipeline.publish(sample)
+        self.pipeline.stop()
+        release_session_manifest(self.tb_name)
\ No newline at end of file
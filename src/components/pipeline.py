@@ -0,0 +1,462 @@
+# src/components/pipeline.py
+
+import os
+import json
+import time
+import logging
+import threading
+
+from config import config
+from collections import deque
+from datetime import datetime
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_SPILL = "spill"
+_reopen_generation = 0 # Bumped by request_reopen(); workers reopen their sink when it changes
+
+# SERVICES
+
+class Sample:
+    """
+    Represents one acquired sample handed from the reader to the sinks.
+    Compressed samples carry the stored values, None where a reading was left out, and the raw values.
+    """
+    __slots__ = ("ts", "values", "quality", "raw")
+
+    def __init__(self, ts, values, quality="good", raw=None):
+        self.ts = ts
+        self.values = values
+        self.quality = quality
+        self.raw = raw
+
+    @property
+    def suppressed(self):
+        """
+        Whether compression left out every reading of the sample.
+        """
+        return self.raw is not None and all(v is None for v in self.values)
+
+    def to_json(self):
+        data = {"ts": self.ts.isoformat(), "values": self.values, "quality": self.quality}
+        if self.raw is not None:
+            data["raw"] = self.raw
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, line):
+        data = json.loads(line)
+        return cls(datetime.fromisoformat(data["ts"]), data["values"], data.get("quality", "good"), data.get("raw"))
+
+class Sink:
+    """
+    Base class for sample sinks drained by a SinkWorker.
+    """
+    name = "Sink"
+    receives_suppressed = False # Whether samples without stored readings are passed to the sink
+
+    def write(self, samples):
+        """
+        Persists a batch of samples. Raises on failure.
+
+        @samples: List of Sample objects
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Called when the worker is idle.
+        """
+
+    def close(self):
+        """
+        Called once when the worker stops.
+        """
+
+    def reopen(self):
+        """
+        Called to reopen files after rotation or session recovery.
+        """
+
+    def get_stats(self):
+        """
+        Get sink-specific statistics merged into the worker statistics.
+        """
+        return {}
+
+class SinkWorker:
+    """
+    Drains a bounded ring buffer of samples into a sink on its own thread.
+    The backpressure policy decides what happens when the ring is full:
+    block the producer, drop the oldest sample or spill to disk for later replay.
+    Spilled samples are written to disk by the worker, never by the producer.
+    """
+    def __init__(self, sink, policy=POLICY_DROP_OLDEST, capacity=config.SINK_QUEUE_SIZE,
+                 batch_size=config.SINK_BATCH_SIZE, spill_path=None):
+        if policy == POLICY_SPILL and not spill_path:
+            raise ValueError(f"Sink '{sink.name}' uses the spill policy but has no spill path.")
+        self.sink = sink
+        self.policy = policy
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self._spill_path = str(spill_path) if spill_path else None
+        self._ring = deque()
+        self._overflow = []
+        self._cond = threading.Condition()
+        self._spilling = False
+        self._closed = False
+        self._final_replay = False
+        self._stop_deadline = None
+        self._thread = None
+        self._started_at = None
+        self._last_latency = None
+        self._stats = {"enqueued": 0, "written": 0, "dropped": 0, "spilled": 0, "lost": 0}
+        self._reopen_seen = _reopen_generation
+
+    # SPILL FILE
+
+    def _spill(self, samples):
+        """
+        Appends samples to the spill file. Runs on the worker thread.
+        """
+        lines = "".join(s.to_json() + "\n" for s in samples)
+        try:
+            os.makedirs(os.path.dirname(self._spill_path), exist_ok=True)
+            size = os.path.getsize(self._spill_path) if os.path.exists(self._spill_path) else 0
+            if size + len(lines) > config.SINK_SPILL_MAX_BYTES:
+                with self._cond:
+                    self._stats["dropped"] += len(samples)
+                log.warning(f"Spill file for sink '{self.sink.name}' is full. Dropped {len(samples)} samples.")
+                return
+            with open(self._spill_path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+            with self._cond:
+                self._stats["spilled"] += len(samples)
+        except OSError as e:
+            with self._cond:
+                self._stats["dropped"] += len(samples)
+            log.error(f"Sink Spill Error: Failed to spill samples for '{self.sink.name}': {e}", exc_info=True)
+
+    def _drain_overflow(self):
+        """
+        Moves samples the producer set aside while spilling into the spill file.
+        """
+        with self._cond:
+            samples, self._overflow = self._overflow, []
+        if samples:
+            self._spill(samples)
+
+    def _restore(self, lines):
+        """
+        Puts unwritten replay lines back in front of the spill file.
+        """
+        with self._cond:
+            os.makedirs(os.path.dirname(self._spill_path), exist_ok=True)
+            existing = []
+            if os.path.exists(self._spill_path):
+                with open(self._spill_path, 'r', encoding='utf-8') as f:
+                    existing = f.readlines()
+            tmp_path = f"{self._spill_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines + existing)
+            os.replace(tmp_path, self._spill_path)
+            self._spilling = True
+
+    def _recover_spill(self):
+        """
+        Merges a replay file left behind by a crash back into the spill file.
+        """
+        replay_path = f"{self._spill_path}.replay"
+        if os.path.exists(replay_path):
+            with open(replay_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            self._restore(lines)
+            os.remove(replay_path)
+        if os.path.exists(self._spill_path) and os.path.getsize(self._spill_path) > 0:
+            self._spilling = True
+            log.info(f"Found spilled samples for sink '{self.sink.name}'. They will be replayed.")
+
+    # WORKER LOOP
+
+    def _next_batch(self):
+        """
+        Waits for work.
+        After close, a pending spill file is handed out for one last replay before the worker exits.
+
+        @return: Tuple of (batch, replay_path); batch is None when closed and [] on idle
+        """
+        self._drain_overflow()
+        with self._cond:
+            while not self._ring and not self._spilling:
+                if self._closed:
+                    return None, None
+                if not self._cond.wait(timeout=config.SINK_FLUSH_INTERVAL):
+                    return [], None
+            if self._ring:
+                count = min(self.batch_size, len(self._ring))
+                batch = [self._ring.popleft() for _ in range(count)]
+                self._cond.notify_all()
+                return batch, None
+            if self._overflow:
+                return [], None
+            if self._closed:
+                if self._final_replay:
+                    return None, None
+                self._final_replay = True
+
+            # Ring is drained while spilling, so take over the spill file for replay
+            if not os.path.exists(self._spill_path):
+                self._spilling = False
+                return [], None
+            replay_path = f"{self._spill_path}.replay"
+            os.replace(self._spill_path, replay_path)
+            return [], replay_path
+
+    def _wait_retry(self, delay):
+        """
+        Waits before retrying a failed sink while moving overflowing samples to the spill file.
+        Returns early when the worker is stopped.
+        """
+        deadline = time.monotonic() + delay
+        while True:
+            self._drain_overflow()
+            with self._cond:
+                remaining = deadline - time.monotonic()
+                if self._closed or remaining <= 0:
+                    return
+                self._cond.wait_for(lambda: self._closed or len(self._overflow) >= self.batch_size, remaining)
+
+    def _write(self, samples):
+        """
+        Writes a batch to the sink and records its latency.
+
+        @return: Boolean flag indicating success
+        """
+        started = time.monotonic()
+        try:
+            self.sink.write(samples)
+        except Exception as e:
+            log.error(f"{self.sink.name} Write Error: {e}", exc_info=True)
+            return False
+        self._last_latency = time.monotonic() - started
+        with self._cond:
+            self._stats["written"] += len(samples)
+        return True
+
+    def _replay(self, replay_path, deadline=None):
+        """
+        Writes spilled samples back to the sink in order.
+        Samples left when the sink fails or the deadline passes go back to the spill file.
+
+        @replay_path: Path of the replay file
+        @deadline: Optional monotonic time after which the replay is abandoned
+        """
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+        for i in range(0, len(lines), self.batch_size):
+            if deadline is not None and time.monotonic() >= deadline:
+                self._restore(lines[i:])
+                os.remove(replay_path)
+                log.warning(f"Left {len(lines) - i} spilled samples of sink '{self.sink.name}' for a later replay.")
+                return
+            chunk = lines[i:i + self.batch_size]
+            if not self._write([Sample.from_json(line) for line in chunk]):
+                self._restore(lines[i:])
+                os.remove(replay_path)
+                self._wait_retry(config.SINK_RETRY_DELAY)
+                return
+            self._drain_overflow()
+        os.remove(replay_path)
+        log.info(f"Replayed {len(lines)} spilled samples into sink '{self.sink.name}'.")
+
+    def _reopen_if_requested(self):
+        """
+        Reopens the sink on the worker thread after request_reopen(), so the sink's lock is only
+        ever taken by the thread that writes to it.
+        """
+        generation = _reopen_generation
+        if generation == self._reopen_seen:
+            return
+        self._reopen_seen = generation
+        try:
+            self.sink.reopen()
+        except Exception as e:
+            log.error(f"{self.sink.name} Reopen Error: {e}", exc_info=True)
+
+    def _run(self):
+        while True:
+            self._reopen_if_requested()
+            batch, replay_path = self._next_batch()
+            if batch is None:
+                break
+            if replay_path:
+                self._replay(replay_path, self._stop_deadline if self._closed else None)
+                continue
+            if not batch:
+                self._flush()
+                continue
+            if self._write(batch):
+                continue
+
+            if self.policy == POLICY_SPILL:
+                # Keep sample order by putting the failed batch and everything queued behind it
+                # in front of samples that already overflowed into the spill file
+                with self._cond:
+                    pending = batch + list(self._ring)
+                    self._ring.clear()
+                    try:
+                        self._restore([s.to_json() + "\n" for s in pending])
+                        self._stats["spilled"] += len(pending)
+                    except OSError as e:
+                        self._stats["lost"] += len(pending)
+                        log.error(f"Sink Spill Error: Failed to spill samples for '{self.sink.name}': {e}", exc_info=True)
+                    self._cond.notify_all()
+                self._wait_retry(config.SINK_RETRY_DELAY)
+            else:
+                with self._cond:
+                    self._stats["lost"] += len(batch)
+
+        self._flush()
+        try:
+            self.sink.close()
+        except Exception as e:
+            log.error(f"{self.sink.name} Close Error: {e}", exc_info=True)
+
+    def _flush(self):
+        try:
+            self.sink.flush()
+        except Exception as e:
+            log.error(f"{self.sink.name} Flush Error: {e}", exc_info=True)
+
+    # CONTROL
+
+    def start(self):
+        """
+        Starts the worker thread.
+        """
+        if self.policy == POLICY_SPILL:
+            self._recover_spill()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"sink-{self.sink.name}", daemon=True)
+        self._thread.start()
+
+    def offer(self, sample):
+        """
+        Enqueues a sample according to the backpressure policy.
+
+        @sample: Sample object
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._stats["enqueued"] += 1
+            if self.policy == POLICY_SPILL:
+                if self._spilling or len(self._ring) >= self.capacity:
+                    # Set aside for the worker to spill, so the sampling thread never touches the disk
+                    self._spilling = True
+                    if len(self._overflow) < config.SINK_SPILL_BUFFER:
+                        self._overflow.append(sample)
+                    else:
+                        if not self._stats["dropped"]:
+                            log.warning(f"Spill buffer for sink '{self.sink.name}' is full. Dropping new samples.")
+                        self._stats["dropped"] += 1
+                else:
+                    self._ring.append(sample)
+            elif self.policy == POLICY_BLOCK:
+                while len(self._ring) >= self.capacity and not self._closed:
+                    self._cond.wait()
+                self._ring.append(sample)
+            else:
+                if len(self._ring) >= self.capacity:
+                    self._ring.popleft()
+                    self._stats["dropped"] += 1
+                self._ring.append(sample)
+            self._cond.notify_all()
+
+    def stop(self, timeout=config.SINK_STOP_TIMEOUT):
+        """
+        Drains the ring buffer, makes one bounded attempt to replay spilled samples, closes the sink
+        and stops the worker thread.
+
+        @timeout: Maximum time to wait for the drain in seconds
+        """
+        with self._cond:
+            self._closed = True
+            self._stop_deadline = time.monotonic() + timeout * 0.8
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                log.warning(f"Sink '{self.sink.name}' did not drain in time.")
+
+    def get_stats(self):
+        """
+        Get queue, lag and throughput counters of the sink.
+
+        @return: Dictionary with sink statistics
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._ring) + len(self._overflow)
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0
+        stats["policy"] = self.policy
+        stats["lag"] = stats["enqueued"] - stats["written"] - stats["dropped"] - stats["lost"]
+        stats["throughput"] = round(stats["written"] / elapsed, 3) if elapsed > 0 else None
+        stats["lastWriteMs"] = round(self._last_latency * 1000, 3) if self._last_latency is not None else None
+        stats.update(self.sink.get_stats())
+        return stats
+
+class SamplePipeline:
+    """
+    Fans samples out from the acquisition loop to independent sink workers.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self._stopped = False
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def publish(self, sample):
+        """
+        Hands a sample to every sink without waiting for it to be written.
+
+        @sample: Sample object
+        """
+        suppressed = sample.suppressed
+        for worker in self.workers:
+            if not suppressed or worker.sink.receives_suppressed:
+                worker.offer(sample)
+
+    def stop(self):
+        """
+        Stops all sink workers once.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        for worker in self.workers:
+            worker.stop()
+
+    def get_stats(self):
+        return {worker.sink.name: worker.get_stats() for worker in self.workers}
+
+    def summary(self):
+        """
+        Get a one-line lag summary for log messages.
+        """
+        return " | ".join(f"{worker.sink.name}: lag {worker.get_stats()['lag']}" for worker in self.workers)
+
+# FUNCTIONS
+
+def request_reopen():
+    """
+    Asks every sink worker to reopen its files on its next pass, e.g. after log rotation.
+    Takes no locks, so it is safe to call from a signal handler.
+    """
+    global _reopen_generation
+    _reopen_generation += 1
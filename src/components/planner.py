@@ -0,0 +1,268 @@
+# src/components/planner.py
+
+import os
+import struct
+import logging
+import threading
+
+from config import config
+from config.loader import load_meter_config
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+REGISTER_FORMATS = {
+    ("float", 2): struct.Struct(">f"),
+    ("float", 4): struct.Struct(">d"),
+    ("dword", 2): struct.Struct(">I"),
+    ("dword", 4): struct.Struct(">Q"),
+    ("int", 2): struct.Struct(">i"),
+    ("int", 4): struct.Struct(">q"),
+    ("word", 1): struct.Struct(">H"),
+}
+AGGREGATES = ("min", "max", "last") # Burst mode columns next to the mean value
+_plan_cache = {}
+_plan_lock = threading.Lock()
+
+# SERVICES
+
+class ReadBlock:
+    """
+    Represents a contiguous range of registers fetched in a single Modbus transaction.
+    """
+    __slots__ = ("functioncode", "start", "count", "fields", "layout", "_frame", "_parts")
+
+    def __init__(self, functioncode, start):
+        self.functioncode = functioncode
+        self.start = start
+        self.count = 0
+        self.fields = []
+        self.layout = []
+        self._frame = None
+        self._parts = None
+
+    def add_field(self, index, address, size, decoder, scale_factor):
+        """
+        Adds a parameter to the block and extends the register range to cover it.
+
+        @index: Position of the parameter in the plan's value list
+        @address: Starting register address of the parameter
+        @size: Number of registers occupied by the parameter
+        @decoder: Struct used to unpack the raw register bytes
+        @scale_factor: Multiplier applied to the decoded value
+        """
+        offset = address - self.start
+        self.count = max(self.count, offset + size)
+        self.fields.append((index, offset * 2, decoder.unpack_from, scale_factor))
+        self.layout.append((index, address, size, decoder, scale_factor))
+
+    def compile(self):
+        """
+        Freezes the block fields and precompiles the register frame struct.
+        """
+        self.fields = tuple(self.fields)
+        self.layout = tuple(self.layout)
+        self._frame = struct.Struct(f">{self.count}H")
+
+    def split(self):
+        """
+        Splits the block into single-parameter blocks for fault isolation.
+
+        @return: Tuple of compiled ReadBlock objects
+        """
+        if self._parts is None:
+            parts = []
+            for index, address, size, decoder, scale_factor in self.layout:
+                part = ReadBlock(self.functioncode, address)
+                part.add_field(index, address, size, decoder, scale_factor)
+                part.compile()
+                parts.append(part)
+            self._parts = tuple(parts)
+        return self._parts
+
+    def decode(self, registers, values):
+        """
+        Decodes the raw registers of the block into scaled values in place.
+
+        @registers: List of 16-bit register values read from the meter
+        @values: Plan-ordered value list to fill
+        """
+        raw = self._frame.pack(*registers)
+        for index, byte_offset, unpack_from, scale_factor in self.fields:
+            values[index] = round(unpack_from(raw, byte_offset)[0] * scale_factor, 3) # Set precision to 3 decimal places
+
+class AcquisitionPlan:
+    """
+    Compiled read plan for a meter model and active parameter set.
+    Resolves addresses, decoders, CSV header and SQL columns once per session.
+    """
+    __slots__ = ("params", "descriptions", "blocks", "csv_header", "sql_columns", "mtime")
+
+    def __init__(self, register_map, active_parameters=None, mtime=None):
+        requested = active_parameters if active_parameters else register_map.keys()
+        self.params = tuple(p for p in requested if p in register_map)
+        self.descriptions = tuple(register_map[p]["description"] for p in self.params)
+        self.blocks = tuple(plan_read_blocks(register_map, self.params))
+        self.csv_header = ("Timestamp",) + self.descriptions
+        self.sql_columns = ('"Timestamp"',) + tuple(f'"{sql_column_name(d)}"' for d in self.descriptions)
+        self.mtime = mtime
+
+    def empty_values(self):
+        """
+        Creates a value list aligned to the plan parameters.
+        """
+        return [None] * len(self.params)
+
+    def as_dict(self, values):
+        """
+        Maps a plan-ordered value list back to parameter names.
+
+        @values: Plan-ordered value list
+        @return: Dictionary with readings
+        """
+        return dict(zip(self.params, values))
+
+    def aggregate_layout(self):
+        """
+        Get the CSV header, SQL columns and field names of burst mode rows.
+        Mean values keep the regular columns; min, max and last values follow per aggregate.
+
+        @return: Tuple of (csv_header, sql_columns, fields)
+        """
+        csv_header = self.csv_header + tuple(f"{d} ({a})" for a in AGGREGATES for d in self.descriptions)
+        sql_columns = self.sql_columns + tuple(
+            f'"{aggregate_column_name(d, a)}"' for a in AGGREGATES for d in self.descriptions
+        )
+        fields = self.params + tuple(f"{p}_{a}" for a in AGGREGATES for p in self.params)
+        return csv_header, sql_columns, fields
+
+    def values_from(self, readings):
+        """
+        Orders a readings dictionary into a plan-ordered value list.
+
+        @readings: Dictionary with readings
+        @return: Plan-ordered value list
+        """
+        return [readings.get(p) for p in self.params]
+
+# FUNCTIONS
+
+def register_layout(name, params):
+    """
+    Resolves the register size and decoder for a register map entry.
+
+    @name: Parameter name in the register map
+    @params: Register map entry of the parameter
+    @return: Tuple of (size, decoder) or None if unsupported
+    """
+    data_type = params.get("data_type")
+    size = 1 if data_type == "word" else params.get("number_of_registers", 2)
+    decoder = REGISTER_FORMATS.get((data_type, size))
+    if decoder is None:
+        log.warning(f"Unsupported data type '{data_type}' for parameter '{name}'.")
+        return None
+    return size, decoder
+
+def plan_read_blocks(register_map, params_to_log):
+    """
+    Groups the requested parameters into contiguous register blocks by function code.
+
+    @register_map: The register map for the meter model
+    @params_to_log: Ordered list of parameter names to read
+    @return: List of ReadBlock objects ordered by function code and address
+    """
+    entries = []
+    for index, name in enumerate(params_to_log):
+        if name not in register_map:
+            continue
+        params = register_map[name]
+        layout = register_layout(name, params)
+        if layout is None:
+            continue
+        size, decoder = layout
+        entries.append((params["functioncode"], params["address"], size, index, decoder, params.get("scale_factor", 1)))
+    entries.sort(key=lambda e: (e[0], e[1]))
+
+    blocks = []
+    block = None
+    for functioncode, address, size, index, decoder, scale_factor in entries:
+        fits = (
+            block is not None
+            and block.functioncode == functioncode
+            and address <= block.start + block.count + config.MODBUS_MAX_BLOCK_GAP
+            and address + size - block.start <= config.MODBUS_MAX_BLOCK_REGISTERS
+        )
+        if not fits:
+            block = ReadBlock(functioncode, address)
+            blocks.append(block)
+        block.add_field(index, address, size, decoder, scale_factor)
+    for block in blocks:
+        block.compile()
+    return blocks
+
+def sql_column_name(description):
+    """
+    Converts a register description into its SQL column name.
+
+    @description: Register description from the meter profile
+    @return: Sanitized column name
+    """
+    return description.replace(' ', '_').replace('(', '').replace(')', '')
+
+def aggregate_column_name(description, aggregate):
+    """
+    Converts a register description into the SQL column name of a burst mode aggregate.
+
+    @description: Register description from the meter profile
+    @aggregate: One of AGGREGATES
+    @return: Sanitized column name
+    """
+    return f"{sql_column_name(description)}__{aggregate}"
+
+def is_aggregate_column(name):
+    """
+    Checks whether an SQL column holds a burst mode aggregate.
+
+    @name: Column name
+    """
+    return "__" in name and name.rsplit("__", 1)[1] in AGGREGATES
+
+def get_acquisition_plan(model_name, active_parameters=None):
+    """
+    Gets the memoized acquisition plan for a meter model and parameter set.
+    The plan is rebuilt when the meter profile file changes on disk.
+
+    @model_name: The name of the meter model
+    @active_parameters: List of parameters to log or None for all
+    @return: AcquisitionPlan object
+    """
+    key = (model_name, tuple(active_parameters) if active_parameters else None)
+    try:
+        mtime = os.path.getmtime(config.METERS_DIR / f"{model_name}.json")
+    except OSError:
+        mtime = None
+
+    with _plan_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None and plan.mtime == mtime:
+            return plan
+
+    register_map = load_meter_config(model_name)
+    plan = AcquisitionPlan(register_map, active_parameters, mtime=mtime)
+    with _plan_lock:
+        _plan_cache[key] = plan
+    log.info(f"Compiled acquisition plan for '{model_name}' with {len(plan.params)} parameters in {len(plan.blocks)} blocks.")
+    return plan
+
+def invalidate_plans(model_name=None):
+    """
+    Drops memoized acquisition plans.
+
+    @model_name: Only drop plans for this meter model if provided
+    """
+    with _plan_lock:
+        if model_name is None:
+            _plan_cache.clear()
+        else:
+            for key in [k for k in _plan_cache if k[0] == model_name]:
+                del _plan_cache[key]
@@ -2,49 +2,50 @@
 
 import random
 import time
-import minimalmodbus
 import logging
+import minimalmodbus
 
 from config import config
+from config.loader import load_meter_config
 from components.settings import settings
+from components.planner import AcquisitionPlan
+from components.bus import modbus_bus
+from components.retry import Backoff, CircuitBreaker
 
 # GLOBAL VARIABLES
 
 log = logging.getLogger(__name__)
-PARITY_MAP = {
-    'N': minimalmodbus.serial.PARITY_NONE,
-    'E': minimalmodbus.serial.PARITY_EVEN,
-    'O': minimalmodbus.serial.PARITY_ODD,
-}
+QUALITY_OK = "ok"
+QUALITY_FAIL = "fail"
+QUALITY_OPEN = "open"
 
 class MeterReader:
     """
     Encapsulates the logic for reading from a power meter.
     """
-    def __init__(self, use_modbus_flag=config.USE_MODBUS, register_map=None):
+    def __init__(self, use_modbus_flag=config.USE_MODBUS, register_map=None, slave_id=None, bus=None):
         self.instrument = None
         self.use_mock = config.DEVELOPER_MODE
         self.use_modbus = use_modbus_flag
         self.register_map = register_map
+        self.slave_id = slave_id if slave_id is not None else settings.get("MODBUS_SLAVE_ID")
+        self.bus = bus if bus is not None else modbus_bus
+        self._plans = {}
+        self._breakers = {}
+        self.backoff = Backoff()
+        self.last_quality = []
 
         if self.use_modbus:
             if not self.register_map:
                 raise ValueError("Unable to find register map for Modbus communication.")
-            try:
-                self.instrument = minimalmodbus.Instrument(
-                    port=config.MODBUS_PORT,
-                    slaveaddress=settings.get("MODBUS_SLAVE_ID")
-                )
-                parity_str = settings.get("PARITY")
-                self.instrument.serial.parity = PARITY_MAP.get(parity_str, minimalmodbus.serial.PARITY_NONE)
-                self.instrument.serial.baudrate = settings.get("BAUDRATE")
-                self.instrument.serial.bytesize = settings.get("BYTESIZE")
-                self.instrument.serial.stopbits = settings.get("STOPBITS")
-                self.instrument.serial.timeout = settings.get("TIMEOUT")
-                self.instrument.mode = minimalmodbus.MODE_RTU
-                log.info("Modbus instrument initialized for meter readings.")
-            except Exception as e:
-                raise ConnectionError(f"Failed to initialize Modbus on port '{config.MODBUS_PORT}': {e}", exc_info=True)
+            self._connect()
+
+    def _connect(self):
+        """
+        Initializes the Modbus RTU instrument on the shared serial bus.
+        """
+        self.instrument = self.bus.instrument(self.slave_id)
+        log.info(f"Modbus instrument initialized for meter readings on slave ID {self.slave_id}.")
 
     def meter_reading_mock(self, active_parameters=None):
         """
@@ -109,76 +110,183 @@ class MeterReader:
                     readings[name] = round(power_factor_base, 3)
         return readings
 
+    def plan_for(self, active_parameters=None):
+        """
+        Gets the compiled acquisition plan for a parameter set, building it once.
+
+        @active_parameters: List of specific parameters to read
+        @return: AcquisitionPlan object
+        """
+        key = tuple(active_parameters) if active_parameters else None
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = AcquisitionPlan(self.register_map, active_parameters)
+            self._plans[key] = plan
+        return plan
+
     def meter_reading_modbus(self, active_parameters=None):
         """
         Polls electrical data from the power meter registers through Modbus.
+        Contiguous registers are fetched with a single multi-register read per block.
         
         @active_parameters: List of specific parameters to read from Modbus
         @return: Dictionary with Modbus readings or None
         """
-        readings = {}
+        plan = self.plan_for(active_parameters)
+        values = self._poll_plan(plan)
+        return plan.as_dict(values) if values is not None else None
+
+    def _breaker(self, block):
+        """
+        Gets the circuit breaker of a register block.
+        """
+        key = (block.functioncode, block.start, block.count)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker()
+        return breaker
+
+    def _is_register_fault(self, error):
+        """
+        Checks whether a read error came from the meter rejecting the registers rather than the link.
+
+        @error: Exception raised by the read
+        """
+        return isinstance(error, minimalmodbus.ModbusException) and not isinstance(error, minimalmodbus.NoResponseError)
+
+    def _read_blocks(self, blocks):
+        """
+        Reads the registers of several blocks within one bus transaction.
+        The sweep stops at the first link error, since every further read would only wait out its own timeout.
+
+        @blocks: List of ReadBlock objects
+        @return: List with the registers or the raised exception per block, ending at a link error
+        """
+        results = []
+        with self.bus.transaction(self.slave_id) as instrument:
+            for block in blocks:
+                try:
+                    results.append(instrument.read_registers(
+                        registeraddress=block.start,
+                        number_of_registers=block.count,
+                        functioncode=block.functioncode,
+                    ))
+                except Exception as e:
+                    results.append(e)
+                    if not self._is_register_fault(e):
+                        break
+        return results
+
+    def _poll_plan(self, plan):
+        """
+        Executes the block reads of a compiled plan with per-register fault isolation.
+        Blocks rejected by the meter are re-read field by field, and fields that keep
+        failing are skipped by their circuit breaker so the rest stay on time.
+
+        @plan: AcquisitionPlan to execute
+        @return: Plan-ordered value list or None if nothing could be read
+        """
+        values = plan.empty_values()
+        quality = [QUALITY_OK] * len(values)
+        now = time.monotonic()
         try:
-            params_to_log = active_parameters if active_parameters else self.register_map.keys()
-            for name in params_to_log:
-                if name in self.register_map:
-                    params = self.register_map[name]
-                    data_type = params.get("data_type")
-                    scale_factor = params.get("scale_factor", 1)
-                    raw_value = 0
-
-                    if data_type == "float":
-                        raw_value = self.instrument.read_float(
-                            registeraddress=params["address"],
-                            functioncode=params["functioncode"],
-                            number_of_registers=params.get("number_of_registers", 2),
-                        )
-                    elif data_type in ["dword", "int"]:
-                        is_signed = (data_type == "int")
-                        raw_value = self.instrument.read_long(
-                            registeraddress=params["address"],
-                            functioncode=params["functioncode"],
-                            number_of_registers=params.get("number_of_registers", 2),
-                            signed=is_signed,
-                        )
-                    elif data_type == "word":
-                        raw_value = self.instrument.read_register(
-                            registeraddress=params["address"],
-                            functioncode=params["functioncode"],
-                        )
+            direct = []
+            isolated = []
+            for block in plan.blocks:
+                (direct if self._breaker(block).allow(now) else isolated).append(block)
+
+            for block, result in zip(direct, self._read_blocks(direct) if direct else []):
+                if not isinstance(result, Exception):
+                    self._breaker(block).record_success()
+                    block.decode(result, values)
+                elif self._is_register_fault(result):
+                    self._breaker(block).record_failure(now)
+                    isolated.append(block)
+                else:
+                    raise result
+
+            parts = []
+            for block in isolated:
+                for part in block.split():
+                    if self._breaker(part).allow(now):
+                        parts.append(part)
                     else:
-                        log.warning(f"Unsupported data type '{data_type}' for parameter '{name}'.")
-                        continue
+                        quality[part.fields[0][0]] = QUALITY_OPEN
 
-                    # Process register reading
-                    final_value = raw_value * scale_factor
-                    readings[name] = round(final_value, 3) # Set precision to 3 decimal places
-            return readings
+            for part, result in zip(parts, self._read_blocks(parts) if parts else []):
+                index = part.fields[0][0]
+                if isinstance(result, Exception) and not self._is_register_fault(result):
+                    raise result
+                if isinstance(result, Exception):
+                    quality[index] = QUALITY_FAIL
+                    if self._breaker(part).record_failure(now):
+                        log.warning(f"Register circuit opened for parameter '{plan.params[index]}': {result}")
+                else:
+                    self._breaker(part).record_success()
+                    part.decode(result, values)
         except Exception as e:
             log.error(f"Modbus Error: {e}", exc_info=True)
+            self.last_quality = [QUALITY_FAIL] * len(values)
+            return None
+
+        self.last_quality = quality
+        if QUALITY_OK not in quality:
+            return None
+        return values
+
+    def read_values(self, plan):
+        """
+        Get meter readings for a compiled plan as a plan-ordered value list.
+        Makes a single attempt; failed registers are left as None and flagged in last_quality.
+
+        @plan: AcquisitionPlan to execute
+        @return: Plan-ordered value list or None
+        """
+        if not self.use_modbus and self.use_mock:
+            values = plan.values_from(self.meter_reading_mock(active_parameters=plan.params))
+            self.last_quality = [QUALITY_OK] * len(values)
+            return values
+        elif self.use_modbus:
+            return self._poll_plan(plan)
+        else:
+            log.error("Modbus Read Error: No Modbus port detected and is not in developer mode.")
             return None
 
     def get_meter_readings(self, active_parameters=None):
         """
         Get meter readings based on configuration settings.
+        Retries with jittered exponential backoff up to the maximum number of attempts.
         
         @active_parameters: List of specific parameters to read
         @return: Dictionary with meter readings or None
         """
-        if not self.use_modbus and self.use_mock:
-            return self.meter_reading_mock(active_parameters=active_parameters)
-        elif self.use_modbus:
-            retry_count = 0
-            while retry_count < config.MAX_RETRIES:
-                readings = self.meter_reading_modbus(active_parameters=active_parameters)
-                if readings:
-                    return readings
-                else:
-                    retry_count += 1
-                    log.warning(f"Modbus communication failed. Retrying: {retry_count}/{config.MAX_RETRIES}.")
-                    time.sleep(config.RETRY_INTERVAL)
+        plan = self.plan_for(active_parameters)
+        for attempt in range(config.MAX_RETRIES):
+            values = self.read_values(plan)
+            if values is not None:
+                return plan.as_dict(values)
+            if attempt + 1 < config.MAX_RETRIES:
+                delay = self.backoff.delay(attempt)
+                log.warning(f"Modbus communication failed. Retrying in {delay:.1f}s: {attempt + 1}/{config.MAX_RETRIES}.")
+                time.sleep(delay)
 
-            log.error(f"Modbus Read Error: Failed to get readings after {config.MAX_RETRIES} attempts.")
-            return None
-        else:
-            log.error("Modbus Read Error: No Modbus port detected and is not in developer mode.")
-            return None
\ No newline at end of file
+        log.error(f"Modbus Read Error: Failed to get readings after {config.MAX_RETRIES} attempts.")
+        return None
+
+def create_meter_reader(meter_model=None, register_map=None, slave_id=None):
+    """
+    Creates the reader backend selected by the meter profile transport.
+
+    @meter_model: The name of the meter model
+    @register_map: The register map for the meter model
+    @slave_id: Modbus slave address of the meter
+    @return: MeterReader or TcpMeterReader object
+    """
+    transport = {}
+    if meter_model:
+        transport = load_meter_config(meter_model, full_config=True).get("transport") or {}
+
+    if transport.get("type") in ("tcp", "rtu_over_tcp"):
+        from components.tcp_reader import TcpMeterReader
+        return TcpMeterReader(transport, use_modbus_flag=config.USE_MODBUS, register_map=register_map, slave_id=slave_id)
+    return MeterReader(use_modbus_flag=config.USE_MODBUS, register_map=register_map, slave_id=slave_id)
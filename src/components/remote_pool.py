@@ -0,0 +1,166 @@
+# src/components/remote_pool.py
+
+import time
+import logging
+import psycopg2
+import threading
+
+from config import config
+from contextlib import contextmanager
+from components.retry import Backoff
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# SERVICES
+
+class RemotePool:
+    """
+    Long-lived connections to one remote PostgreSQL target.
+    Connections are checked cheaply on checkout: a closed or mid-transaction connection is dropped
+    and one idle for longer than the validation interval must answer a SELECT 1. Failed connects
+    back off exponentially so an unreachable server is not hammered every cycle.
+    """
+    def __init__(self, db_config, size=config.SYNC_POOL_SIZE, validate_idle=config.SYNC_POOL_VALIDATE_IDLE,
+                 connect_timeout=config.SYNC_CONNECT_TIMEOUT):
+        self.db_config = dict(db_config)
+        self.size = max(1, size)
+        self.validate_idle = validate_idle
+        self.connect_timeout = connect_timeout
+        self.backoff = Backoff(cap=config.SYNC_RECONNECT_MAX)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._in_use = 0
+        self._failures = 0
+        self._retry_at = None
+        self._stats = {"connects": 0, "reuses": 0, "validations": 0, "discards": 0, "connectErrors": 0}
+
+    @property
+    def name(self):
+        return f"{self.db_config.get('host')}:{self.db_config.get('port')}/{self.db_config.get('database')}"
+
+    def _connect(self):
+        """
+        Opens a new connection unless the reconnect backoff is still running.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._retry_at is not None and now < self._retry_at:
+                raise ConnectionError(f"Remote database '{self.name}' is unreachable. Retrying in {self._retry_at - now:.0f} s.")
+        try:
+            connection = psycopg2.connect(connect_timeout=self.connect_timeout, **self.db_config)
+        except CONNECTION_ERRORS as e:
+            with self._lock:
+                delay = self.backoff.delay(self._failures)
+                self._stats["connectErrors"] += 1
+                self._retry_at = time.monotonic() + delay
+                self._failures += 1
+            log.warning(f"Remote Pool Error: Failed to connect to '{self.name}'. Retrying in {delay:.0f} s. Error: {e}")
+            raise
+        with self._lock:
+            self._stats["connects"] += 1
+            self._failures = 0
+            self._retry_at = None
+        return connection
+
+    def _is_usable(self, connection, idle_since):
+        """
+        Checks a pooled connection before it is handed out.
+        """
+        if connection.closed or connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - idle_since < self.validate_idle:
+            return True
+        with self._lock:
+            self._stats["validations"] += 1
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except CONNECTION_ERRORS:
+            return False
+
+    def _discard(self, connection):
+        with self._lock:
+            self._stats["discards"] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, idle_since = self._idle.pop()
+            if self._is_usable(connection, idle_since):
+                with self._lock:
+                    self._stats["reuses"] += 1
+                return connection
+            self._discard(connection)
+        return self._connect()
+
+    def _release(self, connection, broken):
+        if broken or connection.closed:
+            self._discard(connection)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._discard(connection)
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks out a connection for the duration of the block.
+        Connections that failed with a connection error are discarded instead of returned.
+
+        @return: Open psycopg2 connection
+        """
+        connection = self._acquire()
+        with self._lock:
+            self._in_use += 1
+        broken = False
+        try:
+            yield connection
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        except Exception:
+            try:
+                connection.rollback()
+            except CONNECTION_ERRORS:
+                broken = True
+            raise
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._release(connection, broken)
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def get_stats(self):
+        with self._lock:
+            retry_in = max(0.0, self._retry_at - time.monotonic()) if self._retry_at is not None else None
+            return {
+                **self._stats,
+                "idle": len(self._idle),
+                "inUse": self._in_use,
+                "retryInSeconds": round(retry_in, 1) if retry_in is not None else None,
+            }
@@ -0,0 +1,75 @@
+# src/components/retry.py
+
+import random
+
+from config import config
+
+# SERVICES
+
+class Backoff:
+    """
+    Jittered exponential backoff delays.
+    """
+    def __init__(self, base=config.RETRY_BACKOFF_BASE, cap=config.RETRY_INTERVAL, jitter=config.RETRY_JITTER):
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        """
+        Get the delay before a retry.
+
+        @attempt: Zero-based number of the retry
+        @return: Delay in seconds
+        """
+        ceiling = min(self.cap, self.base * (2 ** min(attempt, 32)))
+        return ceiling * (1 - self.jitter * random.random())
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures of a register block and opens after a threshold.
+    An open circuit is retried once its backoff delay has passed (half-open).
+    """
+    __slots__ = ("threshold", "backoff", "failures", "trips", "retry_at")
+
+    def __init__(self, threshold=config.CIRCUIT_FAILURE_THRESHOLD, backoff=None):
+        self.threshold = threshold
+        self.backoff = backoff or Backoff(cap=config.CIRCUIT_MAX_OPEN)
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = None
+
+    @property
+    def is_open(self):
+        return self.retry_at is not None
+
+    def allow(self, now):
+        """
+        Checks whether a read may be attempted.
+
+        @now: Current monotonic time
+        @return: Boolean flag indicating if the read is allowed
+        """
+        return self.retry_at is None or now >= self.retry_at
+
+    def record_success(self):
+        """
+        Closes the circuit after a successful read.
+        """
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = None
+
+    def record_failure(self, now):
+        """
+        Records a failed read and opens the circuit when the threshold is reached.
+
+        @now: Current monotonic time
+        @return: Boolean flag indicating if the circuit (re)opened
+        """
+        self.failures += 1
+        if self.failures < self.threshold:
+            return False
+        self.retry_at = now + self.backoff.delay(self.trips)
+        self.trips += 1
+        return True
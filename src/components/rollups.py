@@ -0,0 +1,300 @@
+# src/components/rollups.py
+
+import math
+import pandas as pd
+
+from config import config
+from components.database import READ_ENGINE
+from components.planner import sql_column_name
+from datetime import timedelta
+from sqlalchemy import text
+
+# GLOBAL VARIABLES
+
+RESOLUTIONS = tuple(sorted(config.ROLLUP_RESOLUTIONS))
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+UPSERT_SQL = (
+    "INSERT INTO rollups (tableName, resolution, bucket, parameter, count, minValue, maxValue, meanValue, "
+    "m2Value, firstValue, firstTime, lastValue, lastTime) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (tableName, resolution, bucket, parameter) DO UPDATE SET "
+    "count = count + excluded.count, "
+    "minValue = min(minValue, excluded.minValue), "
+    "maxValue = max(maxValue, excluded.maxValue), "
+    "meanValue = meanValue + (excluded.meanValue - meanValue) * excluded.count / (count + excluded.count), "
+    "m2Value = m2Value + excluded.m2Value + (excluded.meanValue - meanValue) * (excluded.meanValue - meanValue) "
+    "* count * excluded.count / (count + excluded.count), "
+    "firstValue = CASE WHEN excluded.firstTime < firstTime THEN excluded.firstValue ELSE firstValue END, "
+    "firstTime = min(firstTime, excluded.firstTime), "
+    "lastValue = CASE WHEN excluded.lastTime >= lastTime THEN excluded.lastValue ELSE lastValue END, "
+    "lastTime = max(lastTime, excluded.lastTime)"
+)
+
+# HELPERS
+
+def bucket_start(ts, resolution):
+    """
+    Get the start of the local-time bucket containing a timestamp.
+
+    @ts: Naive local datetime
+    @resolution: Bucket size in seconds, a divisor of one day
+    @return: Datetime of the bucket start
+    """
+    midnight = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    offset = int((ts - midnight).total_seconds()) // resolution * resolution
+    return midnight + timedelta(seconds=offset)
+
+def _bucket_end(ts, resolution):
+    start = bucket_start(ts, resolution)
+    return start if start == ts else start + timedelta(seconds=resolution)
+
+def _merge(stats, count, minimum, maximum, mean, m2, first, first_time, last, last_time):
+    """
+    Merges partial statistics into an accumulator list.
+    Mean and sum of squared deviations (M2) are combined with Chan's parallel formula, which stays
+    accurate for large values with a small spread where sum(x^2) - sum(x)^2 / n cancels out.
+    """
+    if not count:
+        return stats
+    if stats is None:
+        return [count, minimum, maximum, mean, m2, first, first_time, last, last_time]
+    total = stats[0] + count
+    delta = mean - stats[3]
+    stats[4] += m2 + delta * delta * stats[0] * count / total
+    stats[3] += delta * count / total
+    stats[0] = total
+    stats[1] = min(stats[1], minimum)
+    stats[2] = max(stats[2], maximum)
+    if first_time < stats[6]:
+        stats[5], stats[6] = first, first_time
+    if last_time >= stats[8]:
+        stats[7], stats[8] = last, last_time
+    return stats
+
+def _merge_partial(partials, key, value, ts):
+    stats = partials.get(key)
+    if stats is None:
+        partials[key] = [1, value, value, value, 0.0, value, ts, value, ts]
+    else:
+        _merge(stats, 1, value, value, value, 0.0, value, ts, value, ts)
+
+def _finalize(stats):
+    count, minimum, maximum, mean, m2, first, _, last, _ = stats
+    return {
+        "count": count,
+        "min": minimum,
+        "max": maximum,
+        "mean": mean,
+        "std": math.sqrt(m2 / (count - 1)) if count > 1 else float("nan"),
+        "first": first,
+        "last": last,
+    }
+
+# SERVICES
+
+class RollupBatch:
+    """
+    Accumulates the rollup deltas of a batch of samples before they are merged into the rollups table.
+    """
+    def __init__(self, table_name, descriptions):
+        self.table_name = table_name
+        self.descriptions = descriptions
+        self._partials = {}
+
+    def add(self, sample):
+        """
+        Adds a sample to the 1-minute, 15-minute and hourly partials of each parameter.
+
+        @sample: Sample object whose leading values follow the descriptions
+        """
+        ts = sample.ts.strftime(TIME_FORMAT)
+        buckets = [(res, bucket_start(sample.ts, res).strftime(TIME_FORMAT)) for res in RESOLUTIONS]
+        values = sample.raw if sample.raw is not None else sample.values
+        for description, value in zip(self.descriptions, values):
+            if value is None:
+                continue
+            for res, bucket in buckets:
+                _merge_partial(self._partials, (res, bucket, description), value, ts)
+
+    def rows(self):
+        """
+        Get the upsert parameters of the batch.
+
+        @return: List of tuples matching UPSERT_SQL
+        """
+        return [(self.table_name, res, bucket, description, *stats) for (res, bucket, description), stats in self._partials.items()]
+
+# FUNCTIONS
+
+def merge_rollups(connection, table_name, descriptions, samples):
+    """
+    Merges the rollups of ingested samples inside the caller's transaction.
+
+    @connection: Open SQLAlchemy connection with an active transaction
+    @table_name: Session table name
+    @descriptions: Register descriptions of the leading sample values
+    @samples: List of Sample objects
+    """
+    batch = RollupBatch(table_name, descriptions)
+    for sample in samples:
+        batch.add(sample)
+    rows = batch.rows()
+    if rows:
+        connection.exec_driver_sql(UPSERT_SQL, rows)
+
+def plan_segments(start, end, resolutions=RESOLUTIONS):
+    """
+    Splits a time range into the coarsest aligned rollup segments, with raw segments at the edges.
+
+    @start: Inclusive start datetime or None for unbounded
+    @end: Exclusive end datetime or None for unbounded
+    @resolutions: Ascending bucket sizes to use
+    @return: List of (resolution, start, end) tuples, resolution 0 meaning raw rows
+    """
+    if start is not None and end is not None and start >= end:
+        return []
+    if not resolutions:
+        return [(0, start, end)]
+
+    res = resolutions[-1]
+    inner_start = _bucket_end(start, res) if start is not None else None
+    inner_end = bucket_start(end, res) if end is not None else None
+    if inner_start is not None and inner_end is not None and inner_start >= inner_end:
+        return plan_segments(start, end, resolutions[:-1])
+
+    segments = []
+    if start is not None and start < inner_start:
+        segments += plan_segments(start, inner_start, resolutions[:-1])
+    segments.append((res, inner_start, inner_end))
+    if end is not None and inner_end < end:
+        segments += plan_segments(inner_end, end, resolutions[:-1])
+    return segments
+
+def _range_clause(column, start, end, params):
+    clause = ""
+    if start is not None:
+        clause += f" AND {column} >= :start"
+        params["start"] = start.strftime(TIME_FORMAT)
+    if end is not None:
+        clause += f" AND {column} < :end"
+        params["end"] = end.strftime(TIME_FORMAT)
+    return clause
+
+def _rollup_segment(connection, table_name, res, start, end):
+    """
+    Get partial statistics per parameter from one rollup resolution.
+    Buckets are merged one by one, as their means and M2 values cannot simply be summed.
+    """
+    params = {"table": table_name, "res": res}
+    where = "WHERE tableName = :table AND resolution = :res" + _range_clause("bucket", start, end, params)
+    rows = connection.execute(text(
+        f"SELECT parameter, count, minValue, maxValue, meanValue, m2Value, firstValue, firstTime, lastValue, lastTime "
+        f"FROM rollups {where} ORDER BY parameter, bucket"
+    ), params).all()
+
+    partials = {}
+    for row in rows:
+        partials[row[0]] = _merge(partials.get(row[0]), *row[1:])
+    return partials
+
+def _raw_segment(connection, table_name, descriptions, start, end, from_id=None, before_id=None):
+    """
+    Get partial statistics per parameter from the raw rows of an unaligned edge,
+    optionally limited to an id range.
+    """
+    columns = ", ".join(f'"{sql_column_name(d)}"' for d in descriptions)
+    params = {}
+    where = "WHERE 1 = 1" + _range_clause('"Timestamp"', start, end, params)
+    if from_id is not None:
+        where += " AND id >= :from_id"
+        params["from_id"] = from_id
+    if before_id is not None:
+        where += " AND id < :before_id"
+        params["before_id"] = before_id
+    rows = connection.execute(text(
+        f'SELECT "Timestamp", {columns} FROM "{table_name}" {where} ORDER BY "Timestamp"'
+    ), params).all()
+
+    partials = {}
+    for row in rows:
+        ts = str(row[0])
+        for description, value in zip(descriptions, row[1:]):
+            if value is not None:
+                _merge_partial(partials, description, value, ts)
+    return partials
+
+def _rollup_from_id(connection, table_name):
+    """
+    Get the id of the first row of a session covered by rollups.
+    Sessions logged before rollups existed only have rollups for the rows added since.
+    """
+    return connection.execute(
+        text("SELECT rollupFromId FROM sync_state WHERE tableName = :table"), {"table": table_name}
+    ).scalar() or 0
+
+def summarize(table_name, start=None, end=None):
+    """
+    Computes per-parameter statistics of a session from its rollups.
+    Aligned spans are read from the coarsest fitting rollup and unaligned edges from the raw table.
+    Rows logged before the session had rollups are read from the raw table.
+
+    @table_name: Session table name
+    @start: Optional inclusive start datetime
+    @end: Optional exclusive end datetime
+    @return: Dictionary mapping descriptions to count/min/max/mean/std/first/last, or None without rollups
+    """
+    with READ_ENGINE.connect() as connection:
+        descriptions = [row[0] for row in connection.execute(
+            text("SELECT DISTINCT parameter FROM rollups WHERE tableName = :table"), {"table": table_name}
+        )]
+        if not descriptions:
+            return None
+
+        stats = {}
+        from_id = _rollup_from_id(connection, table_name)
+        if from_id > 1:
+            partials = _raw_segment(connection, table_name, descriptions, start, end, before_id=from_id)
+            for description, partial in partials.items():
+                stats[description] = _merge(stats.get(description), *partial)
+        for res, seg_start, seg_end in plan_segments(start, end):
+            if res == 0:
+                partials = _raw_segment(connection, table_name, descriptions, seg_start, seg_end, from_id=from_id or None)
+            else:
+                partials = _rollup_segment(connection, table_name, res, seg_start, seg_end)
+            for description, partial in partials.items():
+                stats[description] = _merge(stats.get(description), *partial)
+    return {d: _finalize(stats[d]) for d in descriptions if d in stats}
+
+def series(table_name, start=None, end=None, max_points=config.ROLLUP_PLOT_POINTS):
+    """
+    Get per-bucket means of a session at the finest rollup resolution with at most max_points buckets.
+
+    @table_name: Session table name
+    @start: Optional inclusive start datetime
+    @end: Optional exclusive end datetime
+    @max_points: Maximum number of points per parameter
+    @return: DataFrame with Timestamp and one column per description, or None if raw rows should be used
+    """
+    with READ_ENGINE.connect() as connection:
+        if _rollup_from_id(connection, table_name) > 1:
+            return None
+        params = {"table": table_name, "res": RESOLUTIONS[0]}
+        where = "WHERE tableName = :table AND resolution = :res" + _range_clause("bucket", start, end, params)
+        samples, first_bucket, last_bucket = connection.execute(text(
+            f"SELECT max(total), min(first_bucket), max(last_bucket) FROM ("
+            f"SELECT sum(count) AS total, min(bucket) AS first_bucket, max(bucket) AS last_bucket "
+            f"FROM rollups {where} GROUP BY parameter)"
+        ), params).one()
+        if not samples or samples <= max_points:
+            return None
+
+        span = (pd.Timestamp(last_bucket) - pd.Timestamp(first_bucket)).total_seconds()
+        params["res"] = next((res for res in RESOLUTIONS if span / res <= max_points), RESOLUTIONS[-1])
+        rows = connection.execute(text(
+            f"SELECT bucket, parameter, meanValue FROM rollups {where} ORDER BY bucket"
+        ), params).all()
+
+    df = pd.DataFrame(rows, columns=["Timestamp", "parameter", "value"])
+    df = df.pivot(index="Timestamp", columns="parameter", values="value").reset_index()
+    df.columns.name = None
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    return df
@@ -5,11 +5,15 @@ import json
 
 from config import config
 from components.database import SessionLocal, Setting
+from components.planner import invalidate_plans
 from sqlalchemy.exc import SQLAlchemyError
 
 # GLOBAL VARIABLES
 
 log = logging.getLogger(__name__)
+PLAN_SETTINGS = {"ACTIVE_METER_MODEL", "ACTIVE_LOG_PARAMETERS"}
+JSON_SETTINGS = {"ACTIVE_LOG_PARAMETERS", "BUS_METERS"}
+BOOL_SETTINGS = {"LIVE_METRICS", "BURST_MODE"}
 
 # SERVICES
 
@@ -47,11 +51,11 @@ class Settings:
             for key, default_value in config.DEFAULT_SETTINGS.items():
                 expected_type = type(default_value)
                 value_str = temp_data.get(key)
-                if key == "LIVE_METRICS":
+                if key in BOOL_SETTINGS:
                     self.data[key] = value_str.lower() == "true" if value_str is not None else default_value
                     continue
 
-                if key == "ACTIVE_LOG_PARAMETERS":
+                if key in JSON_SETTINGS:
                     if value_str:
                         try:
                             self.data[key] = json.loads(value_str)
@@ -107,6 +111,8 @@ class Settings:
                     else:
                         db.merge(Setting(key=key, value=str(value)))
             db.commit()
+            if PLAN_SETTINGS.intersection(new_settings):
+                invalidate_plans()
             return True
         except SQLAlchemyError as e:
             log.error(f"DB Update Error: {e}", exc_info=True)
@@ -0,0 +1,602 @@
+# src/components/sinks.py
+
+import io
+import os
+import csv
+import math
+import time
+import logging
+import threading
+
+from config import config
+from components.database import INGEST_ENGINE, count_inserted_rows, sync_notifier
+from components.pipeline import Sink
+from components.retry import Backoff
+from components.rollups import merge_rollups
+from influxdb_client import InfluxDBClient, WritePrecision
+from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.rest import ApiException
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+
+# SERVICES
+
+class CsvSink(Sink):
+    """
+    Appends samples to the session CSV file through a long-lived handle.
+    Rows are batched in a user-space buffer and made durable according to the durability mode:
+    "row" fsyncs before every write returns, "group" fsyncs every N rows or T seconds and
+    "os" leaves write-back to the operating system.
+    """
+    name = "CSV"
+    DURABILITY_MODES = ("row", "group", "os")
+
+    def __init__(self, filename, header, durability=config.CSV_DURABILITY, fsync_rows=config.CSV_FSYNC_ROWS,
+                 fsync_interval=config.CSV_FSYNC_INTERVAL, flush_interval=config.CSV_FLUSH_INTERVAL):
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError(f"Unknown CSV durability mode '{durability}'. Expected one of {self.DURABILITY_MODES}.")
+        self.filename = str(filename)
+        self.header = header
+        self.durability = durability
+        self.fsync_rows = max(1, fsync_rows)
+        self.fsync_interval = fsync_interval
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._unsynced_rows = 0
+        self._last_flush = time.monotonic()
+        self._last_fsync = time.monotonic()
+        self._stats = {"flushes": 0, "fsyncs": 0, "reopens": 0}
+
+        with self._lock:
+            self._open()
+        log.info(f"CSV logging initialized to data log file '{self.filename}' ({durability} durability) successfully.")
+
+    # FILE HANDLE
+
+    def _repair_tail(self):
+        """
+        Truncates a torn last row left behind by a power loss so appended rows start on a new line.
+        """
+        with open(self.filename, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            start = max(0, size - config.CSV_BUFFER_SIZE)
+            f.seek(start)
+            tail = f.read()
+            cut = tail.rfind(b"\n")
+            length = start + cut + 1 if cut >= 0 else 0
+            f.truncate(length)
+            log.warning(f"Truncated {size - length} bytes of an incomplete row at the end of '{self.filename}'.")
+
+    def _open(self):
+        """
+        Opens the CSV file for appending and writes the header if the file is new or empty.
+        Must be called with the lock held.
+        """
+        if os.path.exists(self.filename):
+            self._repair_tail()
+        self._file = open(self.filename, 'a', newline='', buffering=config.CSV_BUFFER_SIZE)
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        if self._file.tell() == 0:
+            csv.writer(self._file).writerow(self.header)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _close(self):
+        """
+        Closes the file handle, dropping it if the close itself fails. Must be called with the lock held.
+        """
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError as e:
+            log.error(f"CSV Close Error: Failed to close '{self.filename}': {e}")
+        self._file = None
+
+    def _is_rotated(self):
+        """
+        Checks whether the file was moved or deleted underneath the open handle.
+        """
+        try:
+            return os.stat(self.filename).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    # BUFFERING
+
+    def _push(self):
+        """
+        Moves buffered rows into the file and fsyncs when the durability mode requires it.
+        Must be called with the lock held.
+        """
+        if self._file is None or self._is_rotated():
+            if self._file is not None:
+                log.warning(f"CSV file '{self.filename}' was rotated or removed. Reopening.")
+                self._stats["reopens"] += 1
+            self._close()
+            self._open()
+
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+            self._buffered_bytes = 0
+        self._file.flush()
+        self._last_flush = time.monotonic()
+        self._stats["flushes"] += 1
+
+        if self.durability == "row" or (self.durability == "group" and (
+            self._unsynced_rows >= self.fsync_rows or time.monotonic() - self._last_fsync >= self.fsync_interval
+        )):
+            self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced_rows = 0
+        self._last_fsync = time.monotonic()
+        self._stats["fsyncs"] += 1
+
+    def _push_due(self):
+        if self.durability == "row" or self._buffered_bytes >= config.CSV_BUFFER_SIZE:
+            return True
+        if self.durability == "group" and self._unsynced_rows >= self.fsync_rows:
+            return True
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    # SINK INTERFACE
+
+    def write(self, samples):
+        rows = io.StringIO()
+        csv.writer(rows).writerows([s.ts.strftime("%Y-%m-%d %H:%M:%S")] + s.values for s in samples)
+        chunk = rows.getvalue()
+
+        with self._lock:
+            self._buffer.append(chunk)
+            self._buffered_bytes += len(chunk)
+            if self.durability != "os":
+                # The OS mode never fsyncs, so there is nothing to count towards the next fsync
+                self._unsynced_rows += len(samples)
+            if not self._push_due():
+                return
+            try:
+                self._push()
+            except OSError:
+                # Hand this batch back to the worker; earlier buffered rows are kept and retried first
+                if self._buffer and self._buffer[-1] is chunk:
+                    self._buffer.pop()
+                    self._buffered_bytes -= len(chunk)
+                if self.durability != "os":
+                    self._unsynced_rows = max(0, self._unsynced_rows - len(samples))
+                self._close()
+                raise
+
+    def flush(self):
+        with self._lock:
+            if self._buffer or self._unsynced_rows:
+                self._push()
+
+    def reopen(self):
+        """
+        Flushes pending rows and reopens the file, e.g. after log rotation or session recovery.
+        """
+        with self._lock:
+            if self._file is not None and not self._is_rotated():
+                self._push()
+                self._sync()
+            self._close()
+            self._open()
+            self._stats["reopens"] += 1
+            if self._buffer:
+                self._push()
+        log.info(f"Reopened CSV data log file '{self.filename}'.")
+
+    def close(self):
+        with self._lock:
+            try:
+                self._push()
+                self._sync()
+            finally:
+                self._close()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "durability": self.durability,
+                "unsyncedRows": self._unsynced_rows,
+                **self._stats,
+            }
+
+class SQLiteSink(Sink):
+    """
+    Ingests samples into the session table through the shared ingest connection.
+    The INSERT is prepared once per session and buffered rows are committed in group transactions
+    by row count or time. The 1m/15m/1h rollups of the committed rows and the sync catalog entry are
+    updated in the same transaction.
+    """
+    name = "SQLite"
+    receives_suppressed = True # Rollups are built from the raw values of every sample
+
+    def __init__(self, table_name, sql_columns, rollup_columns=(), commit_rows=config.SQLITE_COMMIT_ROWS,
+                 commit_interval=config.SQLITE_COMMIT_INTERVAL):
+        self.table_name = table_name
+        self.rollup_columns = tuple(rollup_columns)
+        self.commit_rows = max(1, commit_rows)
+        self.commit_interval = commit_interval
+        columns = list(sql_columns) + ['"quality"', '"sync_status"']
+        placeholders = ", ".join("?" * len(columns))
+        self._insert_sql = f'INSERT INTO "{table_name}" ({", ".join(columns)}) VALUES ({placeholders})'
+        self._samples = []
+        self._first_buffered = None
+        self._commits = 0
+        self._committed_rows = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        self._latency_last = None
+        log.info(f"SQLite logging initialized to database table '{table_name}' successfully.")
+
+    def _commit(self):
+        """
+        Inserts all buffered rows and their rollups in one transaction and records the commit latency.
+        """
+        started = time.monotonic()
+        rows = [(s.ts.isoformat(" "), *s.values, s.quality, 'pending') for s in self._samples if not s.suppressed]
+
+        # The ingest connection is only held for the transaction, so other sessions queue behind one commit
+        with INGEST_ENGINE.begin() as connection:
+            if rows:
+                connection.exec_driver_sql(self._insert_sql, rows)
+                count_inserted_rows(connection, self.table_name)
+            if self.rollup_columns:
+                merge_rollups(connection, self.table_name, self.rollup_columns, self._samples)
+        if rows:
+            sync_notifier.notify()
+
+        latency = time.monotonic() - started
+        self._commits += 1
+        self._committed_rows += len(rows)
+        self._latency_sum += latency
+        self._latency_max = max(self._latency_max, latency)
+        self._latency_last = latency
+        self._samples = []
+        self._first_buffered = None
+
+    def write(self, samples):
+        if not samples:
+            return
+        if self._first_buffered is None:
+            self._first_buffered = time.monotonic()
+        self._samples.extend(samples)
+        if len(self._samples) < self.commit_rows and time.monotonic() - self._first_buffered < self.commit_interval:
+            return
+        try:
+            self._commit()
+        except Exception:
+            # Hand this batch back to the worker; earlier buffered rows are kept and retried first
+            del self._samples[-len(samples):]
+            if not self._samples:
+                self._first_buffered = None
+            raise
+
+    def flush(self):
+        if self._samples:
+            self._commit()
+
+    def close(self):
+        self.flush()
+
+    def get_stats(self):
+        return {
+            "pendingRows": len(self._samples),
+            "commits": self._commits,
+            "rowsPerCommit": round(self._committed_rows / self._commits, 1) if self._commits else None,
+            "commitLastMs": round(self._latency_last * 1000, 3) if self._latency_last is not None else None,
+            "commitMeanMs": round(self._latency_sum / self._commits * 1000, 3) if self._commits else None,
+            "commitMaxMs": round(self._latency_max * 1000, 3),
+        }
+
+class InfluxSpool:
+    """
+    Bounded on-disk queue of line protocol shared by all InfluxDB sinks.
+    Lines are appended while the server is unreachable and taken back in bulk for replay.
+    """
+    def __init__(self, path, max_bytes=config.INFLUXDB_SPOOL_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._replaying = False
+        self.dropped = 0
+
+    @property
+    def _replay_path(self):
+        return f"{self.path}.replay"
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, lines):
+        """
+        Appends lines to the spool unless it is full.
+
+        @lines: List of line protocol strings
+        @return: Number of lines spooled
+        """
+        data = "".join(line + "\n" for line in lines)
+        with self._lock:
+            if self.size() + len(data) > self.max_bytes:
+                self.dropped += len(lines)
+                log.warning(f"InfluxDB spool is full. Dropped {len(lines)} lines.")
+                return 0
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+        return len(lines)
+
+    def take(self):
+        """
+        Takes over the spooled lines for replay. Only one sink replays at a time.
+
+        @return: List of line protocol strings or None if there is nothing to replay
+        """
+        with self._lock:
+            if self._replaying:
+                return None
+            if not os.path.exists(self._replay_path):
+                if self.size() == 0:
+                    return None
+                os.replace(self.path, self._replay_path)
+            with open(self._replay_path, 'r', encoding='utf-8') as f:
+                lines = [line.rstrip("\n") for line in f if line.strip()]
+            self._replaying = True
+            return lines
+
+    def release(self, remaining):
+        """
+        Ends a replay and puts unsent lines back in front of the spool.
+
+        @remaining: List of line protocol strings that were not sent
+        """
+        with self._lock:
+            if remaining:
+                existing = ""
+                if os.path.exists(self.path):
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        existing = f.read()
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write("".join(line + "\n" for line in remaining) + existing)
+                os.replace(tmp_path, self.path)
+            if os.path.exists(self._replay_path):
+                os.remove(self._replay_path)
+            self._replaying = False
+
+class InfluxSink(Sink):
+    """
+    Writes samples to InfluxDB as batched line protocol, flushed by size or time.
+    While the server is unreachable, batches go to the shared on-disk spool and are
+    replayed in bulk once a write succeeds again. Batches the server rejects as invalid
+    are logged and dropped, since sending them again would fail the same way.
+    """
+    name = "InfluxDB"
+    MEASUREMENT = "meter_measurements"
+
+    def __init__(self, client, params, batch_size=config.INFLUXDB_BATCH_SIZE,
+                 flush_interval=config.INFLUXDB_FLUSH_INTERVAL, spool=None, online=True):
+        self.client = client
+        self.params = params
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.spool = spool or influx_spool
+        self.write_api = client.write_api(write_options=SYNCHRONOUS, timeout=config.INFLUXDB_TIMEOUT)
+        self._field_keys = [escape_line_protocol(param) for param in params]
+        self._lines = []
+        self._first_buffered = None
+        self._online = online
+        self._failures = 0
+        self._retry_at = 0.0
+        self._backoff = Backoff(cap=config.SINK_RETRY_DELAY)
+        self._last_latency = None
+        self._stats = {"linesSent": 0, "requests": 0, "linesSpooled": 0, "linesReplayed": 0, "linesRejected": 0}
+
+    @classmethod
+    def connect(cls, params):
+        """
+        Initializes and tests the InfluxDB client connection.
+        An unreachable server still yields a sink that spools until the server is back.
+
+        @params: Plan-ordered parameter names used as field keys
+        @return: InfluxSink object or None if InfluxDB is not configured
+        """
+        if not (config.INFLUXDB_URL and config.INFLUXDB_TOKEN):
+            log.info("InfluxDB config not provided. Continuing with CSV logging only.")
+            return None
+
+        try:
+            client = InfluxDBClient(
+                url=config.INFLUXDB_URL,
+                token=config.INFLUXDB_TOKEN,
+                org=config.INFLUXDB_ORG,
+                timeout=config.INFLUXDB_TIMEOUT
+            )
+        except Exception as e:
+            log.error(f"InfluxDB Connection Error: {e}", exc_info=True)
+            log.warning("Could not create the InfluxDB client. Continuing with CSV logging only.")
+            return None
+
+        online = False
+        try:
+            # Verify connection with ping
+            online = client.ping()
+        except Exception as e:
+            log.error(f"InfluxDB Connection Error: {e}")
+        if online:
+            log.info(f"InfluxDB ping successful and is online.")
+        else:
+            log.warning("InfluxDB ping failed. Points will be spooled to disk until the server is reachable.")
+        return cls(client, params, online=online)
+
+    def _encode(self, sample):
+        """
+        Encodes a sample as one line of InfluxDB line protocol with second precision.
+        NaN and infinite readings are left out, as line protocol cannot represent them.
+        """
+        fields = ",".join(
+            f"{key}={float(value)!r}" for key, value in zip(self._field_keys, sample.values)
+            if value is not None and math.isfinite(value)
+        )
+        if not fields:
+            return None
+        return (
+            f"{self.MEASUREMENT},source=wago_meter,quality={escape_line_protocol(sample.quality)} "
+            f"{fields} {int(sample.ts.timestamp())}"
+        )
+
+    def _send(self, lines):
+        started = time.monotonic()
+        self.write_api.write(
+            bucket=config.INFLUXDB_BUCKET,
+            record="\n".join(lines),
+            write_precision=WritePrecision.S
+        )
+        self._last_latency = time.monotonic() - started
+        self._stats["requests"] += 1
+        self._stats["linesSent"] += len(lines)
+
+    def _reject(self, lines, error):
+        """
+        Drops lines the server refused with a client error.
+        """
+        self._stats["linesRejected"] += len(lines)
+        log.error(f"InfluxDB rejected {len(lines)} points: {error}. Dropped them.")
+
+    def _mark_offline(self, error):
+        self._failures += 1
+        self._retry_at = time.monotonic() + self._backoff.delay(self._failures - 1)
+        if self._online:
+            log.warning(f"InfluxDB write failed: {error}. Spooling points to disk.")
+        self._online = False
+
+    def _mark_online(self):
+        if not self._online:
+            log.info("InfluxDB is reachable again.")
+        self._online = True
+        self._failures = 0
+
+    def _replay(self):
+        """
+        Sends spooled lines back to InfluxDB in bulk requests.
+        """
+        lines = self.spool.take()
+        if lines is None:
+            return
+        done = replayed = 0
+        try:
+            for i in range(0, len(lines), config.INFLUXDB_REPLAY_BATCH):
+                chunk = lines[i:i + config.INFLUXDB_REPLAY_BATCH]
+                try:
+                    self._send(chunk)
+                    replayed += len(chunk)
+                except Exception as e:
+                    if not is_rejection(e):
+                        raise
+                    self._reject(chunk, e)
+                done += len(chunk)
+        except Exception as e:
+            self._mark_offline(e)
+        finally:
+            self._stats["linesReplayed"] += replayed
+            self.spool.release(lines[done:])
+        if replayed:
+            log.info(f"Replayed {replayed} spooled points into InfluxDB.")
+
+    def _flush_lines(self):
+        """
+        Sends the buffered lines, or spools them while the server is unreachable.
+        """
+        lines, self._lines, self._first_buffered = self._lines, [], None
+        if not self._online and time.monotonic() < self._retry_at:
+            self._stats["linesSpooled"] += self.spool.append(lines)
+            return
+        try:
+            self._send(lines)
+        except Exception as e:
+            if not is_rejection(e):
+                self._mark_offline(e)
+                self._stats["linesSpooled"] += self.spool.append(lines)
+                return
+            self._reject(lines, e)
+        self._mark_online()
+        self._replay()
+
+    def write(self, samples):
+        for s in samples:
+            line = self._encode(s)
+            if line:
+                self._lines.append(line)
+        if not self._lines:
+            return
+        if self._first_buffered is None:
+            self._first_buffered = time.monotonic()
+        if len(self._lines) >= self.batch_size or time.monotonic() - self._first_buffered >= self.flush_interval:
+            self._flush_lines()
+
+    def flush(self):
+        if self._lines:
+            self._flush_lines()
+        elif self.spool.size() and (self._online or time.monotonic() >= self._retry_at):
+            self._replay()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.client.close()
+            log.info("InfluxDB connection closed.")
+
+    def get_stats(self):
+        return {
+            "online": self._online,
+            "bufferedLines": len(self._lines),
+            "spoolBytes": self.spool.size(),
+            "spoolDropped": self.spool.dropped,
+            "lastRequestMs": round(self._last_latency * 1000, 3) if self._last_latency is not None else None,
+            **self._stats,
+        }
+
+# FUNCTIONS
+
+def is_rejection(error):
+    """
+    Checks whether a write failed because the server refused the data rather than being unavailable.
+    Client errors other than rate limiting are permanent; timeouts, connection errors and 5xx are not.
+
+    @error: Exception raised by the write
+    @return: Boolean flag indicating a permanent rejection
+    """
+    status = getattr(error, "status", None) if isinstance(error, ApiException) else None
+    return status is not None and 400 <= status < 500 and status != 429
+
+def escape_line_protocol(value):
+    """
+    Escapes a measurement tag or field key for InfluxDB line protocol.
+
+    @value: Tag value or key
+    @return: Escaped string
+    """
+    return str(value).replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+# GLOBAL INSTANCE
+
+influx_spool = InfluxSpool(config.DS_DIR / "spool" / "influxdb.lp")
@@ -0,0 +1,337 @@
+# src/components/tcp_reader.py
+
+import time
+import struct
+import asyncio
+import logging
+import threading
+
+from config import config
+from components.reader import MeterReader
+
+# GLOBAL VARIABLES
+
+log = logging.getLogger(__name__)
+MBAP_HEADER = struct.Struct(">HHHB")
+READ_PDU = struct.Struct(">BHH")
+READ_REQUEST = struct.Struct(">BBHH")
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+# HELPERS
+
+class ModbusResponseError(IOError):
+    """
+    Raised when a gateway answers with a Modbus exception or a malformed response.
+    """
+
+def crc16(frame):
+    """
+    Computes the Modbus RTU CRC16 of a frame.
+
+    @frame: Bytes to checksum
+    @return: CRC as little-endian bytes
+    """
+    crc = 0xFFFF
+    for byte in frame:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return struct.pack("<H", crc)
+
+def parse_read_response(functioncode, pdu, count):
+    """
+    Parses a read holding/input registers response PDU.
+
+    @functioncode: Function code of the request
+    @pdu: Response PDU starting at the function code
+    @count: Number of registers requested
+    @return: List of 16-bit register values
+    """
+    if pdu[0] == functioncode | 0x80:
+        raise ModbusResponseError(f"Modbus exception code {pdu[1]} for function code {functioncode}.")
+    if pdu[0] != functioncode or pdu[1] != count * 2:
+        raise ModbusResponseError(f"Malformed Modbus response for function code {functioncode}.")
+    return list(struct.unpack(f">{count}H", pdu[2:2 + count * 2]))
+
+# SERVICES
+
+class AsyncLoopThread:
+    """
+    Runs a shared asyncio event loop in a background thread for blocking callers.
+    """
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="modbus-tcp-loop", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro, timeout=None):
+        """
+        Runs a coroutine on the shared loop and waits for its result.
+
+        @coro: Coroutine to run
+        @timeout: Maximum time to wait in seconds
+        @return: Result of the coroutine
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+class ModbusTcpGateway:
+    """
+    Asyncio client for a Modbus TCP or RTU-over-TCP gateway.
+    Modbus TCP requests are pipelined by transaction ID up to a bounded number in flight.
+    """
+    def __init__(self, host, port, framing="tcp", max_inflight=4, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.framing = framing
+        self.timeout = timeout
+
+        # RTU frames carry no transaction ID, so only one request can be in flight
+        self.max_inflight = max_inflight if framing == "tcp" else 1
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        self._connect_lock = asyncio.Lock()
+        self._reader = None
+        self._writer = None
+        self._listener = None
+        self._pending = {}
+        self._next_tid = 0
+        self._stats = {"requests": 0, "failures": 0, "timeouts": 0, "latencySeconds": 0.0, "connects": 0}
+
+    async def _ensure_connected(self):
+        """
+        Opens the gateway connection if it is not already open.
+        """
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout=self.timeout
+            )
+            self._stats["connects"] += 1
+            if self.framing == "tcp":
+                self._listener = asyncio.create_task(self._listen(self._reader))
+            log.info(f"Connected to Modbus gateway at '{self.host}:{self.port}' ({self.framing}).")
+
+    async def _close(self, error=None):
+        """
+        Closes the gateway connection and fails all outstanding requests.
+        """
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error or ConnectionError("Gateway connection closed."))
+        self._pending.clear()
+
+    async def _listen(self, reader):
+        """
+        Dispatches Modbus TCP responses to their pending requests by transaction ID.
+        """
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                tid, _, length, _ = MBAP_HEADER.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                future = self._pending.pop(tid, None)
+                if future is not None and not future.done():
+                    future.set_result(pdu)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            if reader is self._reader:
+                await self._close(ConnectionError(f"Gateway connection lost: {e}"))
+
+    async def _transact_tcp(self, unit_id, functioncode, start, count):
+        tid = self._next_tid = (self._next_tid + 1) & 0xFFFF
+        future = asyncio.get_running_loop().create_future()
+        self._pending[tid] = future
+        pdu = READ_PDU.pack(functioncode, start, count)
+        self._writer.write(MBAP_HEADER.pack(tid, 0, len(pdu) + 1, unit_id) + pdu)
+        try:
+            await self._writer.drain()
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        finally:
+            self._pending.pop(tid, None)
+
+    async def _transact_rtu(self, unit_id, functioncode, start, count):
+        frame = READ_REQUEST.pack(unit_id, functioncode, start, count)
+        self._writer.write(frame + crc16(frame))
+        await self._writer.drain()
+
+        async def receive():
+            header = await self._reader.readexactly(3)
+            length = 2 if header[1] & 0x80 else header[2] + 2
+            body = await self._reader.readexactly(length)
+            response = header + body
+            if crc16(response[:-2]) != response[-2:]:
+                raise ModbusResponseError("CRC mismatch in RTU-over-TCP response.")
+            return response[1:-2]
+
+        try:
+            return await asyncio.wait_for(receive(), timeout=self.timeout)
+        except Exception:
+            await self._close() # Resynchronize the byte stream on the next request
+            raise
+
+    async def read_registers(self, unit_id, functioncode, start, count, abort=None):
+        """
+        Reads a block of holding or input registers.
+
+        @unit_id: Modbus unit identifier of the meter behind the gateway
+        @functioncode: Modbus function code (3 or 4)
+        @start: Starting register address
+        @count: Number of registers to read
+        @abort: Optional asyncio.Event that cancels the read if set while it waits for a slot
+        @return: List of 16-bit register values
+        """
+        async with self._semaphore:
+            if abort is not None and abort.is_set():
+                raise asyncio.CancelledError()
+            started = time.monotonic()
+            self._stats["requests"] += 1
+            try:
+                await self._ensure_connected()
+                if self.framing == "tcp":
+                    pdu = await self._transact_tcp(unit_id, functioncode, start, count)
+                else:
+                    pdu = await self._transact_rtu(unit_id, functioncode, start, count)
+                return parse_read_response(functioncode, pdu, count)
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                self._stats["failures"] += 1
+                raise TimeoutError(f"Modbus gateway '{self.host}:{self.port}' timed out after {self.timeout}s.")
+            except Exception:
+                self._stats["failures"] += 1
+                raise
+            finally:
+                self._stats["latencySeconds"] += time.monotonic() - started
+
+    def get_stats(self):
+        """
+        Get request statistics of the gateway.
+
+        @return: Dictionary with gateway statistics
+        """
+        stats = dict(self._stats)
+        latency = stats.pop("latencySeconds")
+        stats["avgLatencySeconds"] = round(latency / stats["requests"], 4) if stats["requests"] else None
+        stats["maxInflight"] = self.max_inflight
+        return stats
+
+class TcpMeterReader(MeterReader):
+    """
+    Reads a power meter through a Modbus TCP or RTU-over-TCP gateway.
+    Keeps the MeterReader contract while running requests on the shared asyncio loop.
+    """
+    def __init__(self, transport, use_modbus_flag=config.USE_MODBUS, register_map=None, slave_id=None):
+        self.transport = transport
+        super().__init__(use_modbus_flag=use_modbus_flag, register_map=register_map, slave_id=slave_id)
+
+    def _connect(self):
+        """
+        Resolves the shared gateway client for the configured transport.
+        """
+        self.unit_id = self.transport.get("unit_id", self.slave_id)
+        self.gateway = get_gateway(self.transport)
+        log.info(f"Modbus TCP reader initialized for unit ID {self.unit_id} via '{self.gateway.host}:{self.gateway.port}'.")
+
+    async def _gather_blocks(self, blocks):
+        """
+        Runs the block reads concurrently and cancels the outstanding ones at the first link error,
+        so requests queued behind the in-flight limit do not each wait out the timeout.
+        The failing read flags the error itself, as the slot it frees is handed to the next
+        queued read before the outstanding reads can be cancelled.
+        """
+        abort = asyncio.Event()
+
+        async def read(block):
+            try:
+                return await self.gateway.read_registers(
+                    self.unit_id, block.functioncode, block.start, block.count, abort=abort
+                )
+            except Exception as e:
+                if not self._is_register_fault(e):
+                    abort.set()
+                raise
+
+        tasks = [asyncio.ensure_future(read(block)) for block in blocks]
+        link_error = None
+        pending = set(tasks)
+        while pending and link_error is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            errors = [t.exception() for t in done if t.exception() is not None]
+            link_error = next((e for e in errors if not self._is_register_fault(e)), None)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        return [
+            link_error if task.cancelled() else (task.exception() or task.result())
+            for task in tasks
+        ]
+
+    def _read_blocks(self, blocks):
+        """
+        Reads the registers of several blocks concurrently over the gateway.
+
+        @blocks: List of ReadBlock objects
+        @return: List with the registers or the raised exception per block
+        """
+        return tcp_loop.run(self._gather_blocks(blocks), timeout=self.gateway.timeout * (len(blocks) + 1))
+
+    def _is_register_fault(self, error):
+        """
+        Checks whether a read error came from the meter rejecting the registers rather than the link.
+
+        @error: Exception raised by the read
+        """
+        return isinstance(error, ModbusResponseError)
+
+# FUNCTIONS
+
+def get_gateway(transport):
+    """
+    Gets the shared gateway client for a meter profile transport, creating it on first use.
+
+    @transport: Transport object from the meter profile
+    @return: ModbusTcpGateway object
+    """
+    host = transport.get("host")
+    if not host:
+        raise ValueError("Modbus TCP transport requires a 'host'.")
+    port = int(transport.get("port", 502))
+    framing = "rtu" if transport.get("type") == "rtu_over_tcp" else "tcp"
+    key = (host, port, framing)
+    with _gateways_lock:
+        gateway = _gateways.get(key)
+        if gateway is None:
+            gateway = ModbusTcpGateway(
+                host,
+                port,
+                framing=framing,
+                max_inflight=int(transport.get("max_inflight", config.MODBUS_TCP_MAX_INFLIGHT)),
+                timeout=float(transport.get("timeout", config.MODBUS_TCP_TIMEOUT)),
+            )
+            _gateways[key] = gateway
+        return gateway
+
+def get_gateway_stats():
+    """
+    Get request statistics of all gateways.
+
+    @return: Dictionary keyed by 'host:port'
+    """
+    with _gateways_lock:
+        return {f"{host}:{port}": gateway.get_stats() for (host, port, _), gateway in _gateways.items()}
+
+# GLOBAL INSTANCE
+
+tcp_loop = AsyncLoopThread()
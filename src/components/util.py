@@ -56,7 +56,12 @@ def list_files(file="type"):
         return []
 
     try:
-        files = [f for f in os.listdir(directory) if f.endswith(extension)]
+        entries = os.listdir(directory)
+        files = [f for f in entries if f.endswith(extension)]
+        if file == "ds":
+            # Sessions kept only in the binary format are listed under the CSV name they export to
+            exported = {f"{os.path.splitext(f)[0]}{extension}" for f in entries if f.endswith(".gts")}
+            files += sorted(exported - set(files))
         return sorted(files)
     except Exception as e:
         log.error(f"File Listing Error: {e}", exc_info=True)
\ No newline at end of file
@@ -10,6 +10,10 @@ load_dotenv()
 # MODBUS SETTINGS
 
 MODBUS_PORT = "/dev/serial0"
+MODBUS_MAX_BLOCK_REGISTERS = 125 # Modbus limit per read request
+MODBUS_MAX_BLOCK_GAP = 0 # Unmapped registers allowed inside a block
+MODBUS_TCP_MAX_INFLIGHT = 4 # Pipelined requests per gateway
+MODBUS_TCP_TIMEOUT = 2 # Per-request timeout in seconds
 DEFAULT_SETTINGS = {
     "CUSTOMER_ID": "",
     "ACTIVE_METER_MODEL": "wago_879",
@@ -22,6 +26,9 @@ DEFAULT_SETTINGS = {
     "TIMEOUT": 2,
     "ACTIVE_LOG_PARAMETERS": None,
     "LIVE_METRICS": False,
+    "BURST_MODE": False, # Poll as fast as the bus allows and persist aggregates per LOG_INTERVAL
+    "BURST_INTERVAL": 0.0, # Minimum seconds between burst polls; 0 polls back-to-back
+    "BUS_METERS": None, # Additional meters on the bus: [{"slave_id", "meter_model", "log_interval", "parameters"}]
 }
 
 # FILE SETTINGS
@@ -40,9 +47,84 @@ DB_FILE = DS_DIR / "database.sqlite"
 
 USE_MODBUS = True
 DEVELOPER_MODE = False
-RETRY_INTERVAL = 60
+RETRY_INTERVAL = 60 # Maximum backoff delay between retries
+RETRY_BACKOFF_BASE = 1
+RETRY_JITTER = 0.5
 MAX_RETRIES = 10
+CIRCUIT_FAILURE_THRESHOLD = 3 # Consecutive failures before a register block is skipped
+CIRCUIT_MAX_OPEN = 900
 MAX_METER_VALUE = 1000000
+BURST_RING_SIZE = 16384 # Raw samples held in memory per burst mode session
+HISTORY_HOURS = 6 # Recent readings kept in memory for the dashboard
+HISTORY_MAX_SAMPLES = 21600
+COMPRESSION_MAX_INTERVAL = 900 # Default maximum seconds between stored points of a compressed parameter
+
+# SINK PIPELINE SETTINGS
+
+SINK_QUEUE_SIZE = 1000 # Samples buffered per sink
+SINK_BATCH_SIZE = 100
+SINK_FLUSH_INTERVAL = 5
+SINK_RETRY_DELAY = 30
+SINK_STOP_TIMEOUT = 10
+SINK_SPILL_MAX_BYTES = 50 * 1024 * 1024
+SINK_SPILL_BUFFER = 10000 # Samples held for the worker to spill while a sink write is in progress
+SINK_POLICIES = { # "block", "drop_oldest" or "spill"
+    "csv": "spill",
+    "sqlite": "spill",
+    "influxdb": "drop_oldest",
+    "parquet": "drop_oldest",
+    "gorilla": "spill",
+}
+
+# CSV SETTINGS
+
+CSV_DURABILITY = "group" # "row", "group" or "os"
+CSV_FSYNC_ROWS = 900 # Group mode fsyncs after this many rows...
+CSV_FSYNC_INTERVAL = 900 # ...or this many seconds, whichever comes first
+CSV_FLUSH_INTERVAL = 5 # Seconds rows may sit in the user-space buffer
+CSV_BUFFER_SIZE = 64 * 1024
+CSV_ENABLED = True # With GORILLA_ENABLED, False keeps only the binary file and exports CSV on download
+
+# SQLITE SETTINGS
+
+SQLITE_PRAGMAS = { # Applied to every new database connection
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -8000, # Negative values are KiB
+    "wal_autocheckpoint": 1000,
+    "busy_timeout": 5000, # Milliseconds SQLite retries a locked database before failing
+}
+SQLITE_WRITE_TIMEOUT = 30 # Seconds a commit waits for a pooled write connection
+SQLITE_READ_POOL_SIZE = 4 # Read-only connections for analysis, sync reads and the web layer
+SQLITE_READ_TIMEOUT = 30
+SQLITE_COMMIT_ROWS = 60 # Group commit after this many rows...
+SQLITE_COMMIT_INTERVAL = 10 # ...or this many seconds, whichever comes first
+ROLLUP_RESOLUTIONS = (60, 900, 3600) # Rollup bucket sizes in seconds, maintained at ingest
+ROLLUP_PLOT_POINTS = 2000 # Plots switch to rollup means above this many raw rows
+
+# PARQUET SETTINGS
+
+PARQUET_ENABLED = False # Optional columnar session copy, requires pyarrow
+PARQUET_DIR = DS_DIR / "parquet"
+PARQUET_ROW_GROUP_SIZE = 900 # Rows per row group...
+PARQUET_ROW_GROUP_INTERVAL = 3600 # ...or seconds, whichever comes first
+PARQUET_ROW_GROUPS_PER_FILE = 24
+PARQUET_COMPRESSION = "zstd"
+
+# GORILLA SETTINGS
+
+GORILLA_ENABLED = False # Compact binary session file (.gts) next to the CSV
+GORILLA_CHUNK_ROWS = 3600 # Rows per compressed chunk...
+GORILLA_CHUNK_INTERVAL = 900 # ...or seconds before a partial chunk is written
+
+# LIVE STREAM SETTINGS
+
+SSE_QUEUE_SIZE = 100 # Event frames buffered per client
+SSE_KEEPALIVE = 15
+SSE_STATUS_INTERVAL = 3 # Seconds between status events while clients are connected
+SSE_SAMPLE_MIN_INTERVAL = 0.5 # Limits sample events in burst mode
+SSE_MAX_DURATION = 600 # Seconds before a stream is closed and the client reconnects
 
 # INFLUXDB SETTINGS
 
@@ -51,9 +133,31 @@ INFLUXDB_TOKEN = os.getenv("INFLUXDB_TOKEN")
 INFLUXDB_ORG = "energy-logger"
 INFLUXDB_BUCKET = "energy-logger"
 INFLUXDB_TIMEOUT = 30
+INFLUXDB_BATCH_SIZE = 100 # Lines per write request...
+INFLUXDB_FLUSH_INTERVAL = 10 # ...or seconds before buffered lines are sent
+INFLUXDB_REPLAY_BATCH = 5000 # Spooled lines per replay request
+INFLUXDB_SPOOL_MAX_BYTES = 20 * 1024 * 1024
+
+# CONNECTIVITY SETTINGS
+
+CONNECTIVITY_INTERVAL = 15 # Seconds between probes of the remote targets
+CONNECTIVITY_TIMEOUT = 3
+CONNECTIVITY_UP_AFTER = 2 # Consecutive successful probes before a target is reachable again...
+CONNECTIVITY_DOWN_AFTER = 2 # ...and failed probes before it is unreachable
+CONNECTIVITY_FALLBACK = ("8.8.8.8", 53) # Probed when no remote target is configured
 
 # REMOTE SYNC SETTINGS
 
 REMOTE_DB_ENABLED = True
-SYNC_INTERVAL = 30
-SYNC_BATCH_SIZE = 100
\ No newline at end of file
+SYNC_INTERVAL = 300 # Fallback poll; the logger wakes the syncer when it commits rows
+SYNC_DEBOUNCE = 1 # Seconds to coalesce commit notifications into one sync cycle
+SYNC_BATCH_SIZE = 100 # First batch size before the link is measured
+SYNC_BATCH_MIN = 50
+SYNC_BATCH_MAX = 5000
+SYNC_BATCH_SECONDS = 2 # Batches are sized to take about this long on the measured link
+SYNC_WORKERS = 2 # Session tables synced concurrently
+SYNC_PAGE_SIZE = 1000 # Rows per multi-row INSERT statement
+SYNC_POOL_SIZE = 2 # Idle connections kept per remote database
+SYNC_POOL_VALIDATE_IDLE = 60 # Seconds a pooled connection may idle before it is checked with SELECT 1
+SYNC_CONNECT_TIMEOUT = 5
+SYNC_RECONNECT_MAX = 300 # Upper bound of the reconnect backoff in seconds
\ No newline at end of file
@@ -31,6 +31,7 @@ def load_meter_config(model_name: str, full_config=False):
             return config_data["registers"]
         else:
             config_data.pop("remote_database", None)
+            config_data.pop("transport", None)
             return config_data
     except FileNotFoundError:
         log.error(f"Load Meter Error: Configuration file not found at '{file_path}'.")
@@ -0,0 +1,13 @@
+# src/gunicorn.conf.py
+
+# NOTE: Gunicorn loads this file from the working directory (src). The logger, scheduler and syncer
+#       run inside the web process, so there must be exactly one worker. Its threads serve requests
+#       and the long-lived /api/stream responses, and a gthread worker keeps reporting to the arbiter
+#       while a stream is open, so the timeout does not kill it.
+
+bind = "0.0.0.0:80"
+workers = 1
+worker_class = "gthread"
+threads = 16 # Concurrent requests, each open dashboard holds one for its event stream
+timeout = 120
+graceful_timeout = 30
@@ -7,7 +7,11 @@ import pandas as pd
 
 from components.settings import settings
 from components.analyzer import DataAnalyzer
-from components.database import ENGINE
+from components.database import READ_ENGINE, ReadSessionLocal, LoggerState, get_sync_watermark
+from components.columnar import read_session, session_columns
+from components import rollups
+from components.compression import compression_methods, reconstruct
+from components.gorilla import GorillaReader, gorilla_path
 from config.loader import load_meter_config
 from io import StringIO
 from datetime import datetime, timedelta
@@ -71,12 +75,149 @@ class AnalyzerService:
             query += " WHERE " + " AND ".join(conditions)
 
         try:
-            df = pd.read_sql(query, ENGINE, params=params, parse_dates=['Timestamp'])
+            df = pd.read_sql(query, READ_ENGINE, params=params, parse_dates=['Timestamp'])
+            if "sync_status" in df.columns:
+                # Only rejected rows are stored as 'failed'; the rest follow the sync watermark
+                synced = (df["id"] <= get_sync_watermark(safe_table_name)) & (df["sync_status"] != "failed")
+                df.loc[synced, "sync_status"] = "synced"
             return df
         except Exception as e:
             log.error(f"DB Query Error: {e}", exc_info=True)
             return None
 
+    def _session_state(self, filename):
+        """
+        Gets the logger state of a session.
+
+        @filename: CSV file of the session
+        @return: LoggerState object or None
+        """
+        table_name = os.path.splitext(os.path.basename(filename))[0]
+        db = ReadSessionLocal()
+        try:
+            return db.query(LoggerState).filter_by(tableName=table_name).first()
+        finally:
+            db.close()
+
+    def _stored_columns(self, filename):
+        """
+        Checks whether a session has Parquet or binary data to read from.
+        Running sessions are read from the database or CSV file, which already hold the rows still
+        buffered for Parquet and binary chunks; only sessions without a CSV file fall back to the binary file.
+
+        @filename: CSV file of the session
+        @return: Tuple of (list of columns, "parquet" or "gorilla") or (None, None)
+        """
+        state = self._session_state(filename)
+        running = state is not None and state.status == "running"
+        if not running:
+            columns = session_columns(filename)
+            if columns is not None:
+                return columns, "parquet"
+
+        binary_path = gorilla_path(filename)
+        csv_path = os.path.join("../data/", os.path.basename(filename))
+        if os.path.exists(binary_path) and (not running or not os.path.exists(csv_path)):
+            try:
+                with GorillaReader(binary_path) as reader:
+                    return reader.columns, "gorilla"
+            except (OSError, ValueError) as e:
+                log.error(f"Gorilla Read Error: {e}", exc_info=True)
+        return None, None
+
+    def _compression_methods(self, filename):
+        """
+        Gets the compression methods of the registers of a session's meter profile.
+
+        @filename: CSV file of the session
+        @return: Dictionary mapping column names to compression methods
+        """
+        state = self._session_state(filename)
+        try:
+            model = state.meterModel if state else settings.get("ACTIVE_METER_MODEL")
+            return compression_methods(load_meter_config(model))
+        except ValueError:
+            return {}
+
+    def _get_data_from_parquet(self, filename, columns=None, start_time=None, end_time=None):
+        """
+        Gets only the needed columns and time range of a session from its Parquet files.
+
+        @filename: CSV file of the session
+        @columns: Columns to read or None for all
+        @start_time: Optional start time for filtering
+        @end_time: Optional end time for filtering
+        @return: DataFrame with queried data or None
+        """
+        start = datetime.fromisoformat(start_time) if start_time else None
+        end = datetime.fromisoformat(end_time) + timedelta(seconds=1) if end_time else None # Offset by 1s
+        try:
+            return read_session(filename, columns, start, end)
+        except Exception as e:
+            log.error(f"Parquet Query Error: {e}", exc_info=True)
+            return None
+
+    def _get_data_from_gorilla(self, filename, columns=None, start_time=None, end_time=None):
+        """
+        Gets only the needed columns and time range of a session from its memory-mapped binary file.
+
+        @filename: CSV file of the session
+        @columns: Columns to read or None for all
+        @start_time: Optional start time for filtering
+        @end_time: Optional end time for filtering
+        @return: DataFrame with queried data or None
+        """
+        start = datetime.fromisoformat(start_time) if start_time else None
+        end = datetime.fromisoformat(end_time) + timedelta(seconds=1) if end_time else None # Offset by 1s
+        try:
+            with GorillaReader(gorilla_path(filename)) as reader:
+                return reader.read(columns, start, end)
+        except Exception as e:
+            log.error(f"Gorilla Query Error: {e}", exc_info=True)
+            return None
+
+    def _get_stored_data(self, filename, source, columns=None, start_time=None, end_time=None):
+        """
+        Gets session data from the store found by _stored_columns.
+        """
+        if source == "parquet":
+            return self._get_data_from_parquet(filename, columns, start_time, end_time)
+        if source == "gorilla":
+            return self._get_data_from_gorilla(filename, columns, start_time, end_time)
+        return None
+
+    def _get_summary_from_rollups(self, filename, start_time=None, end_time=None):
+        """
+        Gets per-parameter statistics of a session from its rollups without scanning the raw rows.
+
+        @filename: CSV file of the session
+        @start_time: Optional start time for filtering
+        @end_time: Optional end time for filtering
+        @return: Dictionary of statistics per description or None if the session has no rollups
+        """
+        table_name = os.path.splitext(os.path.basename(filename))[0]
+        start = datetime.fromisoformat(start_time) if start_time else None
+        end = datetime.fromisoformat(end_time) + timedelta(seconds=1) if end_time else None # Offset by 1s
+        try:
+            return rollups.summarize(table_name, start, end)
+        except Exception as e:
+            log.error(f"Rollup Query Error: {e}", exc_info=True)
+            return None
+
+    def _get_series_from_rollups(self, filename):
+        """
+        Gets a downsampled mean series of a session whose raw rows exceed ROLLUP_PLOT_POINTS.
+
+        @filename: CSV file of the session
+        @return: DataFrame or None if the raw rows should be plotted
+        """
+        table_name = os.path.splitext(os.path.basename(filename))[0]
+        try:
+            return rollups.series(table_name)
+        except Exception as e:
+            log.error(f"Rollup Query Error: {e}", exc_info=True)
+            return None
+
     def analyze_file(self, filename, start_time=None, end_time=None):
         """
         Analyze a file and return the statistics for a given time range.
@@ -86,9 +227,16 @@ class AnalyzerService:
         @end_time: Optional end time for the time range (ISO format string)
         @return: Dictionary with analysis text and status
         """
-        df = self._get_data_from_db(filename, start_time, end_time)
+        # Rollups answer the statistics exactly; raw rows are only read for sessions without them
+        df = None
+        summary = self._get_summary_from_rollups(filename, start_time, end_time)
+        if summary is None:
+            _, source = self._stored_columns(filename)
+            df = self._get_stored_data(filename, source, start_time=start_time, end_time=end_time)
+        if summary is None and df is None:
+            df = self._get_data_from_db(filename, start_time, end_time)
 
-        if df is None:
+        if summary is None and df is None:
             return {"error": "Unable to retrieve data from database."}
 
         try:
@@ -103,8 +251,13 @@ class AnalyzerService:
             captured_output = StringIO()
             sys.stdout = captured_output
 
-            self._analyzer.calculate_statistics(df, description_to_group_map)
-            self._analyzer.calculate_session_consumption(df)
+            if summary is not None:
+                self._analyzer.report_statistics(summary, description_to_group_map, empty=not summary)
+                self._analyzer.report_consumption(summary, empty=not summary)
+            else:
+                df = reconstruct(df, self._compression_methods(filename))
+                self._analyzer.calculate_statistics(df, description_to_group_map)
+                self._analyzer.calculate_session_consumption(df)
 
             # Capture the output
             sys.stdout = old_stdout
@@ -133,13 +286,22 @@ class AnalyzerService:
         try:
             filename = os.path.basename(filename)
             filepath = os.path.join("../data/", filename)
-            if not os.path.exists(filepath): return {"error": "File not found"}
-
-            df = pd.read_csv(filepath)
-            if 'Timestamp' in df.columns:
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+            if not os.path.exists(filepath) and not os.path.exists(gorilla_path(filename)):
+                return {"error": "File not found"}
 
-            available_cols = [col for col in df.columns if col != 'Timestamp']
+            # Long sessions are plotted from rollup means, Parquet and binary sessions are read after
+            # choosing the columns and CSV files are read in full
+            df = self._get_series_from_rollups(filename)
+            source = None
+            if df is not None:
+                available_cols = [col for col in df.columns if col != 'Timestamp']
+            else:
+                available_cols, source = self._stored_columns(filename)
+            if df is None and available_cols is None:
+                df = pd.read_csv(filepath)
+                if 'Timestamp' in df.columns:
+                    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+                available_cols = [col for col in df.columns if col != 'Timestamp']
             columns_to_plot = []
             title = "Untitled"
 
@@ -164,6 +326,12 @@ class AnalyzerService:
             if not columns_to_plot:
                 return {"error": f"No data available for the '{title}' plot in this file."}
 
+            if df is None:
+                df = self._get_stored_data(filename, source, columns_to_plot)
+                if df is None:
+                    return {"error": "Unable to read the session data."}
+
+            df = reconstruct(df, self._compression_methods(filename))
             self._analyzer._generate_plot(df, title, columns_to_plot, filepath)
 
             csv_base_name = os.path.splitext(filename)[0]
@@ -190,12 +358,14 @@ class AnalyzerService:
             filename = os.path.basename(filename)
             filepath = os.path.join("../data/", filename)
             
-            if not os.path.exists(filepath):
+            if not os.path.exists(filepath) and not os.path.exists(gorilla_path(filename)):
                 return {"error": "File not found"}
 
-            # Extract columns from the CSV file
-            df = pd.read_csv(filepath, nrows=1)
-            columns = [col for col in df.columns if col != 'Timestamp']
+            # Extract columns from the Parquet metadata, the binary file header or the CSV header
+            columns, _ = self._stored_columns(filename)
+            if columns is None:
+                df = pd.read_csv(filepath, nrows=1)
+                columns = [col for col in df.columns if col != 'Timestamp']
 
             return {
                 "filename": filename,
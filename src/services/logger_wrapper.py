@@ -10,6 +10,9 @@ from config.loader import load_meter_config
 from components import logger
 from services.app_logger import log_manager
 from components.settings import settings
+from components.bus import modbus_bus
+from components.tcp_reader import get_gateway_stats
+from components.broadcast import broadcaster
 from components.database import ENGINE, SessionLocal, LoggerState, create_log_table
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
@@ -35,12 +38,16 @@ class LoggerService:
         self._lock = threading.Lock()
         self._logging_thread = None
         self._dl = None
+        self._bus_sessions = {}
 
         # Initialize the log scheduler
         self._scheduler = BackgroundScheduler(jobstores=jobstores)
         self._scheduler.start()
         log.info("Scheduler initialized and started successfully.")
 
+        # Replay samples spilled by stopped sessions; sessions about to resume replay their own
+        threading.Thread(target=logger.replay_orphaned_spills, args=(self._get_running_tables(),), daemon=True).start()
+
         # Check for pre-existing state to resume logging
         logger_state = self._get_logger_state()
         if logger_state and logger_state.get("status") == "running":
@@ -67,7 +74,7 @@ class LoggerService:
         """
         db = SessionLocal()
         try:
-            state_row = db.query(LoggerState).filter(LoggerState.status == "running").first()
+            state_row = db.query(LoggerState).filter(LoggerState.status == "running").order_by(LoggerState.tableName.asc()).first()
             if state_row:
                 return {
                     "tableName": state_row.tableName,
@@ -84,6 +91,19 @@ class LoggerService:
         finally:
             db.close()
 
+    def _get_running_tables(self):
+        """
+        Get the table names of all sessions in the 'running' state.
+        """
+        db = SessionLocal()
+        try:
+            return {row.tableName for row in db.query(LoggerState.tableName).filter(LoggerState.status == "running")}
+        except SQLAlchemyError as e:
+            log.error(f"State Get Error: {e}", exc_info=True)
+            return set()
+        finally:
+            db.close()
+
     def _create_logger_state(self, filepath, table_name, active_model, end_time=None, mode=None):
         """ 
         Create a new logger state in the database.
@@ -132,6 +152,21 @@ class LoggerService:
         finally:
             db.close()
 
+    def _has_logger_state(self, table_name):
+        """
+        Checks whether a logger state exists for a session table.
+
+        @table_name: Name of the database table being logged to
+        """
+        db = SessionLocal()
+        try:
+            return db.get(LoggerState, table_name) is not None
+        except SQLAlchemyError as e:
+            log.error(f"State Get Error: {e}", exc_info=True)
+            return False
+        finally:
+            db.close()
+
     def _handle_logging_failure(self):
         """ 
         Handles internal logging failures.
@@ -142,6 +177,90 @@ class LoggerService:
         log.warning("LoggerService received a failure signal from DataLogger thread.")
         self.stop(csv_filepath=csv_to_stop)
 
+    def _handle_bus_failure(self, table_name):
+        """
+        Handles internal logging failures of an additional bus meter session.
+
+        @table_name: Name of the failed session table
+        """
+        log.warning(f"LoggerService received a failure signal from bus meter session '{table_name}'.")
+        self._bus_sessions.pop(table_name, None)
+        self._update_logger_state_on_stop(table_name)
+
+    def _publish_sample(self, latest):
+        """
+        Pushes the latest reading of the primary session to live stream subscribers.
+
+        @latest: Latest data dictionary
+        """
+        broadcaster.publish("sample", latest, min_interval=config.SSE_SAMPLE_MIN_INTERVAL)
+
+    # MULTI-METER BUS SESSIONS
+
+    def _start_bus_sessions(self, table_name, csv_filepath, end_time=None, mode=None, from_init=False):
+        """
+        Starts a logging session for each additional meter configured on the bus.
+        Each meter writes to its own session table and CSV file.
+
+        @table_name: Table name of the primary session
+        @csv_filepath: CSV file path of the primary session
+        @end_time: The end time for the logging session if available
+        @mode: The mode of the logging session
+        @from_init: Flag to indicate if called from initialization
+        """
+        for meter in settings.get("BUS_METERS") or []:
+            slave_id = meter.get("slave_id")
+            meter_model = meter.get("meter_model") or settings.get("ACTIVE_METER_MODEL")
+            if slave_id is None:
+                log.warning(f"Skipping bus meter entry without a slave ID: {meter}.")
+                continue
+
+            bus_table = f"{table_name}_s{slave_id}"
+            bus_csv = f"{os.path.splitext(csv_filepath)[0]}_s{slave_id}.csv"
+            try:
+                register_map = load_meter_config(meter_model)
+            except ValueError as e:
+                log.error(f"Bus Session Error: {e}")
+                continue
+
+            if not create_log_table(bus_table, register_map, aggregates=settings.get("BURST_MODE"), meter_model=meter_model):
+                log.error(f"Bus Session Error: Failure in creating table '{bus_table}'.")
+                continue
+
+            try:
+                dl = logger.DataLogger(
+                    filename=bus_csv,
+                    table_name=bus_table,
+                    register_map=register_map,
+                    end_time=end_time,
+                    on_failure_callback=lambda t=bus_table: self._handle_bus_failure(t),
+                    meter_model=meter_model,
+                    slave_id=slave_id,
+                    active_parameters=meter.get("parameters"),
+                    log_interval=meter.get("log_interval")
+                )
+            except (ConnectionError, ValueError) as e:
+                log.error(f"Bus Session Error: Meter on slave ID {slave_id} failed to initialize: {e}")
+                continue
+
+            if not (from_init and self._has_logger_state(bus_table)):
+                self._create_logger_state(bus_csv, bus_table, meter_model, end_time, mode if mode else "default")
+
+            thread = threading.Thread(target=dl.log, daemon=True)
+            thread.start()
+            self._bus_sessions[bus_table] = (dl, thread)
+            log.info(f"Started bus meter session '{bus_table}' for slave ID {slave_id} successfully.")
+
+    def _stop_bus_sessions(self):
+        """
+        Stops all additional bus meter sessions.
+        """
+        for table_name, (dl, thread) in list(self._bus_sessions.items()):
+            dl.stop()
+            thread.join(timeout=5)
+            self._update_logger_state_on_stop(table_name)
+        self._bus_sessions.clear()
+
     # MAIN THREAD LOGIC
 
     def start(self, from_init=False, initial_state=None, end_time=None, mode=None):
@@ -179,7 +298,7 @@ class LoggerService:
                 return {"status": "error", "message": "Could not determine filepath or table."}
 
             # Create the dynamic table before starting the logger
-            if not create_log_table(table_name, register_map):
+            if not create_log_table(table_name, register_map, aggregates=settings.get("BURST_MODE"), meter_model=active_model):
                 log.error(f"Logger Service Error: Failure in creating table '{table_name}'.")
                 return {"status": "error", "message": f"Failed to create database table for session."}
 
@@ -192,7 +311,9 @@ class LoggerService:
                     table_name=table_name,
                     register_map=register_map,
                     end_time=end_time,
-                    on_failure_callback=self._handle_logging_failure
+                    on_failure_callback=self._handle_logging_failure,
+                    meter_model=active_model,
+                    on_sample=self._publish_sample
                 )
             except (ConnectionError, ValueError) as e:
                 log.error(f"DataLogger Initialization Error: {e}")
@@ -208,6 +329,8 @@ class LoggerService:
                 self._create_logger_state(csv_filepath, table_name, active_model, end_time, mode if mode else "default")
 
             self._logging_thread.start()
+            self._start_bus_sessions(table_name, csv_filepath, end_time, mode, from_init)
+            broadcaster.mark_changed()
 
             if end_time:
                 log.info(f"Started scheduled data logging process for '{table_name}' until '{end_time.isoformat()}' successfully.")
@@ -218,8 +341,9 @@ class LoggerService:
     def stop(self, csv_filepath=None):
         with self._lock:
             db = SessionLocal()
-            running_state = db.query(LoggerState).filter_by(status="running").first()
+            running_states = db.query(LoggerState).filter_by(status="running").order_by(LoggerState.tableName.asc()).all()
             db.close()
+            running_state = running_states[0] if running_states else None
 
             table_to_stop = None
             session_name_to_stop = None
@@ -231,6 +355,12 @@ class LoggerService:
             elif csv_filepath:
                 session_name_to_stop = os.path.splitext(os.path.basename(csv_filepath))[0]
 
+            # Stop the additional bus meter sessions
+            self._stop_bus_sessions()
+            for state in running_states[1:]:
+                self._update_logger_state_on_stop(state.tableName)
+            broadcaster.mark_changed()
+
             if session_name_to_stop:
                 log_manager.stop_session_logging(session_name=session_name_to_stop)
             else:
@@ -270,6 +400,48 @@ class LoggerService:
             return self._dl.latest
         return None
 
+    def history(self, cursor=None, params=None):
+        """
+        Get the recent readings of the running session after a client cursor.
+
+        @cursor: Cursor returned by a previous call or None for the whole window
+        @params: Parameters to include or None for all
+        @return: History dictionary or None
+        """
+        if self._dl:
+            return self._dl.history.since(cursor, params)
+        return None
+
+    def get_sampling_stats(self):
+        """
+        Get the tick scheduler statistics of the running session.
+
+        @return: Dictionary with sampling statistics or None
+        """
+        if self._dl:
+            return self._dl.get_sampling_stats()
+        return None
+
+    def get_sink_stats(self):
+        """
+        Get the per-sink lag and throughput counters of the running session.
+
+        @return: Dictionary keyed by sink name or None
+        """
+        if self._dl:
+            return self._dl.pipeline.get_stats()
+        return None
+
+    def get_meter_stats(self):
+        """
+        Get the per-meter polling statistics of the Modbus bus and TCP gateways.
+
+        @return: Dictionary keyed by slave ID or gateway address
+        """
+        stats = {str(slave_id): stats for slave_id, stats in modbus_bus.get_stats().items()}
+        stats.update(get_gateway_stats())
+        return stats
+
     def is_running(self):
         """
         Check if the logger is currently running.
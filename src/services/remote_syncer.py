@@ -1,17 +1,22 @@
 # src/services/remote_syncer.py
 
+import os
 import logging
-import socket
-import psycopg2
 import threading
 import time
 
 from config import config
 from config.loader import load_meter_config
 from components.settings import settings
-from components.database import ENGINE, SessionLocal, LoggerState
-from sqlalchemy import text, bindparam
+from components.database import READ_ENGINE, advance_sync_watermark, get_sync_candidates, sync_notifier
+from components.planner import is_aggregate_column
+from components.remote_pool import RemotePool, CONNECTION_ERRORS
+from components.broadcast import broadcaster
+from components.connectivity import connectivity_monitor
+from sqlalchemy import text
+from psycopg2.extras import execute_values
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, CancelledError
 
 # GLOBAL VARIABLES
 
@@ -19,14 +24,75 @@ log = logging.getLogger(__name__)
 
 # SERVICES
 
+class BatchSizer:
+    """
+    Sizes sync batches for one remote database from the measured link.
+    The smallest batch duration seen approximates the round trip; the remaining time per row gives
+    the throughput. Batches are sized to take about the target duration and grow at most twofold
+    per batch, so a fast link ramps up quickly and a slow one is not flooded. Sync workers of the
+    same remote database share a sizer, so updates are made under a lock.
+    """
+    def __init__(self, size=config.SYNC_BATCH_SIZE, minimum=config.SYNC_BATCH_MIN, maximum=config.SYNC_BATCH_MAX,
+                 target=config.SYNC_BATCH_SECONDS, smoothing=0.3):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target
+        self.smoothing = smoothing
+        self.size = min(max(size, minimum), maximum)
+        self.rtt = None
+        self.rate = None
+        self._lock = threading.Lock()
+
+    def record(self, rows, seconds):
+        """
+        Updates the link estimates after a successful batch and resizes the next one.
+
+        @rows: Number of rows sent
+        @seconds: Duration of the batch
+        """
+        if rows <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            self.rtt = seconds if self.rtt is None else min(self.rtt, seconds)
+            rate = rows / max(seconds - self.rtt, seconds / 2)
+            self.rate = rate if self.rate is None else self.rate + self.smoothing * (rate - self.rate)
+            budget = max(self.target - self.rtt, self.target / 2)
+            size = min(int(self.rate * budget), self.size * 2)
+            self.size = min(max(size, self.minimum), self.maximum)
+
+    def record_failure(self):
+        """
+        Halves the next batch after a failed one.
+        """
+        with self._lock:
+            self.size = max(self.minimum, self.size // 2)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "batchSize": self.size,
+                "rttMs": round(self.rtt * 1000, 1) if self.rtt is not None else None,
+                "rowsPerSecond": round(self.rate, 1) if self.rate is not None else None,
+            }
+
 class RemoteDBSyncer:
     """
     Handles synchronization of local database tables with a remote database.
+    Session tables are synced concurrently by a bounded worker pool, one batch per table and cycle.
+    Cycles run back to back while a backlog remains; once caught up the syncer sleeps until the logger
+    commits rows or a remote database comes back, polling every SYNC_INTERVAL seconds only to recover
+    from missed notifications.
     """
     def __init__(self):
-        self.batch_size = config.SYNC_BATCH_SIZE
         self._thread = None
+        self._executor = None
         self._status = "idle"
+        self._remote_configs = {}
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        self._sizers = {}
+        self._backlog_rows = 0
+        self._eta = None
         self._stop_event = threading.Event()
 
     def _run(self):
@@ -35,75 +101,187 @@ class RemoteDBSyncer:
         """
         log.info("RemoteDBSyncer thread has started.")
         while not self._stop_event.is_set():
+            backlog = False
             try:
-                self.run_sync_cycle()
+                backlog = self.run_sync_cycle()
             except Exception as e:
                 log.error(f"RemoteDBSyncer Thread Error: {e}", exc_info=True)
-            self._stop_event.wait(config.SYNC_INTERVAL)
+            if not backlog and not self._stop_event.is_set():
+                sync_notifier.wait(config.SYNC_INTERVAL, config.SYNC_DEBOUNCE, self._stop_event.is_set)
         log.info("RemoteDBSyncer thread has stopped.")
 
-    def _check_internet(self):
+    def _get_remote_config(self, meter_model):
         """
-        Checks for active Internet connection.
+        Get the remote database settings of a meter model.
+        Parsed profiles are cached until the profile file changes.
+
+        @meter_model: The name of the meter model
+        @return: Tuple of (connection settings, target table) or None if not configured
         """
         try:
-            socket.create_connection(("8.8.8.8", 53), timeout=3)
-            return True
+            mtime = os.path.getmtime(config.METERS_DIR / f"{meter_model}.json")
         except OSError:
-            log.info("Internet disconnected. Skipping sync cycle.")
-            return False
+            mtime = None
+        cached = self._remote_configs.get(meter_model)
+        if cached and cached[0] == mtime:
+            return cached[1]
 
-    def _get_next_sync_batch(self):
-        """
-        Finds the table with pending rows to sync.
+        remote = None
+        try:
+            db_info = load_meter_config(meter_model, full_config=True).get("remote_database") or {}
+            remote_db_config = {
+                "database": db_info.get("database"),
+                "user": db_info.get("user"),
+                "password": db_info.get("password"),
+                "host": db_info.get("host"),
+                "port": db_info.get("port")
+            }
+            remote_table_name = db_info.get("target_table")
+            if all(remote_db_config.values()) and remote_table_name:
+                remote = (remote_db_config, remote_table_name)
+            elif db_info:
+                log.error(f"Remote database configuration for '{meter_model}' is incomplete. Skipping sync.")
+        except (ValueError, KeyError) as e:
+            log.error(f"Remote Sync Error: Failed to load meter profile configuration for '{meter_model}': {e}")
+        self._remote_configs[meter_model] = (mtime, remote)
+        return remote
+
+    def _get_pool(self, remote_db_config):
         """
-        with ENGINE.connect() as connection:
-            statement = text("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '20%' ORDER BY name ASC")
+        Get the connection pool and batch sizer of a remote database, creating them on first use.
 
-            all_log_tables = [row[0] for row in connection.execute(statement)]
-            for table_name in all_log_tables:
-                check_statement = text(f'SELECT id FROM "{table_name}" WHERE sync_status = :status LIMIT 1')
-                if connection.execute(check_statement, {"status": "pending"}).first():
-                    db = SessionLocal()
-                    session_record = None
+        @remote_db_config: Dictionary of connection settings
+        @return: Tuple of (RemotePool, BatchSizer)
+        """
+        key = tuple(sorted(remote_db_config.items()))
+        with self._pools_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = RemotePool(remote_db_config)
+                self._sizers[key] = BatchSizer()
+            return pool, self._sizers[key]
+
+    def _close_stale_pools(self):
+        """
+        Closes the pools of targets no longer used by any profile.
+        Runs before a cycle hands out work, when no sync task holds a pool.
+        """
+        active = {tuple(sorted(r[1][0].items())) for r in self._remote_configs.values() if r[1]}
+        with self._pools_lock:
+            stale = [self._pools.pop(k) for k in list(self._pools) if k not in active]
+            for key in [k for k in self._sizers if k not in self._pools]:
+                del self._sizers[key]
+        for pool in stale:
+            pool.close()
+
+    def _get_sync_work(self):
+        """
+        Finds the tables with rows above their sync watermark from the sync catalog.
 
-                    # Check for session record
-                    try:
-                        session_record = db.query(LoggerState).filter_by(tableName=table_name).first()
-                    finally:
-                        db.close()
+        @return: List of (table name, watermark, pending rows, remote settings) tuples
+        """
+        work = []
+        offline = set()
+        for table_name, meter_model, watermark, pending in get_sync_candidates():
+            # Skip tables without a meter model or remote database
+            remote = self._get_remote_config(meter_model) if meter_model else None
+            if not remote:
+                continue
+
+            # Skip targets the connectivity monitor reports down; unprobed targets are tried
+            target = (remote[0]["host"], remote[0]["port"])
+            if connectivity_monitor.is_reachable(*target) is False:
+                offline.add(target)
+                continue
+            work.append((table_name, watermark, pending, remote))
+        if offline:
+            log.info(f"Skipping sync to unreachable remote databases: {', '.join(f'{h}:{p}' for h, p in offline)}.")
+        if work:
+            log.info(f"Found pending work in {len(work)} tables.")
+        else:
+            log.info("No pending work found in any table to sync.")
+        return work
 
-                    # Skip if no session record or meter model is found
-                    if not (session_record and session_record.meterModel):
-                        continue
+    def _prepare_rows(self, rows):
+        """
+        Converts local rows into remote insert values.
+        Rows of one session table share their columns, so the column list is built once per batch.
 
-                    try:
-                        meter_model = session_record.meterModel
-                        meter_config = load_meter_config(meter_model, full_config=True)
-                        db_info = meter_config.get("remote_database")
-
-                        # Skip if any required field is missing
-                        if not all([
-                            db_info.get("database"),
-                            db_info.get("user"),
-                            db_info.get("password"),
-                            db_info.get("host"),
-                            db_info.get("port"),
-                            db_info.get("target_table")
-                        ]):
-                            continue
-                        log.info(f"Found pending work in table '{table_name}' created by model '{meter_model}'.")
-                        return table_name, meter_model
-                    except (ValueError, KeyError) as e:
-                        log.error(f"Get Batch Error: {e}", exc_info=True)
-                        continue
-
-        log.info("No pending work found in any table to sync.")
-        return None, None
+        @rows: List of row mappings ordered by id
+        @return: Tuple of (column names, row ids, value tuples)
+        """
+        columns = [c for c in rows[0].keys() if c not in ("id", "sync_status", "quality") and not is_aggregate_column(c)]
+
+        # Get the Customer ID if available
+        customer_id = settings.get("CUSTOMER_ID")
+        customer_id = customer_id.strip() if customer_id and customer_id.strip() else None
+
+        ids = []
+        values = []
+        for row in rows:
+            ids.append(row["id"])
+            row_values = []
+            for col in columns:
+                val = row[col]
+                if isinstance(val, datetime):
+                    row_values.append(val.strftime('%Y-%m-%d %H:%M:%S'))
+                else:
+                    row_values.append(val)
+            row_values.append(customer_id)
+            values.append(tuple(row_values))
+        return columns + ["customer_id"], ids, values
+
+    def _insert_rows(self, remote_conn, remote_table_name, columns, ids, values):
+        """
+        Inserts rows with multi-row statements and one commit.
+        A rejected batch is split in halves until the offending rows are isolated, so one bad row
+        costs about log2(batch) extra round trips instead of a row-at-a-time retry of the whole batch.
+        Connection failures are raised, leaving the watermark where it was.
+
+        @remote_conn: Open psycopg2 connection
+        @remote_table_name: Name of the remote table
+        @columns: Column names of the values
+        @ids: Local row ids of the values
+        @values: List of value tuples
+        @return: List of ids of rows the remote database rejected
+        """
+        column_names_str = ", ".join(f'"{c}"' for c in columns)
+        insert_statement = (
+            f'INSERT INTO "{remote_table_name}" ({column_names_str}) VALUES %s '
+            f'ON CONFLICT ("Timestamp", "customer_id") DO NOTHING'
+        )
+
+        failed_ids = []
+        pending = [(0, len(values))]
+        while pending:
+            start, end = pending.pop()
+            try:
+                with remote_conn.cursor() as cursor:
+                    execute_values(cursor, insert_statement, values[start:end], page_size=config.SYNC_PAGE_SIZE)
+                remote_conn.commit()
+            except CONNECTION_ERRORS:
+                raise
+            except Exception as e:
+                remote_conn.rollback()
+                if end - start == 1:
+                    log.warning(f"Remote database rejected row ID {ids[start]}. Error: {e}")
+                    failed_ids.append(ids[start])
+                    continue
+                middle = (start + end) // 2
+                pending.extend(((middle, end), (start, middle)))
+        return sorted(failed_ids)
 
     def _get_status(self):
         return self._status
 
+    def _set_status(self, status):
+        """
+        Updates the sync status and notifies live stream subscribers on changes.
+        """
+        if status != self._status:
+            self._status = status
+            broadcaster.mark_changed()
+
     def start(self):
         """ 
         Starts the background thread. 
@@ -113,6 +291,7 @@ class RemoteDBSyncer:
             return
 
         self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, config.SYNC_WORKERS), thread_name_prefix="RemoteSync")
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
 
@@ -125,135 +304,131 @@ class RemoteDBSyncer:
             return
 
         self._stop_event.set()
+        sync_notifier.interrupt()
+
+        # Batches already sending run to completion so a restart never overlaps them; queued ones are dropped
+        self._executor.shutdown(wait=True, cancel_futures=True)
         self._thread.join(timeout=5)
         if self._thread.is_alive():
             log.warning("RemoteDBSyncer thread did not stop in time.")
+            return
         self._thread = None
+        self._executor = None
 
-    def run_sync_cycle(self):
+        with self._pools_lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+    def get_stats(self):
         """
-        Executes a single synchronization cycle.
+        Get the backlog, estimated time to drain and per remote database pool and batch statistics.
+
+        @return: Dictionary with sync statistics
         """
-        settings.load_settings()
+        with self._pools_lock:
+            targets = [(self._pools[k], self._sizers[k]) for k in self._pools]
+        return {
+            **sync_notifier.get_stats(),
+            "backlogRows": self._backlog_rows,
+            "etaSeconds": round(self._eta) if self._eta is not None else None,
+            "pools": {pool.name: {**pool.get_stats(), **sizer.get_stats()} for pool, sizer in targets},
+        }
+
+    def _sync_table(self, target_table, watermark, remote):
+        """
+        Syncs one batch of rows above the watermark of a table.
 
-        # Check mode
-        if not config.REMOTE_DB_ENABLED:
-            return
+        @target_table: The name of the local table
+        @watermark: Id of the last synced row
+        @remote: Tuple of (connection settings, target table)
+        @return: Tuple of (rows synced, flag indicating if a full batch was sent)
+        """
+        remote_db_config, remote_table_name = remote
+        pool, sizer = self._get_pool(remote_db_config)
+        batch_size = sizer.size
 
-        # Check Internet connection
-        if self._check_internet():
-            self._status = "active"
-        else:
-            self._status = "idle"
-            return
+        # Get rows above the watermark by primary key
+        rows_to_sync = []
+        with READ_ENGINE.connect() as local_conn:
+            select_statement = text(f'SELECT * FROM "{target_table}" WHERE id > :watermark ORDER BY id ASC LIMIT :limit')
+            rows_to_sync = local_conn.execute(select_statement, {"watermark": watermark, "limit": batch_size}).mappings().all()
+        if not rows_to_sync:
+            return 0, False
+        log.info(f"Attempting to sync {len(rows_to_sync)} rows from local table '{target_table}'.")
 
-        # Find sync batch and creation model
-        target_table, meter_model = self._get_next_sync_batch()
-        if not target_table or not meter_model:
-            self._status = "idle"
-            return
+        started = time.monotonic()
+        try:
+            columns, ids, values = self._prepare_rows(rows_to_sync)
+            with pool.connection() as remote_conn:
+                failed_ids = self._insert_rows(remote_conn, remote_table_name, columns, ids, values)
+            sizer.record(len(ids), time.monotonic() - started)
+            if failed_ids:
+                log.error(f"Remote Sync Error: Skipped {len(failed_ids)} rows of '{target_table}' rejected by the remote database.")
+        except ConnectionError as e:
+            log.info(f"Remote Sync Skipped: {e}")
+            return 0, False
+        except Exception as e:
+            sizer.record_failure()
+            log.error(f"Remote Sync Connection Error: {e}", exc_info=True)
+            return 0, False
 
-        # Load configuration for specific model
+        synced_id = ids[-1]
         try:
-            meter_config = load_meter_config(meter_model, full_config=True)
-            db_info = meter_config.get("remote_database")
+            advance_sync_watermark(target_table, synced_id, failed_ids)
+            log.info(f"Synced {len(rows_to_sync) - len(failed_ids)} rows from table '{target_table}' up to ID {synced_id} successfully.")
+        except Exception as e:
+            log.error(f"Failed to update local sync watermark for table '{target_table}': {e}", exc_info=True)
+            return 0, False
+        return len(ids), len(ids) >= batch_size
 
-            if not db_info:
-                log.warning(f"Remote database configuration for '{meter_model}' is not found. Skipping sync.")
-                self._status = "idle"
-                return
+    def run_sync_cycle(self):
+        """
+        Executes a single synchronization cycle over every table with pending rows.
 
-            # Fetch remote DB credentials
-            remote_db_config = {
-                "database": db_info.get("database"),
-                "user": db_info.get("user"),
-                "password": db_info.get("password"),
-                "host": db_info.get("host"),
-                "port": db_info.get("port")
-            }
-            remote_table_name = db_info.get("target_table")
+        @return: Boolean flag indicating if a backlog remains for an immediate next cycle
+        """
+        settings.load_settings()
 
-            if not all(remote_db_config.values()) or not remote_table_name:
-                log.error(f"Remote database configuration for '{meter_model}' is incomplete. Skipping sync.")
-                self._status = "idle"
-                return
-        except (ValueError, KeyError) as e:
-            log.error(f"Remote Sync Error: Failed to load meter profile configuration for '{meter_model}': {e}")
-            self._status = "idle"
-            return
+        # Check mode
+        if not config.REMOTE_DB_ENABLED:
+            return False
 
-        # Get rows to sync
-        rows_to_sync = []
-        with ENGINE.connect() as local_conn:
-            select_statement = text(f'SELECT * FROM "{target_table}" WHERE sync_status = :status ORDER BY id ASC LIMIT :limit')
-            rows_to_sync = local_conn.execute(select_statement, {"status": "pending", "limit": self.batch_size}).mappings().all()
-        if not rows_to_sync:
-            return
-        log.info(f"Attempting to sync {len(rows_to_sync)} rows from local table '{target_table}'.")
+        # Find tables with pending rows
+        work = self._get_sync_work()
+        self._close_stale_pools()
+        if not work:
+            self._backlog_rows = 0
+            self._eta = None
+            self._set_status("idle")
+            return False
 
-        successful_ids = []
-        remote_conn = None
+        self._set_status("active")
         try:
-            remote_conn = psycopg2.connect(**remote_db_config)
-            for row in rows_to_sync:
-                with remote_conn.cursor() as cursor:
-                    # Prepare the row data for insertion
-                    row_data = dict(row)
-                    row_id = row_data.pop("id")
-                    row_data.pop("sync_status", None)
-
-                    # Get the Customer ID if available
-                    customer_id = settings.get("CUSTOMER_ID")
-                    if customer_id and customer_id.strip():
-                        row_data['customer_id'] = customer_id.strip()
-                    else:
-                        row_data['customer_id'] = None 
-
-                    # Prepare the columns and values for insertion
-                    columns_to_insert = row_data.keys()
-                    values_to_insert = []
-                    for col in columns_to_insert:
-                        val = row_data[col]
-                        if isinstance(val, datetime):
-                            values_to_insert.append(val.strftime('%Y-%m-%d %H:%M:%S'))
-                        else:
-                            values_to_insert.append(val)
-
-                    # Construct the SQL insert statement
-                    column_names_str = ", ".join(f'"{c}"' for c in columns_to_insert)
-                    value_placeholders_str = ", ".join(["%s"] * len(values_to_insert))
-                    insert_statement = (
-                        f'INSERT INTO "{remote_table_name}" ({column_names_str}) '
-                        f'VALUES ({value_placeholders_str}) '
-                        f'ON CONFLICT ("Timestamp", "customer_id") DO NOTHING'
-                    )
-
-                    # Execute the insert statement
+            if self._executor is None:
+                results = [self._sync_table(t, w, r) for t, w, _, r in work]
+            else:
+                futures = [self._executor.submit(self._sync_table, t, w, r) for t, w, _, r in work]
+                results = []
+                for future in futures:
                     try:
-                        cursor.execute(insert_statement, values_to_insert)
-                        remote_conn.commit()
-                        successful_ids.append(row_id)
+                        results.append(future.result())
+                    except CancelledError:
+                        pass
                     except Exception as e:
-                        log.error(f"Remote Sync Error: Failed to insert row ID {row_id} from '{target_table}'. Skipping row. Error: {e}")
-                        remote_conn.rollback()
-        except Exception as e:
-            log.error(f"Remote Sync Connection Error: {e}", exc_info=True)
+                        log.error(f"Remote Sync Error: {e}", exc_info=True)
         finally:
-            if remote_conn:
-                remote_conn.close()
-            self._status = "idle"
-
-        if successful_ids:
-            try:
-                with ENGINE.connect() as local_conn:
-                    with local_conn.begin():
-                        update_statement = text(f'UPDATE "{target_table}" SET sync_status = :status WHERE id IN :ids').bindparams(
-                            bindparam('ids', expanding=True)
-                        )
-                        local_conn.execute(update_statement, {"status": "synced", "ids": tuple(successful_ids)})
-                log.info(f"Synced and updated {len(successful_ids)} rows from table '{target_table}' successfully.")
-            except Exception as e:
-                log.error(f"Failed to update local sync status for table '{target_table}': {e}", exc_info=True)
+            self._set_status("idle")
+
+        # Estimate the time to drain the remaining backlog
+        synced = sum(rows for rows, _ in results)
+        self._backlog_rows = max(0, sum(pending for _, _, pending, _ in work) - synced)
+        with self._pools_lock:
+            rate = sum(sizer.rate or 0 for sizer in self._sizers.values())
+        self._eta = self._backlog_rows / rate if rate and self._backlog_rows else None
+        if self._eta:
+            log.info(f"Sync backlog of {self._backlog_rows} rows drains in about {self._eta:.0f} s.")
+        return any(full for _, full in results)
 
 # GLOBAL INSTANCE
 remote_syncer_service = RemoteDBSyncer()
\ No newline at end of file
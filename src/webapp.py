@@ -9,17 +9,25 @@ import json
 import logging
 import datetime
 import atexit
+import signal
+import threading
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from config import config
 from config.loader import load_meter_config
 from components.util import initialize_directories, list_files; initialize_directories()
-from components.database import init_db; init_db()
+from components.database import init_db, get_db_stats; init_db()
 from components.settings import settings
+from components.planner import invalidate_plans
+from components.broadcast import broadcaster
+from components.pipeline import request_reopen
+from components.gorilla import export_csv, gorilla_path
 from services.logger_wrapper import logger_service
 from services.analyzer_wrapper import analyzer_service
 from services.analyzer_wrapper import VISUALIZATION_TYPES
 from services.remote_syncer import remote_syncer_service
+from components.connectivity import connectivity_monitor
+from time import monotonic
 from datetime import datetime, time, timedelta
 from werkzeug.utils import secure_filename
 
@@ -28,15 +36,95 @@ from werkzeug.utils import secure_filename
 app = Flask(__name__, static_folder=str(config.STATIC_DIR))
 log = logging.getLogger(__name__)
 
+# CONNECTIVITY MONITOR SERVICE
+
+connectivity_monitor.start()
+atexit.register(connectivity_monitor.stop)
+
 # REMOTE DB SYNCER SERVICE
 
 if config.REMOTE_DB_ENABLED:
-    log.info(f"Remote DB is enabled. Sync service will run every {config.SYNC_INTERVAL}s.")
+    log.info(f"Remote DB is enabled. Sync service will run on committed rows and every {config.SYNC_INTERVAL}s.")
     remote_syncer_service.start()
     atexit.register(remote_syncer_service.stop)
 else:
     log.info("Remote DB is disabled. Sync service will not run.")
 
+# LIVE EVENT STREAM
+
+def build_status():
+    """
+    Builds the scheduler status payload shared by the status endpoint and the event stream.
+
+    @return: Dictionary with scheduler status
+    """
+    # Indicators
+    logger_state = logger_service.get_status()
+    jobs = logger_service._scheduler.get_jobs()
+    latest_data = logger_service.latest()
+    sync_status = remote_syncer_service._get_status()
+    internet_connected = connectivity_monitor.is_online()
+
+    response = {
+        "mode": "none",
+        "status": "idle",
+        "activeCSVFile": logger_state.get("csvFile"),
+        "lastUpdated": latest_data.get("ts").isoformat() if latest_data and latest_data.get("ts") else None,
+        "liveMetricsEnabled": settings.get("LIVE_METRICS"),
+        "syncStatus": sync_status,
+        "internetStatus": internet_connected,
+        "meterStats": logger_service.get_meter_stats(),
+        "samplingStats": logger_service.get_sampling_stats(),
+        "sinkStats": logger_service.get_sink_stats(),
+        "streamStats": broadcaster.get_stats(),
+        "databaseStats": get_db_stats(),
+        "syncStats": remote_syncer_service.get_stats(),
+        "connectivityStats": connectivity_monitor.get_stats(),
+    }
+
+    if logger_state.get("status") == "running":
+        response["status"] = "logging"
+        response["mode"] = logger_state.get("mode", "default")
+    else:
+        start_job = next((j for j in jobs if j.id == "start_job"), None)
+        if start_job:
+            response["status"] = "scheduled"
+            response["mode"] = start_job.kwargs.get('schedule_mode', 'none')
+    return response
+
+def publish_status():
+    """
+    Publishes the status once per interval or change while stream clients are connected,
+    so the status is built once no matter how many dashboards are open.
+    """
+    while True:
+        if broadcaster.subscriber_count:
+            try:
+                broadcaster.publish("status", build_status())
+            except Exception as e:
+                log.error(f"Status Stream Error: {e}", exc_info=True)
+        broadcaster.wait_changed(config.SSE_STATUS_INTERVAL)
+
+_status_publisher = None
+_status_publisher_lock = threading.Lock()
+
+def start_status_publisher():
+    """
+    Starts the status publisher with the first stream client rather than on import.
+    """
+    global _status_publisher
+    with _status_publisher_lock:
+        if _status_publisher is None or not _status_publisher.is_alive():
+            _status_publisher = threading.Thread(target=publish_status, name="status-stream", daemon=True)
+            _status_publisher.start()
+
+# LOG ROTATION
+
+# Reopen the data log files on SIGHUP so external rotation (e.g. logrotate) takes effect; the handler
+# only flags the request, and each sink worker reopens its files within SINK_FLUSH_INTERVAL
+if hasattr(signal, "SIGHUP"):
+    signal.signal(signal.SIGHUP, lambda signum, frame: request_reopen())
+
 # HELPER FUNCTIONS
 
 def start_logging_job(**kwargs):
@@ -68,6 +156,20 @@ def latest():
     data = logger_service.latest()
     return jsonify(data if data else {})
 
+@app.get("/api/latest/history")
+def latest_history():
+    """
+    Get the recent readings of the running session from memory.
+    Pass the returned cursor as `since` to receive only newer samples.
+
+    @return: JSON object with cursor, reset flag, timestamps and values per parameter
+    """
+    since = request.args.get("since", type=int)
+    params = request.args.get("params")
+    params = [p.strip() for p in params.split(",") if p.strip()] if params else None
+    data = logger_service.history(since, params)
+    return jsonify(data if data else {})
+
 @app.get("/api/status")
 def get_logger_status():
     """ 
@@ -84,32 +186,35 @@ def get_scheduler_status():
     
     @return: JSON object with scheduler status
     """
-    # Indicators
-    logger_state = logger_service.get_status()
-    jobs = logger_service._scheduler.get_jobs()
-    latest_data = logger_service.latest()
-    sync_status = remote_syncer_service._get_status()
-    internet_connected = remote_syncer_service._check_internet()
+    return jsonify(build_status())
 
-    response = {
-        "mode": "none",
-        "status": "idle",
-        "activeCSVFile": logger_state.get("csvFile"),
-        "lastUpdated": latest_data.get("ts").isoformat() if latest_data and latest_data.get("ts") else None,
-        "liveMetricsEnabled": settings.get("LIVE_METRICS"),
-        "syncStatus": sync_status,
-        "internetStatus": internet_connected,
-    }
+@app.get("/api/stream")
+def stream_events():
+    """
+    Server-sent event stream of logger status and latest readings.
+    Emits 'status' events with the /api/schedules/status payload and 'sample' events with the /api/latest payload.
+    The stream ends after SSE_MAX_DURATION seconds so a worker thread is never held indefinitely;
+    the browser reconnects after the retry delay and gets the last frames again.
 
-    if logger_state.get("status") == "running":
-        response["status"] = "logging"
-        response["mode"] = logger_state.get("mode", "default")
-    else:
-        start_job = next((j for j in jobs if j.id == "start_job"), None)
-        if start_job:
-            response["status"] = "scheduled"
-            response["mode"] = start_job.kwargs.get('schedule_mode', 'none')
-    return jsonify(response)
+    @return: Event stream response
+    """
+    start_status_publisher()
+    subscription = broadcaster.subscribe()
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            deadline = monotonic() + config.SSE_MAX_DURATION
+            while monotonic() < deadline:
+                frame = subscription.get(timeout=min(config.SSE_KEEPALIVE, deadline - monotonic()))
+                yield frame if frame else ": keepalive\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
 
 @app.get("/api/settings")
 def get_settings():
@@ -134,11 +239,19 @@ def list_data_files():
 def get_data_file(filename):
     """ 
     Get the specified CSV file for download.
+    Sessions kept only in the binary format are exported to CSV while streaming.
     
     @filename: Name of the file to download
     @return: File download response
     """
     filename = os.path.basename(filename)
+    binary_path = gorilla_path(filename)
+    if not os.path.exists(config.DS_DIR / filename) and os.path.exists(binary_path):
+        return Response(
+            export_csv(binary_path),
+            mimetype="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{secure_filename(filename)}"'}
+        )
     return send_from_directory(
         config.DS_DIR,
         filename,
@@ -451,6 +564,7 @@ def upload_meter_profile():
             with open(target_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2)
 
+            invalidate_plans(os.path.splitext(filename)[0])
             success_files.append(filename)
             log.info(f"Saved new meter profile '{filename}' successfully.")
         except json.JSONDecodeError:
@@ -227,6 +227,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
     let dataPollingInterval = null;
     let statusPollingInterval = null;
+    let eventStream = null;
+    let latestReadingsShown = false;
+    let loggerStatus = null;
     let currentGrafanaState = null;
 
     // STATUS POLLING AND RENDERING
@@ -237,6 +240,27 @@ document.addEventListener('DOMContentLoaded', function() {
         statusPollingInterval = setInterval(fetchStatus, 3000);
     }
 
+    function startEventStream() {
+        // Status and readings are pushed by the server; fall back to polling without EventSource
+        if (!window.EventSource) {
+            startStatusPolling();
+            return;
+        }
+
+        eventStream = new EventSource('/api/stream');
+        eventStream.addEventListener('status', event => updateUIFromStatus(JSON.parse(event.data)));
+        eventStream.addEventListener('sample', event => {
+            if (loggerStatus === 'logging') renderLatestData(JSON.parse(event.data));
+        });
+        eventStream.onerror = () => {
+            if (eventStream.readyState === EventSource.CLOSED) {
+                console.error('Event stream closed. Falling back to polling.');
+                eventStream = null;
+                startStatusPolling();
+            }
+        };
+    }
+
     function fetchStatus() {
         fetch('/api/schedules/status')
             .then(response => response.json())
@@ -270,6 +294,7 @@ document.addEventListener('DOMContentLoaded', function() {
         const syncText = document.getElementById('logger-sync');
         const wifiIcon = document.getElementById('wifi-status-icon');
 
+        loggerStatus = data.status;
         document.getElementById('logger-mode').textContent = modeMap[data.mode] || 'Unknown';
         statusElement.textContent = statusMap[data.status] || 'Unknown';
         statusElement.className = 'logger-status ' + data.status;
@@ -319,8 +344,13 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         if (data.status === 'logging') {
-            if (!dataPollingInterval) startDataPolling();
+            if (eventStream) {
+                if (!latestReadingsShown) fetchLatestData();
+            } else if (!dataPollingInterval) {
+                startDataPolling();
+            }
         } else {
+            latestReadingsShown = false;
             if (dataPollingInterval) stopDataPolling();
             document.getElementById('latest-readings').innerHTML = '<h2>Latest Readings</h2><p>No data available. Start logging to see real-time measurements.</p>';
         }
@@ -967,6 +997,19 @@ document.addEventListener('DOMContentLoaded', function() {
                             <input type="number" id="log_interval" name="log_interval" value="${data.LOG_INTERVAL}" min="1" required>
                         </div>
 
+                        <div class="toggle-switch">
+                            <label for="burst_mode">Burst Mode (Aggregates per Interval)</label>
+                            <label class="switch">
+                                <input type="checkbox" id="burst_mode" name="burst_mode" ${data.BURST_MODE ? 'checked' : ''}>
+                                <span class="slider"></span>
+                            </label>
+                        </div>
+
+                        <div class="form-group">
+                            <label for="burst_interval">Burst Poll Interval (Seconds, 0 = Fastest)</label>
+                            <input type="number" id="burst_interval" name="burst_interval" value="${data.BURST_INTERVAL}" min="0" step="0.05" required>
+                        </div>
+
                         <div class="form-group">
                             <label for="modbus_slave_id">Modbus Slave ID</label>
                             <input type="number" id="modbus_slave_id" name="modbus_slave_id" value="${data.MODBUS_SLAVE_ID}" min="1" max="247" required>
@@ -1041,6 +1084,8 @@ document.addEventListener('DOMContentLoaded', function() {
             LIVE_METRICS: form.live_metrics.checked,
             CUSTOMER_ID: form.customer_id.value.trim().replace(/\s+/g, '').toUpperCase(),
             LOG_INTERVAL: parseInt(form.log_interval.value, 10),
+            BURST_MODE: form.burst_mode.checked,
+            BURST_INTERVAL: parseFloat(form.burst_interval.value),
             MODBUS_SLAVE_ID: parseInt(form.modbus_slave_id.value, 10),
             BAUDRATE: parseInt(form.baudrate.value, 10),
             PARITY: form.parity.value,
@@ -1098,83 +1143,90 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     function fetchLatestData() {
-        fetch('/api/latest').then(r => r.json()).then(data => {
-            const readingsDiv = document.getElementById('latest-readings');
-            if (data && data.ts) {
-                let html = '<h2>Latest Readings</h2><table class="readings-table"><thead><tr><th>Parameter</th><th>Value</th></tr></thead><tbody>';
-
-                const units = {
-                    'voltage': 'V', 
-                    'current': 'A', 
-                    'active_power': 'kW',
-                    'reactive_power': 'kvar',
-                    'apparent_power': 'kVA',
-                    'active_energy': 'kWh',
-                    'reactive_energy': 'kvarh',
-                    'power_factor': '',
-                };
-                const order = [
-                    'voltage', 
-                    'current', 
-                    'active_power',
-                    'reactive_power',
-                    'apparent_power',
-                    'active_energy',
-                    'reactive_energy',
-                    'power_factor',
-                ];
-
-                // Sort keys with more specific matching
-                const sortedKeys = Object.keys(data).sort((a, b) => {
-                    if (a === 'ts' || b === 'ts') return a === 'ts' ? 1 : -1;
-
-                    // Find the most specific match for each key
-                    function findBestMatch(key) {
-                        let bestMatch = null;
-                        let bestLength = 0;
-                        
-                        for (const param of order) {
-                            if (key.includes(param) && param.length > bestLength) {
-                                bestMatch = param;
-                                bestLength = param.length;
-                            }
+        fetch('/api/latest')
+            .then(r => r.json())
+            .then(data => renderLatestData(data))
+            .catch(err => console.error('Error fetching data:', err));
+    }
+
+    function renderLatestData(data) {
+        const readingsDiv = document.getElementById('latest-readings');
+        if (data && data.ts) {
+            let html = '<h2>Latest Readings</h2><table class="readings-table"><thead><tr><th>Parameter</th><th>Value</th></tr></thead><tbody>';
+
+            const units = {
+                'voltage': 'V', 
+                'current': 'A', 
+                'active_power': 'kW',
+                'reactive_power': 'kvar',
+                'apparent_power': 'kVA',
+                'active_energy': 'kWh',
+                'reactive_energy': 'kvarh',
+                'power_factor': '',
+            };
+            const order = [
+                'voltage', 
+                'current', 
+                'active_power',
+                'reactive_power',
+                'apparent_power',
+                'active_energy',
+                'reactive_energy',
+                'power_factor',
+            ];
+
+            // Sort keys with more specific matching
+            const sortedKeys = Object.keys(data).sort((a, b) => {
+                if (a === 'ts' || b === 'ts') return a === 'ts' ? 1 : -1;
+
+                // Find the most specific match for each key
+                function findBestMatch(key) {
+                    let bestMatch = null;
+                    let bestLength = 0;
+                    
+                    for (const param of order) {
+                        if (key.includes(param) && param.length > bestLength) {
+                            bestMatch = param;
+                            bestLength = param.length;
                         }
-                        return bestMatch ? order.indexOf(bestMatch) : 999;
                     }
+                    return bestMatch ? order.indexOf(bestMatch) : 999;
+                }
 
-                    const aIndex = findBestMatch(a);
-                    const bIndex = findBestMatch(b);
-
-                    if (aIndex !== 999 && bIndex !== 999) return aIndex - bIndex;
-                    return a.localeCompare(b);
-                });
+                const aIndex = findBestMatch(a);
+                const bIndex = findBestMatch(b);
 
-                for (const key of sortedKeys) {
-                    if (key === 'ts') continue;
-                    const value = data[key];
-                    const formattedKey = key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
+                if (aIndex !== 999 && bIndex !== 999) return aIndex - bIndex;
+                return a.localeCompare(b);
+            });
 
-                    // Find the most specific unit match
-                    let unit = '';
-                    let bestMatchLength = 0;
-                    
-                    for (const paramType in units) {
-                        if (key.includes(paramType) && paramType.length > bestMatchLength) {
-                            unit = units[paramType];
-                            bestMatchLength = paramType.length;
-                        }
+            for (const key of sortedKeys) {
+                if (key === 'ts' || key === 'quality') continue;
+                const value = data[key];
+                const formattedKey = key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
+
+                // Find the most specific unit match
+                let unit = '';
+                let bestMatchLength = 0;
+                
+                for (const paramType in units) {
+                    if (key.includes(paramType) && paramType.length > bestMatchLength) {
+                        unit = units[paramType];
+                        bestMatchLength = paramType.length;
                     }
-                    
-                    html += `<tr><td>${formattedKey}</td><td>${Number(value).toFixed(3)} ${unit}</td></tr>`;
                 }
-
-                html += '</tbody></table>';
-                readingsDiv.innerHTML = html;
+                
+                const formattedValue = value === null ? '-' : `${Number(value).toFixed(3)} ${unit}`;
+                html += `<tr><td>${formattedKey}</td><td>${formattedValue}</td></tr>`;
             }
-        }).catch(err => console.error('Error fetching data:', err));
+
+            html += '</tbody></table>';
+            readingsDiv.innerHTML = html;
+            latestReadingsShown = true;
+        }
     }
 
     // Initialize the webapp
-    startStatusPolling();
+    startEventStream();
     initializeMeterSelector();
 });
\ No newline at end of file
@@ -0,0 +1,16 @@
+# tests/conftest.py
+
+import sys
+import tempfile
+
+from pathlib import Path
+
+# The application modules import each other from src, as they do when run from there
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import config
+
+# Keep databases, spool files and data logs of the tests out of the real data directory
+DATA_DIR = Path(tempfile.mkdtemp(prefix="energy-logger-tests-"))
+config.DS_DIR = DATA_DIR
+config.DB_FILE = DATA_DIR / "database.sqlite"
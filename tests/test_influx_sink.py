@@ -0,0 +1,135 @@
+# tests/test_influx_sink.py
+
+import json
+import socket
+import threading
+
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from influxdb_client import InfluxDBClient
+from components.pipeline import Sample
+from components.sinks import InfluxSink, InfluxSpool
+
+import pytest
+
+START = datetime(2026, 1, 1, 0, 0, 0)
+
+class InfluxStandIn(ThreadingHTTPServer):
+    """
+    Minimal /api/v2/write endpoint that answers with a scripted status and records accepted lines.
+    """
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), WriteHandler)
+        self.status = 204
+        self.requests = []
+        self.accepted = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+class WriteHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        lines = body.split("\n")
+        self.server.requests.append(lines)
+        status = self.server.status
+        if status == 204:
+            self.server.accepted.extend(lines)
+            self.send_response(204)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({"code": "scripted", "message": f"status {status}"}).encode())
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = InfluxStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _sink(url, tmp_path):
+    client = InfluxDBClient(url=url, token="token", org="org", timeout=2000)
+    return InfluxSink(client, ["voltage", "current"], batch_size=2, spool=InfluxSpool(tmp_path / "influx.lp"))
+
+def _samples(start, count):
+    return [Sample(START + timedelta(seconds=start + i), [230.0 + start + i, 1.5]) for i in range(count)]
+
+def _timestamps(lines):
+    return [int(line.rsplit(" ", 1)[1]) for line in lines]
+
+def test_unavailable_server_spools_and_replays_in_order(server, tmp_path):
+    sink = _sink(server.url, tmp_path)
+    server.status = 503
+    sink.write(_samples(0, 2))
+    assert sink.get_stats()["linesSpooled"] == 2
+    assert not sink.get_stats()["online"]
+
+    # Within the backoff, batches go straight to the spool without a request
+    sink.write(_samples(2, 2))
+    assert len(server.requests) == 1
+    assert sink.get_stats()["linesSpooled"] == 4
+
+    server.status = 204
+    sink._retry_at = 0.0
+    sink.write(_samples(4, 2))
+    stats = sink.get_stats()
+    assert stats["online"]
+    assert stats["linesReplayed"] == 4
+    assert stats["spoolBytes"] == 0
+    # The live batch goes first, then the spool replays oldest first
+    assert _timestamps(server.accepted) == _timestamps([sink._encode(s) for s in _samples(4, 2) + _samples(0, 4)])
+
+def test_unreachable_server_spools(tmp_path):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    sink = _sink(f"http://127.0.0.1:{port}", tmp_path)
+    sink.write(_samples(0, 2))
+    stats = sink.get_stats()
+    assert not stats["online"]
+    assert stats["linesSpooled"] == 2
+    assert stats["spoolBytes"] > 0
+
+def test_rejected_batch_is_dropped_not_spooled(server, tmp_path):
+    sink = _sink(server.url, tmp_path)
+    server.status = 400
+    sink.write(_samples(0, 2))
+    stats = sink.get_stats()
+    assert stats["linesRejected"] == 2
+    assert stats["linesSpooled"] == 0
+    assert stats["spoolBytes"] == 0
+    assert stats["online"]
+
+def test_rejection_during_replay_drops_only_that_chunk(server, tmp_path, monkeypatch):
+    monkeypatch.setattr("config.config.INFLUXDB_REPLAY_BATCH", 2)
+    sink = _sink(server.url, tmp_path)
+    sink.spool.append([sink._encode(s) for s in _samples(0, 4)])
+
+    # The first replay chunk is refused, the second is accepted
+    statuses = iter([400, 204])
+    handle = WriteHandler.do_POST
+    def scripted(handler):
+        handler.server.status = next(statuses, 204)
+        handle(handler)
+    monkeypatch.setattr(WriteHandler, "do_POST", scripted)
+
+    sink.flush()
+    stats = sink.get_stats()
+    assert stats["linesRejected"] == 2
+    assert stats["linesReplayed"] == 2
+    assert stats["spoolBytes"] == 0
+    assert _timestamps(server.accepted) == _timestamps([sink._encode(s) for s in _samples(2, 2)])
+
+def test_non_finite_readings_are_left_out(server, tmp_path):
+    sink = _sink(server.url, tmp_path)
+    sink.write([Sample(START, [float("nan"), 1.5]), Sample(START, [float("inf"), float("-inf")])])
+    sink.flush()
+    assert server.accepted == [f"meter_measurements,source=wago_meter,quality=good current=1.5 {int(START.timestamp())}"]
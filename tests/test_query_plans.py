@@ -0,0 +1,34 @@
+# tests/test_query_plans.py
+
+from components.database import check_query_plans, create_log_indexes
+from sqlalchemy import create_engine, text
+
+TABLE = "2026_01_01_000000"
+
+def test_sync_and_range_queries_use_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.sqlite'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            f'CREATE TABLE "{TABLE}" (id INTEGER PRIMARY KEY AUTOINCREMENT, "Timestamp" DATETIME NOT NULL, '
+            f'"Voltage" FLOAT, quality VARCHAR, sync_status VARCHAR NOT NULL)'
+        ))
+        create_log_indexes(connection, TABLE)
+        connection.exec_driver_sql(
+            f'INSERT INTO "{TABLE}" ("Timestamp", "Voltage", quality, sync_status) VALUES (?, ?, ?, ?)',
+            [(f"2026-01-01 00:{i // 60:02d}:{i % 60:02d}", 230.0, "good", "pending") for i in range(1000)]
+        )
+        connection.execute(text("ANALYZE"))
+
+    with engine.connect() as connection:
+        plans = check_query_plans(connection, TABLE)
+    assert plans == {"sync": True, "range": True}
+
+def test_range_query_without_index_is_reported(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.sqlite'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            f'CREATE TABLE "{TABLE}" (id INTEGER PRIMARY KEY AUTOINCREMENT, "Timestamp" DATETIME NOT NULL)'
+        ))
+        plans = check_query_plans(connection, TABLE)
+    assert plans["sync"] is True
+    assert plans["range"] is False
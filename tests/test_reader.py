@@ -0,0 +1,107 @@
+# tests/test_reader.py
+
+import os
+import struct
+import threading
+import time
+import tty
+
+import pytest
+
+from components.bus import ModbusBus
+from components.planner import AcquisitionPlan
+from components.reader import MeterReader, QUALITY_FAIL, QUALITY_OK
+from components.settings import settings
+from components.tcp_reader import crc16
+
+TIMEOUT = 0.3
+REGISTER_MAP = {
+    f"p{address}": {"address": address, "functioncode": 4, "data_type": "float", "number_of_registers": 2,
+                    "description": f"P {address}"}
+    for address in (0, 200, 400, 600)
+}
+
+class RtuSimulator:
+    """
+    Modbus RTU slave on a pseudo terminal. Registers hold their own address as a float.
+    Units answer requests below `silent_from` and reject reads at or above `faulty_from` with an exception.
+    """
+    def __init__(self, silent_from=None, faulty_from=None):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.silent_from = silent_from or {}
+        self.faulty_from = faulty_from or {}
+        self.requests = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def port(self):
+        return os.ttyname(self.slave)
+
+    def _serve(self):
+        buffer = b""
+        while True:
+            try:
+                buffer += os.read(self.master, 256)
+            except OSError:
+                return
+            while len(buffer) >= 8:
+                frame, buffer = buffer[:8], buffer[8:]
+                unit, functioncode, start, count = struct.unpack(">BBHH", frame[:6])
+                self.requests.append((unit, start))
+                if start >= self.silent_from.get(unit, 65536):
+                    continue
+                if start >= self.faulty_from.get(unit, 65536):
+                    body = bytes([unit, functioncode | 0x80, 2])
+                else:
+                    registers = []
+                    for address in range(start, start + count, 2):
+                        registers += struct.unpack(">HH", struct.pack(">f", float(address)))
+                    body = bytes([unit, functioncode, 2 * count]) + struct.pack(f">{count}H", *registers[:count])
+                os.write(self.master, body + crc16(body))
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+@pytest.fixture
+def simulator(monkeypatch):
+    monkeypatch.setitem(settings.data, "TIMEOUT", TIMEOUT)
+    simulators = []
+    def start(**kwargs):
+        simulator = RtuSimulator(**kwargs)
+        simulators.append(simulator)
+        return simulator
+    yield start
+    for simulator in simulators:
+        simulator.close()
+
+def _poll(simulator, unit):
+    reader = MeterReader(use_modbus_flag=True, register_map=REGISTER_MAP, slave_id=unit, bus=ModbusBus(port=simulator.port))
+    started = time.monotonic()
+    values = reader.read_values(AcquisitionPlan(REGISTER_MAP))
+    return reader, values, time.monotonic() - started
+
+def test_register_fault_is_isolated_and_the_sweep_continues(simulator):
+    sim = simulator(faulty_from={1: 600})
+    reader, values, _ = _poll(sim, 1)
+    assert values == [0.0, 200.0, 400.0, None]
+    assert reader.last_quality == [QUALITY_OK, QUALITY_OK, QUALITY_OK, QUALITY_FAIL]
+    # One sweep over the four blocks, then one isolated re-read of the rejected block
+    assert [start for _, start in sim.requests] == [0, 200, 400, 600, 600]
+
+def test_silent_meter_costs_one_timeout(simulator):
+    sim = simulator(silent_from={9: 0})
+    reader, values, elapsed = _poll(sim, 9)
+    assert values is None
+    assert reader.last_quality == [QUALITY_FAIL] * 4
+    assert len(sim.requests) == 1
+    assert elapsed < 2 * TIMEOUT
+
+def test_sweep_stops_at_the_first_link_error(simulator):
+    sim = simulator(silent_from={2: 200})
+    reader, values, elapsed = _poll(sim, 2)
+    assert values is None
+    assert [start for _, start in sim.requests] == [0, 200]
+    assert elapsed < 2 * TIMEOUT
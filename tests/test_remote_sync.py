@@ -0,0 +1,167 @@
+# tests/test_remote_sync.py
+
+import psycopg2
+import pytest
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+from components.remote_pool import RemotePool
+from services import remote_syncer
+from services.remote_syncer import RemoteDBSyncer
+
+BAD = "bad"
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        self.connection.statements.append(statement)
+        if self.connection.lost:
+            self.connection.closed = 1
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.connection.status = TRANSACTION_STATUS_INTRANS
+
+class FakeConnection:
+    """
+    Stand-in for a psycopg2 connection to PostgreSQL.
+    Inserted rows are staged until commit; rows carrying BAD violate a constraint.
+    """
+    def __init__(self):
+        self.closed = 0
+        self.lost = False
+        self.status = TRANSACTION_STATUS_IDLE
+        self.statements = []
+        self.staged = []
+        self.committed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def commit(self):
+        self.committed.extend(self.staged)
+        self.staged = []
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.staged = []
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+def fake_execute_values(cursor, statement, values, page_size=100):
+    cursor.execute(statement)
+    if cursor.connection.lost:
+        return
+    if any(BAD in row for row in values):
+        raise psycopg2.IntegrityError("new row violates check constraint")
+    cursor.connection.staged.extend(values)
+
+@pytest.fixture
+def connect(monkeypatch):
+    """
+    Replaces psycopg2.connect for the pool and records the connections it hands out.
+    """
+    connections = []
+    def fake_connect(**kwargs):
+        connection = FakeConnection()
+        connections.append(connection)
+        return connection
+    monkeypatch.setattr("components.remote_pool.psycopg2.connect", fake_connect)
+    return connections
+
+def _rows(count, bad=()):
+    ids = list(range(100, 100 + count))
+    values = [("2026-01-01 00:00:00", BAD if i in bad else 230.0 + i) for i in range(count)]
+    return ids, values
+
+def test_rejected_batch_is_bisected_to_the_bad_rows(monkeypatch):
+    monkeypatch.setattr(remote_syncer, "execute_values", fake_execute_values)
+    connection = FakeConnection()
+    ids, values = _rows(64, bad={5, 40})
+
+    failed = RemoteDBSyncer()._insert_rows(connection, "remote", ["Timestamp", "Voltage"], ids, values)
+
+    assert failed == [105, 140]
+    assert sorted(connection.committed) == sorted(v for v in values if BAD not in v)
+    # Two bad rows cost two bisection paths, not a row-at-a-time retry of the batch
+    assert len(connection.statements) <= 1 + 2 * 2 * 6
+
+def test_connection_loss_during_insert_is_raised(monkeypatch):
+    monkeypatch.setattr(remote_syncer, "execute_values", fake_execute_values)
+    connection = FakeConnection()
+    connection.lost = True
+    ids, values = _rows(8, bad={3})
+
+    with pytest.raises(psycopg2.OperationalError):
+        RemoteDBSyncer()._insert_rows(connection, "remote", ["Timestamp", "Voltage"], ids, values)
+    assert connection.committed == []
+    assert len(connection.statements) == 1
+
+def test_pool_reuses_idle_connections(connect):
+    pool = RemotePool({"host": "db", "port": 5432, "database": "logs"}, size=2, validate_idle=60)
+    for _ in range(3):
+        with pool.connection() as connection:
+            pass
+    assert len(connect) == 1
+    stats = pool.get_stats()
+    assert stats["connects"] == 1
+    assert stats["reuses"] == 2
+    assert stats["validations"] == 0
+
+def test_pool_discards_broken_and_mid_transaction_connections(connect):
+    pool = RemotePool({"host": "db", "port": 5432, "database": "logs"}, size=2, validate_idle=60)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as connection:
+            connection.lost = True
+            connection.cursor().execute("SELECT 1")
+    assert pool.get_stats()["idle"] == 0
+
+    with pool.connection() as connection:
+        pass
+    connection.status = TRANSACTION_STATUS_INTRANS
+    with pool.connection() as fresh:
+        assert fresh is not connection
+    assert len(connect) == 3
+    assert pool.get_stats()["discards"] == 2
+
+def test_pool_validates_long_idle_connections(connect):
+    pool = RemotePool({"host": "db", "port": 5432, "database": "logs"}, size=2, validate_idle=0)
+    with pool.connection() as connection:
+        pass
+    with pool.connection() as reused:
+        assert reused is connection
+    assert connection.statements == ["SELECT 1"]
+
+    # A connection the server dropped while idle fails validation and is replaced
+    connection.lost = True
+    with pool.connection() as fresh:
+        assert fresh is not connection
+    assert pool.get_stats()["validations"] == 2
+
+def test_pool_backs_off_after_a_failed_connect(monkeypatch):
+    attempts = []
+    def refuse(**kwargs):
+        attempts.append(kwargs)
+        raise psycopg2.OperationalError("could not connect to server")
+    monkeypatch.setattr("components.remote_pool.psycopg2.connect", refuse)
+    pool = RemotePool({"host": "db", "port": 5432, "database": "logs"})
+
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection():
+            pass
+    with pytest.raises(ConnectionError):
+        with pool.connection():
+            pass
+    assert len(attempts) == 1
+    assert pool.get_stats()["connectErrors"] == 1
+    assert pool.get_stats()["retryInSeconds"] is not None
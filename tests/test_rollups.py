@@ -0,0 +1,81 @@
+# tests/test_rollups.py
+
+import math
+import random
+import statistics
+
+from datetime import datetime, timedelta
+from components.database import ENGINE, INGEST_ENGINE, init_db, create_log_table
+from components.pipeline import Sample
+from components.rollups import merge_rollups, summarize
+from sqlalchemy import text
+
+START = datetime(2026, 1, 1, 0, 0, 0)
+REGISTER_MAP = {"voltage": {"description": "Voltage"}}
+
+def _rows(values, offset=0):
+    return [(START + timedelta(seconds=offset + i), value) for i, value in enumerate(values)]
+
+def _ingest(table_name, rows, batch=37):
+    """
+    Inserts rows with their rollups the way the SQLite sink does.
+    """
+    for i in range(0, len(rows), batch):
+        chunk = rows[i:i + batch]
+        with INGEST_ENGINE.begin() as connection:
+            connection.exec_driver_sql(
+                f'INSERT INTO "{table_name}" ("Timestamp", "Voltage", quality, sync_status) VALUES (?, ?, ?, ?)',
+                [(ts.isoformat(" "), value, "good", "pending") for ts, value in chunk]
+            )
+            merge_rollups(connection, table_name, ["Voltage"], [Sample(ts, (value,)) for ts, value in chunk])
+
+def test_std_is_exact_for_large_values_with_small_spread():
+    init_db()
+    table_name = "2026_01_01_000001"
+    create_log_table(table_name, REGISTER_MAP)
+    rng = random.Random(1)
+    values = [1e9 + rng.gauss(0, 0.01) for _ in range(5000)]
+    _ingest(table_name, _rows(values))
+
+    stats = summarize(table_name)["Voltage"]
+    assert stats["count"] == len(values)
+    assert math.isclose(stats["std"], statistics.stdev(values), rel_tol=1e-6)
+
+    # Unaligned range mixing rollup buckets and raw edges
+    stats = summarize(table_name, START + timedelta(seconds=30), START + timedelta(seconds=4000))["Voltage"]
+    assert stats["count"] == 3970
+    assert math.isclose(stats["std"], statistics.stdev(values[30:4000]), rel_tol=1e-6)
+
+def test_session_resumed_from_before_rollups_reads_older_rows_raw():
+    init_db()
+    table_name = "2026_01_01_000002"
+    rng = random.Random(2)
+    old = [230 + rng.random() for _ in range(500)]
+    new = [240 + rng.random() for _ in range(700)]
+
+    # A session table logged before rollups and the sync catalog existed
+    with ENGINE.begin() as connection:
+        connection.execute(text(
+            f'CREATE TABLE "{table_name}" (id INTEGER PRIMARY KEY AUTOINCREMENT, "Timestamp" DATETIME NOT NULL, '
+            f'"Voltage" FLOAT, quality VARCHAR, sync_status VARCHAR NOT NULL)'
+        ))
+        connection.exec_driver_sql(
+            f'INSERT INTO "{table_name}" ("Timestamp", "Voltage", quality, sync_status) VALUES (?, ?, ?, ?)',
+            [(ts.isoformat(" "), value, "good", "pending") for ts, value in _rows(old)]
+        )
+
+    # Startup migration, then the session resumes with rollups
+    init_db()
+    _ingest(table_name, _rows(new, offset=len(old)))
+
+    values = old + new
+    stats = summarize(table_name)["Voltage"]
+    assert stats["count"] == len(values)
+    assert stats["first"] == old[0]
+    assert stats["last"] == new[-1]
+    assert math.isclose(stats["mean"], statistics.fmean(values), rel_tol=1e-9)
+    assert math.isclose(stats["std"], statistics.stdev(values), rel_tol=1e-6)
+
+    stats = summarize(table_name, START + timedelta(seconds=100), START + timedelta(seconds=900))["Voltage"]
+    assert stats["count"] == 800
+    assert math.isclose(stats["mean"], statistics.fmean(values[100:900]), rel_tol=1e-9)
@@ -0,0 +1,139 @@
+# tests/test_tcp_reader.py
+
+import asyncio
+import struct
+import threading
+import time
+
+import pytest
+
+from components.planner import AcquisitionPlan
+from components.reader import QUALITY_FAIL, QUALITY_OK
+from components.tcp_reader import TcpMeterReader, crc16
+
+TIMEOUT = 0.3
+REGISTER_MAP = {
+    f"p{address}": {"address": address, "functioncode": 4, "data_type": "float", "number_of_registers": 2,
+                    "description": f"P {address}"}
+    for address in (0, 200, 400, 600)
+}
+SILENT_UNIT = 9
+LATE_UNIT = 8
+
+def _answer(unit, functioncode, start, count):
+    """
+    Builds the response PDU of a simulated meter, or None for a meter that does not answer.
+    Registers hold their own address as a float; reads from 600 on are rejected.
+    """
+    if unit == SILENT_UNIT:
+        return None
+    if start >= 600:
+        return bytes([functioncode | 0x80, 2])
+    registers = []
+    for address in range(start, start + count, 2):
+        registers += struct.unpack(">HH", struct.pack(">f", float(address)))
+    return bytes([functioncode, 2 * count]) + struct.pack(f">{count}H", *registers[:count])
+
+class GatewaySimulator:
+    """
+    Modbus TCP and RTU-over-TCP gateway on an asyncio server in a background thread.
+    The late unit answers only after twice the client timeout.
+    """
+    def __init__(self):
+        self.requests = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.tcp = asyncio.run_coroutine_threadsafe(asyncio.start_server(self._serve_tcp, "127.0.0.1", 0), self.loop).result()
+        self.rtu = asyncio.run_coroutine_threadsafe(asyncio.start_server(self._serve_rtu, "127.0.0.1", 0), self.loop).result()
+
+    def transport(self, framing, unit, max_inflight):
+        server = self.tcp if framing == "tcp" else self.rtu
+        return {"type": framing, "host": "127.0.0.1", "port": server.sockets[0].getsockname()[1],
+                "unit_id": unit, "timeout": TIMEOUT, "max_inflight": max_inflight}
+
+    async def _respond(self, writer, unit, frame):
+        if unit == LATE_UNIT:
+            await asyncio.sleep(2 * TIMEOUT)
+        writer.write(frame)
+        await writer.drain()
+
+    async def _serve_tcp(self, reader, writer):
+        try:
+            while True:
+                tid, _, length, unit = struct.unpack(">HHHB", await reader.readexactly(7))
+                functioncode, start, count = struct.unpack(">BHH", await reader.readexactly(length - 1))
+                self.requests.append((unit, start))
+                pdu = _answer(unit, functioncode, start, count)
+                if pdu is not None:
+                    frame = struct.pack(">HHHB", tid, 0, len(pdu) + 1, unit) + pdu
+                    asyncio.ensure_future(self._respond(writer, unit, frame))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def _serve_rtu(self, reader, writer):
+        try:
+            while True:
+                frame = await reader.readexactly(8)
+                unit, functioncode, start, count = struct.unpack(">BBHH", frame[:6])
+                self.requests.append((unit, start))
+                pdu = _answer(unit, functioncode, start, count)
+                if pdu is not None:
+                    body = bytes([unit]) + pdu
+                    writer.write(body + crc16(body))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def _shutdown(self):
+        for server in (self.tcp, self.rtu):
+            server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=1)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=1)
+
+@pytest.fixture
+def gateway():
+    simulator = GatewaySimulator()
+    yield simulator
+    simulator.close()
+
+def _poll(gateway, framing, unit, max_inflight=4):
+    transport = gateway.transport(framing, unit, max_inflight)
+    reader = TcpMeterReader(transport, use_modbus_flag=True, register_map=REGISTER_MAP, slave_id=unit)
+    started = time.monotonic()
+    values = reader.read_values(AcquisitionPlan(REGISTER_MAP))
+    return reader, values, time.monotonic() - started
+
+@pytest.mark.parametrize("framing", ["tcp", "rtu_over_tcp"])
+def test_register_fault_is_isolated(gateway, framing):
+    reader, values, _ = _poll(gateway, framing, 1)
+    assert values == [0.0, 200.0, 400.0, None]
+    assert reader.last_quality == [QUALITY_OK, QUALITY_OK, QUALITY_OK, QUALITY_FAIL]
+
+@pytest.mark.parametrize("framing", ["tcp", "rtu_over_tcp"])
+def test_queued_reads_are_cancelled_at_the_first_link_error(gateway, framing):
+    reader, values, elapsed = _poll(gateway, framing, SILENT_UNIT, max_inflight=1)
+    assert values is None
+    assert reader.last_quality == [QUALITY_FAIL] * 4
+    # The reads queued behind the in-flight limit never reach the gateway
+    assert gateway.requests == [(SILENT_UNIT, 0)]
+    assert reader.gateway.get_stats()["requests"] == 1
+    assert elapsed < 2 * TIMEOUT
+
+def test_late_responses_do_not_leak_into_later_reads(gateway):
+    reader, values, _ = _poll(gateway, "tcp", LATE_UNIT)
+    assert values is None
+    assert reader.gateway._pending == {}
+
+    # The late responses arrive on the same connection while the next poll runs
+    time.sleep(TIMEOUT)
+    reader, values, _ = _poll(gateway, "tcp", 1)
+    assert values == [0.0, 200.0, 400.0, None]
+    assert reader.gateway.get_stats()["connects"] == 1